@@ -0,0 +1,153 @@
+# --- BEST-AVAILABLE SEAT ALLOCATOR ---
+# Keeps, per show, the runs of free seats in every row and patches only the
+# rows a booking or hold touched. A request for N adjacent seats scans the
+# run index (a few entries per row), not the seats, and ranks candidate
+# blocks by distance to the ideal viewing spot, penalising blocks that would
+# strand a single seat. The same index answers "N seats together" search
+# filters (with_adjacent_free).
+
+import re
+import threading
+
+from seat_inventory import FREE, HELD
+
+_FREE_RUN = re.compile(rb"\x00+")  # FREE == 0
+
+# Preferred row as a fraction of the hall depth, measured from the screen
+IDEAL_ROW = 0.6
+ROW_WEIGHT = 1.5
+ORPHAN_PENALTY = 4.0
+
+
+class ShowRuns:
+    """ Free-run index of one show: runs[r] is a list of (start_col, length) """
+
+    def __init__(self, rows, cols, states):
+        self.rows = rows
+        self.cols = cols
+        self.available = bytearray(states)  # FREE or not, holds included
+        self.runs = [self._scan(r) for r in range(rows)]
+        self.row_longest = [max((n for _, n in runs), default=0) for runs in self.runs]
+        self.longest = max(self.row_longest, default=0)  # Longest run of any row
+
+    def _scan(self, r):
+        row = self.available[r * self.cols:(r + 1) * self.cols]
+        return [(m.start(), m.end() - m.start()) for m in _FREE_RUN.finditer(row)]
+
+    def update(self, indices, free):
+        value = FREE if free else HELD
+        touched = set()
+        for i in indices:
+            self.available[i] = value
+            touched.add(i // self.cols)
+        for r in touched:
+            runs = self.runs[r] = self._scan(r)
+            self.row_longest[r] = max((n for _, n in runs), default=0)
+        self.longest = max(self.row_longest, default=0)
+
+    def best(self, count):
+        """ Best block of `count` adjacent free seats as (row, start_col), or None """
+        ideal_row = (self.rows - 1) * IDEAL_ROW
+        centre = (self.cols - count) / 2  # Start column that centres the block
+        best, best_score = None, None
+        for r, runs in enumerate(self.runs):
+            row_cost = abs(r - ideal_row) * ROW_WEIGHT
+            if best_score is not None and row_cost >= best_score:
+                continue  # Even a perfectly centred block in this row can't win
+            for start, length in runs:
+                if length < count:
+                    continue
+                last = start + length - count
+                # Best starts in a run: flush with either end (no orphans) or nearest the centre
+                candidates = {start, last, min(max(round(centre), start), last)}
+                for s in candidates:
+                    left, right = s - start, last - s
+                    score = row_cost + abs(s - centre)
+                    if left == 1 or right == 1:
+                        score += ORPHAN_PENALTY
+                    if best_score is None or score < best_score:
+                        best, best_score = (r, s), score
+        return best
+
+
+class SeatAllocator:
+    """ Maintains ShowRuns for every show, fed by BookingService change notifications """
+
+    def __init__(self, inventory, service):
+        self.inventory = inventory
+        self.service = service
+        self._shows = {}
+        self._longest = {}  # { show: longest free run } of indexed shows, and of untouched ones looked up
+        self._template_longest = {}  # { layout name (None = default hall): longest run of an untouched show }
+        self._lock = threading.Lock()
+        service.add_observer(self._on_change)
+
+    def _on_change(self, show, indices, state, session):
+        runs = self._shows.get(show)
+        if runs is not None:
+            runs.update(indices, free=(state == FREE))
+            self._longest[show] = runs.longest
+        else:
+            self._longest.pop(show, None)  # No longer untouched: indexed on its next lookup
+
+    def _runs(self, show):
+        runs = self._shows.get(show)
+        if runs is None:
+            with self._lock:
+                runs = self._shows.get(show)
+                if runs is None:
+                    # Built under the show lock so no change can slip in before we start observing
+                    with self.service.lock_for(show):
+                        states = bytearray(self.inventory.ensure_show(show))
+                        for coord in self.service.held_seats(show):
+                            states[self.inventory.index(coord, show)] = HELD
+                        cols = self.inventory.cols_for(show)
+                        runs = self._shows[show] = ShowRuns(len(states) // cols, cols, states)
+                        self._longest[show] = runs.longest
+        return runs
+
+    def forget(self, show):
+        with self._lock:
+            self._shows.pop(show, None)
+            self._longest.pop(show, None)
+
+    def reset(self):
+        """ Forgets every index, e.g. after the inventory was reloaded from storage """
+        with self._lock:
+            self._shows.clear()
+            self._longest.clear()
+
+    def longest_free_run(self, show):
+        """ Most free seats side by side in any one row of the show (held seats are not free) """
+        longest = self._longest.get(show)
+        if longest is not None:
+            return longest
+        if self.inventory.has_show(show):
+            return self._runs(show).longest
+        # Nobody booked or held anything yet: the layout's own longest run, without building an index
+        layout = self.inventory.layout(show)
+        key = layout.name if layout is not None else None
+        longest = self._template_longest.get(key)
+        if longest is None:
+            cols = self.inventory.cols_for(show)
+            seats = layout.template if layout is not None else bytes(self.inventory.rows * cols)
+            longest = self._template_longest[key] = ShowRuns(len(seats) // cols, cols, seats).longest
+        with self.service.lock_for(show):
+            if not self.inventory.has_show(show):  # Still untouched: a change would have to take this lock
+                self._longest[show] = longest
+        return longest
+
+    def with_adjacent_free(self, shows, count):
+        """ The shows (in order) that have `count` free seats side by side, e.g. a CatalogIndex search filter """
+        longest, lookup = self._longest, self.longest_free_run
+        return [show for show in shows if (longest[show] if show in longest else lookup(show)) >= count]
+
+    def best_seats(self, show, count):
+        """ Coordinates of the best `count` adjacent free seats, or None if no row has room """
+        if count <= 0:
+            return None
+        found = self._runs(show).best(count)
+        if found is None:
+            return None
+        r, start = found
+        return [(r, c) for c in range(start, start + count)]
@@ -0,0 +1,329 @@
+# --- OCCUPANCY & REVENUE ANALYTICS ---
+# Aggregates booking events into NumPy arrays indexed by (show, row, col):
+# how often each seat sold, in which order it sold within its show, plus
+# per-show revenue and per-day ticket counts. Events are added in batches with
+# vectorized updates, so a batch costs O(batch size) however large the history
+# is, and a full recompute over millions of bookings is a few array passes.
+# Reports come out as columnar tables ({column: list}) for CSV or .npz export.
+#
+#     python analytics.py --data-dir bookings_data --out reports
+#     python analytics.py --sqlite bookings.db --out reports
+#
+# Needs NumPy (the rest of the app does not).
+
+import argparse
+import csv
+import datetime
+import os
+import threading
+import time
+
+import numpy as np
+
+from schedule import split_time
+from seat_inventory import BOOKED
+
+SECONDS_PER_DAY = 86_400
+NO_DAY = -1  # Day index of events without a timestamp
+
+
+class BookingAnalytics:
+    def __init__(self, layout_for, base_price, capacity=1024):
+        """
+        `layout_for(show)` returns the show's layouts.ScreenLayout and
+        `base_price(show)` its movie's base ticket price.
+        """
+        self.layout_for = layout_for
+        self.base_price = base_price
+        self.rows, self.cols = 1, 1
+        self._ids = {}        # { show: show id }
+        self.shows = []       # show id -> (movie_id, time)
+        self.screens = []     # show id -> layout name
+        self._tables = {}     # { (layout name, base price): table id }
+        self._table_rows = []
+        self.prices = np.zeros((0, 1))  # table id -> price of each seat index
+
+        self.sold = np.zeros((capacity, 1, 1), np.uint32)   # times each seat sold
+        self.rank = np.zeros((capacity, 1, 1), np.uint32)   # 1-based order of the seat's first sale, 0 = unsold
+        self.booked = np.zeros(capacity, np.int64)         # tickets per show
+        self.revenue = np.zeros(capacity)
+        self.seat_count = np.zeros(capacity, np.int32)
+        self.layout_cols = np.ones(capacity, np.int32)
+        self.table = np.zeros(capacity, np.int32)
+
+        self.days = {}  # { days since the epoch: [tickets, revenue] }
+        self._pending = []
+        self._pending_lock = threading.Lock()  # Guards the queue swap only
+        self._flush_lock = threading.Lock()    # One aggregation at a time
+
+    # --- Shows ---
+
+    def show_id(self, show):
+        sid = self._ids.get(show)
+        if sid is None:
+            sid = self._register(show)
+        return sid
+
+    def _register(self, show):
+        layout = self.layout_for(show)
+        base = self.base_price(show)
+        if layout.rows > self.rows or layout.cols > self.cols:
+            self._grow_grid(max(self.rows, layout.rows), max(self.cols, layout.cols))
+        sid = len(self.shows)
+        if sid == len(self.booked):
+            self._grow_shows(2 * sid)
+
+        key = (layout.name, base)
+        table = self._tables.get(key)
+        if table is None:
+            table = self._tables[key] = len(self._table_rows)
+            self._table_rows.append(layout.price_table(base))
+            width = max(len(row) for row in self._table_rows)
+            self.prices = np.zeros((len(self._table_rows), width))
+            for t, row in enumerate(self._table_rows):
+                self.prices[t, :len(row)] = row
+
+        self.shows.append(show)
+        self.screens.append(layout.name)
+        self.seat_count[sid] = layout.seat_count
+        self.layout_cols[sid] = layout.cols
+        self.table[sid] = table
+        self._ids[show] = sid
+        return sid
+
+    def _grow_shows(self, capacity):
+        def grow(a):
+            bigger = np.zeros((capacity,) + a.shape[1:], a.dtype)
+            bigger[:len(a)] = a
+            return bigger
+        self.sold, self.rank = grow(self.sold), grow(self.rank)
+        self.booked, self.revenue, self.seat_count = grow(self.booked), grow(self.revenue), grow(self.seat_count)
+        self.layout_cols, self.table = grow(self.layout_cols), grow(self.table)
+
+    def _grow_grid(self, rows, cols):
+        pad = ((0, 0), (0, rows - self.rows), (0, cols - self.cols))
+        self.sold, self.rank = np.pad(self.sold, pad), np.pad(self.rank, pad)
+        self.rows, self.cols = rows, cols
+
+    # --- Adding bookings ---
+
+    def add_arrays(self, show_ids, seats, days=None):
+        """
+        Vectorized core: one entry per booked seat, in booking order. `show_ids`
+        come from show_id(), `seats` are seat indices within the show's layout,
+        `days` are days since the epoch (NO_DAY if unknown).
+        """
+        show_ids = np.asarray(show_ids, np.int64)
+        seats = np.asarray(seats, np.int64)
+        if not len(show_ids):
+            return
+        cols = self.layout_cols[show_ids]
+        rows, cs = seats // cols, seats % cols
+        cells = (show_ids * self.rows + rows) * self.cols + cs
+
+        # Group by show (stable, so booking order is kept within a show)
+        order = np.argsort(show_ids, kind="stable")
+        sorted_ids = show_ids[order]
+        group_start = np.r_[0, np.flatnonzero(np.diff(sorted_ids)) + 1]
+        group_size = np.diff(np.r_[group_start, len(sorted_ids)])
+        shows = sorted_ids[group_start]
+
+        # One sort of the cells gives both the sale counts and each seat's first sale in this batch
+        cell_ids, first, counts = np.unique(cells[order], return_index=True, return_counts=True)
+        self.sold.reshape(-1)[cell_ids] += counts.astype(np.uint32)
+
+        # Sale order within each show: continue from the show's ticket count so far
+        ranks = self.booked[sorted_ids] + (np.arange(len(sorted_ids)) - np.repeat(group_start, group_size)) + 1
+        rank = self.rank.reshape(-1)
+        unsold = rank[cell_ids] == 0
+        rank[cell_ids[unsold]] = ranks[first][unsold]
+
+        prices = self.prices[self.table[show_ids], seats]
+        self.booked[shows] += group_size
+        self.revenue[shows] += np.add.reduceat(prices[order], group_start)
+
+        if days is not None:
+            days = np.broadcast_to(np.asarray(days, np.int64), show_ids.shape)
+            day_ids, per_day = np.unique(days, return_inverse=True)
+            tickets = np.bincount(per_day)
+            takings = np.bincount(per_day, weights=prices)
+            for day, n, amount in zip(day_ids.tolist(), tickets.tolist(), takings.tolist()):
+                if day != NO_DAY:
+                    totals = self.days.setdefault(day, [0, 0.0])
+                    totals[0] += n
+                    totals[1] += amount
+
+    def add_events(self, events, chunk=1_000_000):
+        """ Adds (show, indices, booked_at) events (booked_at in unix seconds or None), `chunk` seats at a time """
+        show_ids, seats, days = [], [], []
+        for show, indices, booked_at in events:
+            sid = self.show_id(show)
+            day = NO_DAY if booked_at is None else int(booked_at) // SECONDS_PER_DAY
+            n = len(indices)
+            show_ids.extend([sid] * n)
+            seats.extend(indices)
+            days.extend([day] * n)
+            if len(seats) >= chunk:
+                self.add_arrays(show_ids, seats, days)
+                show_ids, seats, days = [], [], []
+        self.add_arrays(show_ids, seats, days)
+
+    # --- Live updates ---
+
+    def attach(self, service, clock=time.time, key=None):
+        """
+        Queues every booking committed through a BookingService, under
+        `key(show)` if given. The observer only appends to a list; the
+        aggregation happens in flush().
+        """
+        def on_change(show, indices, state, session):
+            if state == BOOKED:
+                if key is not None:
+                    show = key(show)
+                with self._pending_lock:
+                    self._pending.append((show, indices, clock()))
+
+        service.add_observer(on_change)
+
+    def flush(self):
+        """ Aggregates the bookings queued since the last flush (O(number queued)) """
+        with self._flush_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, []
+            self.add_events(pending)
+
+    # --- Reports ---
+
+    def _n(self):
+        return len(self.shows)
+
+    def show_table(self):
+        n = self._n()
+        booked, capacity = self.booked[:n], self.seat_count[:n]
+        return {
+            "movie_id": [m for m, _ in self.shows],
+            "time": [t for _, t in self.shows],
+            "screen": list(self.screens),
+            "capacity": capacity.tolist(),
+            "sold": booked.tolist(),
+            "occupancy": np.round(booked / np.maximum(capacity, 1), 4).tolist(),
+            "revenue": np.round(self.revenue[:n], 2).tolist(),
+        }
+
+    def _grouped(self, name, keys):
+        """ Sums per-show totals over shows sharing a key (movie id, time slot, ...) """
+        n = self._n()
+        labels, group = np.unique(np.asarray(keys), return_inverse=True)
+        sold = np.bincount(group, weights=self.booked[:n], minlength=len(labels))
+        capacity = np.bincount(group, weights=self.seat_count[:n], minlength=len(labels))
+        revenue = np.bincount(group, weights=self.revenue[:n], minlength=len(labels))
+        return {
+            name: labels.tolist(),
+            "shows": np.bincount(group, minlength=len(labels)).tolist(),
+            "capacity": capacity.astype(np.int64).tolist(),
+            "sold": sold.astype(np.int64).tolist(),
+            "occupancy": np.round(sold / np.maximum(capacity, 1), 4).tolist(),
+            "revenue": np.round(revenue, 2).tolist(),
+        }
+
+    def movie_table(self):
+        return self._grouped("movie_id", [m for m, _ in self.shows])
+
+    def slot_table(self):
+        return self._grouped("time", [split_time(t)[1] for _, t in self.shows])  # Every day's showing of a time
+
+    def day_table(self):
+        days = sorted(self.days)
+        return {
+            "day": [(datetime.date(1970, 1, 1) + datetime.timedelta(days=d)).isoformat() for d in days],
+            "sold": [self.days[d][0] for d in days],
+            "revenue": [round(self.days[d][1], 2) for d in days],
+        }
+
+    def heatmap(self, screen):
+        """
+        (sold_fraction, mean_rank) arrays of the screen's (rows, cols): the share
+        of its shows in which each seat sold, and the seat's average position in
+        the sale order (low = sells first; nan where it never sold).
+        """
+        ids = np.flatnonzero(np.asarray(self.screens) == screen)
+        layout = self.layout_for(self.shows[ids[0]]) if len(ids) else None
+        rows, cols = (layout.rows, layout.cols) if layout is not None else (0, 0)
+        sold = self.sold[ids, :rows, :cols]
+        rank = self.rank[ids, :rows, :cols].astype(float)
+        sold_fraction = (sold > 0).sum(axis=0) / max(len(ids), 1)
+        with np.errstate(invalid="ignore"):
+            mean_rank = rank.sum(axis=0) / (rank > 0).sum(axis=0)
+        return sold_fraction, mean_rank
+
+    def screen_names(self):
+        return sorted(set(self.screens))
+
+
+# --- Export ---
+
+def write_csv(table, path):
+    """ Writes a columnar table ({column: list}) as CSV """
+    columns = list(table)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(zip(*(table[c] for c in columns)))
+
+
+def write_columns(table, path):
+    """
+    Writes a columnar table with one array per column: Parquet when the path
+    ends in .parquet and pyarrow is installed, otherwise a compressed .npz.
+    """
+    if path.endswith(".parquet"):
+        import pyarrow
+        import pyarrow.parquet
+        pyarrow.parquet.write_table(pyarrow.table(table), path)
+    else:
+        np.savez_compressed(path, **{c: np.asarray(v) for c, v in table.items()})
+
+
+def write_heatmap(matrix, path):
+    np.savetxt(path, matrix, delimiter=",", fmt="%.4f")
+
+
+def export(analytics, directory, columnar=".npz"):
+    """ Writes every report to `directory` as CSV plus columnar files; returns the paths """
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    for name, table in (("shows", analytics.show_table()), ("movies", analytics.movie_table()),
+                        ("slots", analytics.slot_table()), ("days", analytics.day_table())):
+        for path, write in ((f"{name}.csv", write_csv), (f"{name}{columnar}", write_columns)):
+            write(table, os.path.join(directory, path))
+            written.append(path)
+    for screen in analytics.screen_names():
+        sold_fraction, mean_rank = analytics.heatmap(screen)
+        for kind, matrix in (("sold", sold_fraction), ("rank", mean_rank)):
+            path = f"heatmap-{screen}-{kind}.csv"
+            write_heatmap(matrix, os.path.join(directory, path))
+            written.append(path)
+    return written
+
+
+if __name__ == "__main__":
+    import booking_core
+
+    parser = argparse.ArgumentParser(description="Occupancy and revenue reports")
+    parser.add_argument("--data-dir", help="write-ahead log directory to read")
+    parser.add_argument("--sqlite", help="SQLite database to read")
+    parser.add_argument("--out", default="reports")
+    parser.add_argument("--parquet", action="store_true", help="write .parquet instead of .npz (needs pyarrow)")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        store = booking_core.enable_sqlite(args.sqlite)
+    elif args.data_dir:
+        booking_core.use_cold_store(os.path.join(args.data_dir, "archive"))
+        store = booking_core.BookingLog(args.data_dir)
+    else:
+        parser.error("pass --data-dir or --sqlite")
+    analytics = booking_core.new_analytics()
+    analytics.add_events(booking_core.booking_history(store))  # Archived showings included
+    for path in export(analytics, args.out, ".parquet" if args.parquet else ".npz"):
+        print(os.path.join(args.out, path))
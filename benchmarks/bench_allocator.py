@@ -0,0 +1,69 @@
+"""
+Best-available allocator on an 800-seat hall that is 90% sold.
+
+Reports best_seats() latency per group size and the cost of keeping the run
+index up to date per booking. The allocator's correctness properties are
+checked in tests/test_allocator.py.
+
+    python -m benchmarks.bench_allocator
+"""
+import argparse
+import random
+import statistics
+import time
+
+from allocator import SeatAllocator
+from booking_service import BookingService
+from layouts import parse_layout
+from seat_inventory import FREE, SeatInventory
+
+# 25 rows x (8 + 16 + 8) seats with two aisles = 800 seats
+HALL = parse_layout("[classes]\nS standard 0\n[rows]\n" + "".join(
+    f"R{r}: SSSSSSSS.SSSSSSSSSSSSSSSS.SSSSSSSS\n" for r in range(25)), "bench800")
+SHOW = (1, "07:00 PM")
+
+
+def make_show(fill, seed):
+    inventory = SeatInventory(layout_for=lambda show: HALL)
+    service = BookingService(inventory)
+    allocator = SeatAllocator(inventory, service)
+    allocator.best_seats(SHOW, 1)  # Build the run index before booking, so it is maintained incrementally
+    rng = random.Random(seed)
+    seats = [i for i, cat in enumerate(HALL.categories) if cat != 0xFF]
+    sold = rng.sample(seats, int(len(seats) * fill))
+    for i in sold:
+        service.commit("filler", SHOW, [HALL.coord(i)])
+    return inventory, service, allocator, rng
+
+
+def bench(fill, samples):
+    inventory, service, allocator, rng = make_show(fill, 42)
+    print(f"{HALL.seat_count}-seat hall, {fill:.0%} sold ({inventory.count_available(SHOW)} free):")
+    for count in (1, 2, 4, 6, 8):
+        timings = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            allocator.best_seats(SHOW, count)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(f"  best {count}: median {statistics.median(timings) * 1e6:7.1f} us, "
+              f"max {timings[-1] * 1e6:7.1f} us")
+
+    # Incremental index maintenance cost per booking
+    free = [HALL.coord(i) for i, s in enumerate(inventory.snapshot(SHOW)) if s == FREE]
+    start = time.perf_counter()
+    for coord in free:
+        service.commit("bench", SHOW, [coord])
+    print(f"  commit incl. index update: {(time.perf_counter() - start) / len(free) * 1e6:.1f} us per booking")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fill", type=float, default=0.9)
+    parser.add_argument("--samples", type=int, default=2000)
+    args = parser.parse_args()
+    bench(args.fill, args.samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Analytics aggregation: a full recompute over --bookings booked seats (default
+10M) through the vectorized path, the event path the log/SQLite history goes
+through, and incremental flushes of growing batch sizes on top of the full
+history (their cost should track the batch, not the history).
+
+    python -m benchmarks.bench_analytics
+"""
+import argparse
+import time
+
+import numpy as np
+
+from analytics import BookingAnalytics
+from layouts import load_layout
+
+SCREENS = ("standard", "imax")
+
+
+def make_analytics(shows):
+    layouts = [load_layout(name) for name in SCREENS]
+    analytics = BookingAnalytics(lambda show: layouts[show[0] % 2], lambda show: 200.0 + show[0] % 4 * 50)
+    for m in range(shows):
+        analytics.show_id((m, "07:00 PM"))
+    return analytics, layouts
+
+
+def random_seats(rng, analytics, layouts, n):
+    """ n (show id, seat index, day) triples on real seats of each show's layout """
+    show_ids = rng.integers(0, len(analytics.shows), n)
+    seat_tables = [np.flatnonzero(np.frombuffer(layout.template, np.uint8) == 0) for layout in layouts]
+    seats = np.empty(n, np.int64)
+    for k, table in enumerate(seat_tables):
+        mask = show_ids % 2 == k
+        seats[mask] = table[rng.integers(0, len(table), mask.sum())]
+    days = 20_000 + rng.integers(0, 90, n)
+    return show_ids, seats, days
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bookings", type=int, default=10_000_000)
+    parser.add_argument("--shows", type=int, default=50_000)
+    parser.add_argument("--events", type=int, default=1_000_000, help="events for the event-path run")
+    args = parser.parse_args()
+    rng = np.random.default_rng(3)
+
+    analytics, layouts = make_analytics(args.shows)
+    show_ids, seats, days = random_seats(rng, analytics, layouts, args.bookings)
+    start = time.perf_counter()
+    for lo in range(0, args.bookings, 2_000_000):
+        analytics.add_arrays(show_ids[lo:lo + 2_000_000], seats[lo:lo + 2_000_000], days[lo:lo + 2_000_000])
+    full = time.perf_counter() - start
+    start = time.perf_counter()
+    reports = [analytics.show_table(), analytics.movie_table(), analytics.slot_table(), analytics.day_table()]
+    heatmaps = [analytics.heatmap(screen) for screen in SCREENS]
+    report_s = time.perf_counter() - start
+    print(f"full recompute: {args.bookings:,} seats over {args.shows:,} shows in {full:.2f} s "
+          f"({args.bookings / full / 1e6:.1f}M seats/s); reports + heatmaps {report_s:.2f} s")
+    assert sum(reports[0]["sold"]) == args.bookings and len(heatmaps) == len(SCREENS)
+
+    events_analytics, _ = make_analytics(args.shows)
+    ids, ev_seats, ev_days = random_seats(rng, events_analytics, layouts, args.events)
+    events = [(events_analytics.shows[i], [s], d * 86_400) for i, s, d in zip(ids.tolist(), ev_seats.tolist(),
+                                                                                   ev_days.tolist())]
+    start = time.perf_counter()
+    events_analytics.add_events(events)
+    elapsed = time.perf_counter() - start
+    print(f"event path: {args.events:,} (show, seats, time) events in {elapsed:.2f} s "
+          f"({args.events / elapsed / 1e6:.2f}M events/s)")
+
+    for batch in (10, 100, 1_000, 10_000):
+        ids, b_seats, b_days = random_seats(rng, analytics, layouts, batch)
+        pending = [(analytics.shows[i], [s], d * 86_400) for i, s, d in zip(ids.tolist(), b_seats.tolist(),
+                                                                            b_days.tolist())]
+        start = time.perf_counter()
+        analytics._pending = pending
+        analytics.flush()
+        elapsed = time.perf_counter() - start
+        print(f"  incremental flush of {batch:6,} bookings: {elapsed * 1000:8.2f} ms "
+              f"({elapsed / batch * 1e6:.2f} us per booking)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Concurrent booking stress test.
+
+Many threads (and asyncio sessions) hold and commit random seats across a set
+of shows. Reports bookings/sec and checks that no seat was ever sold twice.
+
+    python -m benchmarks.bench_booking --threads 64 --shows 200
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+
+from booking_service import BookingService, SeatUnavailableError
+from seat_inventory import SeatInventory
+
+
+def _attempt(service, session, show, rng, rows, cols, group):
+    r = rng.randrange(rows)
+    c = rng.randrange(cols - group + 1)
+    coords = [(r, c + k) for k in range(group)]
+    try:
+        service.hold(session, show, coords)
+        service.commit(session, show, coords)
+        return coords
+    except SeatUnavailableError:
+        service.release(session, show, coords)
+        return None
+
+
+def _verify(inventory, sold, label):
+    seen = set()
+    for show, coords in sold:
+        for coord in coords:
+            key = (show, coord)
+            assert key not in seen, f"double booking: {key}"
+            seen.add(key)
+    booked = sum(inventory.count_booked(show) for show in inventory.shows())
+    assert booked == len(seen), f"inventory has {booked} booked seats, sessions sold {len(seen)}"
+    print(f"  {label}: {len(seen)} seats sold, 0 double-bookings")
+
+
+def run_threads(n_threads, n_shows, attempts, rows, cols, group):
+    inventory = SeatInventory(rows, cols)
+    service = BookingService(inventory)
+    shows = [(m, "09:00 AM") for m in range(n_shows)]
+    sold = []
+    sold_lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        session = f"t{seed}"
+        mine = []
+        for _ in range(attempts):
+            show = rng.choice(shows)
+            coords = _attempt(service, session, show, rng, rows, cols, group)
+            if coords:
+                mine.append((show, coords))
+        with sold_lock:
+            sold.extend(mine)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    total = n_threads * attempts
+    print(f"threads={n_threads} shows={n_shows}: {total / elapsed:,.0f} attempts/s, "
+          f"{len(sold) / elapsed:,.0f} bookings/s")
+    _verify(inventory, sold, "threads")
+
+
+def run_asyncio(n_sessions, n_shows, attempts, rows, cols, group):
+    inventory = SeatInventory(rows, cols)
+    service = BookingService(inventory)
+    shows = [(m, "09:00 AM") for m in range(n_shows)]
+    sold = []
+
+    async def session_task(seed):
+        rng = random.Random(seed)
+        for _ in range(attempts):
+            show = rng.choice(shows)
+            coords = _attempt(service, f"a{seed}", show, rng, rows, cols, group)
+            if coords:
+                sold.append((show, coords))
+            await asyncio.sleep(0)
+
+    async def main():
+        await asyncio.gather(*(session_task(i) for i in range(n_sessions)))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    elapsed = time.perf_counter() - start
+    print(f"asyncio sessions={n_sessions} shows={n_shows}: {len(sold) / elapsed:,.0f} bookings/s")
+    _verify(inventory, sold, "asyncio")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--shows", type=int, default=100)
+    parser.add_argument("--attempts", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--cols", type=int, default=25)
+    parser.add_argument("--group", type=int, default=2)
+    args = parser.parse_args()
+
+    run_threads(args.threads, args.shows, args.attempts, args.rows, args.cols, args.group)
+    # Few shows + many sessions = heavy contention on the same seats
+    run_threads(args.threads, 1, args.attempts, args.rows, args.cols, args.group)
+    run_asyncio(args.sessions, args.shows, max(1, args.attempts // 20), args.rows, args.cols, args.group)
+
+
+if __name__ == "__main__":
+    main()
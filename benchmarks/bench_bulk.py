@@ -0,0 +1,100 @@
+"""
+Bulk import throughput and memory: --lines JSONL booking requests (1-4 seats
+each, many colliding with earlier ones) spread over a synthetic catalog,
+imported in memory and with the write-ahead log, then exported. The memory
+pass generates its input on the fly and discards the report, so its peak
+shows what the importer itself keeps (it should not grow with the input).
+
+    python -m benchmarks.bench_bulk --lines 200000
+"""
+import argparse
+import io
+import json
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import booking_core
+import bulk
+
+TIMES = ["10:00 AM", "01:00 PM", "04:00 PM", "07:00 PM", "10:00 PM"]
+FIRST_ID = 1_000
+
+
+def add_movies(count):
+    movies = [{"id": FIRST_ID + n, "title": f"Movie {n}", "genre": "Drama", "price": 250.0,
+               "timings": TIMES, "screen": "imax" if n % 3 == 0 else "standard", "description": ""}
+              for n in range(count)]
+    booking_core.MOVIES.extend(movies)
+    booking_core.MOVIES_BY_ID.update((m["id"], m) for m in movies)
+    return movies
+
+
+def request_lines(movies, count, rng):
+    labels = {}
+    for movie in movies:
+        layout = booking_core.movie_layout(movie)
+        labels.setdefault(layout.name, [l for l in layout.labels if l is not None])
+    for n in range(count):
+        movie = movies[rng.randrange(len(movies))]
+        names = labels[movie["screen"]]
+        start = rng.randrange(len(names) - 4)
+        seats = names[start:start + rng.randint(1, 4)]
+        yield json.dumps({"ref": f"r{n}", "movie_id": movie["id"], "time": rng.choice(TIMES), "seats": seats})
+
+
+def run(label, movies, count, seed):
+    lines = list(request_lines(movies, count, random.Random(seed)))  # Generated up front, not timed
+    report = io.StringIO()
+    start = time.perf_counter()
+    totals = bulk.import_bookings(bulk.read_lines(lines), bulk.report_writer(report))
+    elapsed = time.perf_counter() - start
+    print(f"  {label:10s}: {count:,} lines in {elapsed:.2f} s = {count / elapsed:,.0f} lines/s "
+          f"({totals['ok']:,} booked, {totals['failed']:,} failed)")
+
+
+def peak_memory(movies, count, seed):
+    """ Peak traced allocations of an import whose report is discarded """
+    rng = random.Random(seed)
+    tracemalloc.start()
+    bulk.import_bookings(bulk.read_lines(request_lines(movies, count, rng)), lambda *line: None)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=200_000)
+    parser.add_argument("--movies", type=int, default=2_000)
+    parser.add_argument("--memory-lines", type=int, default=20_000)
+    args = parser.parse_args()
+
+    movies = add_movies(args.movies)
+    print(f"{args.movies:,} movies x {len(TIMES)} shows")
+    run("in memory", movies, args.lines, seed=1)
+
+    directory = tempfile.mkdtemp(prefix="bench-bulk-")
+    try:
+        store = booking_core.enable_persistence(directory)
+        run("WAL", movies, args.lines, seed=2)
+        store.close()
+        booking_core.BOOKING_SERVICE.store = None
+    finally:
+        shutil.rmtree(directory)
+
+    small, large = args.memory_lines, 4 * args.memory_lines
+    print(f"  memory    : peak {peak_memory(movies, small, 3) / 1e6:.1f} MB for {small:,} lines, "
+          f"{peak_memory(movies, large, 4) / 1e6:.1f} MB for {large:,} lines")
+
+    out = io.StringIO()
+    start = time.perf_counter()
+    shows = bulk.export_bookings(out)
+    elapsed = time.perf_counter() - start
+    print(f"  export    : {shows:,} shows, {out.tell() / 1e6:.1f} MB in {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Catalog window startup time and memory: one MoviePanel per movie in a
+GridSizer (the old main window) vs. the recycling CatalogView, with 10 and
+5,000 movies, plus the cost of scrolling the view end to end. Needs wxPython
+and a display; on a headless machine run it under a virtual one:
+
+    xvfb-run -a python -m benchmarks.bench_catalog
+"""
+import argparse
+import resource
+import time
+
+import wx
+
+from catalog import CatalogSource
+from catalog_view import CatalogView
+from mac import MoviePanel
+
+SIZES = (10, 5_000)
+CARD = (380, 240)
+
+
+def rss_kb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+
+def make_catalog(count):
+    words = "a thief who steals corporate secrets through dream sharing technology must plant an idea".split()
+    return [{"id": n, "title": f"Movie {n}", "genre": "Drama", "price": 200.0 + n % 5 * 50,
+             "timings": ["09:00 AM"], "screen": "standard",
+             "description": " ".join(words[(n + k) % len(words)] for k in range(18))}
+            for n in range(count)]
+
+
+class EagerFrame(wx.Frame):
+    """ The pre-virtualization window: every card created up front """
+
+    def __init__(self, movies):
+        super().__init__(None, size=(900, 750))
+        panel = wx.ScrolledWindow(self)
+        grid = wx.GridSizer(cols=2, hgap=40, vgap=40)
+        for movie in movies:
+            grid.Add(MoviePanel(panel, movie, size=CARD), 0, wx.ALIGN_CENTER)
+        panel.SetSizer(grid)
+        panel.SetScrollRate(0, 20)
+        self.cards = len(movies)
+
+
+class VirtualFrame(wx.Frame):
+    def __init__(self, movies):
+        super().__init__(None, size=(900, 750))
+        source = CatalogSource(lambda offset, limit: movies[offset:offset + limit], lambda: len(movies))
+        self.view = CatalogView(self, source, lambda parent: MoviePanel(parent, size=CARD), CARD)
+
+    @property
+    def cards(self):
+        return self.view.card_count()
+
+
+def measure(frame_cls, movies):
+    before = rss_kb()
+    start = time.perf_counter()
+    frame = frame_cls(movies)
+    frame.Show()
+    frame.Layout()
+    frame.Update()
+    wx.SafeYield()
+    open_ms = (time.perf_counter() - start) * 1000
+    return frame, open_ms, rss_kb() - before
+
+
+def scroll_through(view):
+    """ Scrolls the view top to bottom a screenful at a time; returns ms per step """
+    _, rate = view.GetScrollPixelsPerUnit()
+    step = max(1, view.GetClientSize().height // rate)
+    total = view.GetVirtualSize().height // rate
+    steps = 0
+    start = time.perf_counter()
+    for y in range(0, total + step, step):
+        view.Scroll(0, y)
+        view.update_cards()
+        view.Update()
+        steps += 1
+    return (time.perf_counter() - start) / steps * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Catalog view startup benchmark")
+    parser.add_argument("--eager-limit", type=int, default=5_000,
+                        help="skip the eager window above this many movies")
+    args = parser.parse_args()
+
+    app = wx.App(False)
+    for count in SIZES:
+        movies = make_catalog(count)
+        for name, frame_cls in (("eager grid", EagerFrame), ("virtual view", VirtualFrame)):
+            if frame_cls is EagerFrame and count > args.eager_limit:
+                continue
+            frame, open_ms, memory_kb = measure(frame_cls, movies)
+            line = (f"{count:5d} movies, {name:12s}: open {open_ms:8.1f} ms, +{memory_kb:,} KiB RSS, "
+                    f"{frame.cards:,} card widgets")
+            if frame_cls is VirtualFrame:
+                line += f", scroll {scroll_through(frame.view):.2f} ms per screen"
+            print(line)
+            frame.Destroy()
+            wx.SafeYield()
+    app.Destroy()
+
+
+if __name__ == "__main__":
+    main()
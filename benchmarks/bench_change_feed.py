@@ -0,0 +1,107 @@
+"""
+Change feed fan-out: --subscribers subscriptions spread over --shows shows,
+a publisher committing/holding seats as fast as it can, and consumer
+threads draining notified subscriptions (as an event loop would).
+
+Reports publish cost, delivery latency (publish -> poll) and feed memory.
+
+    python -m benchmarks.bench_change_feed --subscribers 10000 --shows 1000
+"""
+import argparse
+import queue
+import random
+import threading
+import time
+import tracemalloc
+
+from booking_service import BookingService, SeatUnavailableError
+from change_feed import ChangeFeed
+from seat_inventory import SeatInventory
+
+ROWS, COLS = 20, 30
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--subscribers", type=int, default=10_000)
+    parser.add_argument("--shows", type=int, default=1_000)
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--consumers", type=int, default=4)
+    args = parser.parse_args()
+
+    inventory = SeatInventory(ROWS, COLS)
+    service = BookingService(inventory)
+    # Registered before the feed, so the time is recorded before any subscriber can poll
+    published = {}  # (show, version) -> publish time
+    service.add_observer(lambda show, indices, state, session:
+                         published.__setitem__((show, feed.version(show) + 1), time.perf_counter()))
+    tracemalloc.start()
+    feed = ChangeFeed(service)
+    shows = [(m, "07:00 PM") for m in range(args.shows)]
+
+    ready = queue.SimpleQueue()
+    subscriptions = []
+    for n in range(args.subscribers):
+        sub = feed.subscription()
+        sub.notify = (lambda s=sub: ready.put(s))
+        sub.subscribe(shows[n % args.shows])
+        subscriptions.append(sub)
+
+    latencies, delivered = [], [0]
+    lat_lock = threading.Lock()
+    stop = object()
+
+    def consumer():
+        local = []
+        while True:
+            sub = ready.get()
+            if sub is stop:
+                break
+            for delta in sub.poll():
+                local.append(time.perf_counter() - published[(delta.show, delta.version)])
+        with lat_lock:
+            latencies.extend(local)
+            delivered[0] += len(local)
+
+    workers = [threading.Thread(target=consumer) for _ in range(args.consumers)]
+    for w in workers:
+        w.start()
+
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for n in range(args.events):
+        show = rng.choice(shows)
+        coord = (rng.randrange(ROWS), rng.randrange(COLS))
+        try:
+            if n % 2:
+                service.commit(f"p{n}", show, [coord])
+            else:
+                service.hold(f"p{n}", show, [coord])
+        except SeatUnavailableError:
+            pass
+    publish_elapsed = time.perf_counter() - start
+
+    # Let the consumers drain whatever is still queued
+    deadline = time.monotonic() + 30
+    while not ready.empty() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    for _ in workers:
+        ready.put(stop)
+    for w in workers:
+        w.join()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    print(f"{args.subscribers:,} subscribers over {args.shows:,} shows, {args.events:,} seat events")
+    print(f"  publish: {args.events / publish_elapsed:,.0f} events/s "
+          f"({publish_elapsed / args.events * 1e6:.1f} us per event incl. fan-out)")
+    print(f"  delivered {delivered[0]:,} coalesced batches, latency p50 {pct(0.5):.2f} ms, "
+          f"p99 {pct(0.99):.2f} ms, max {latencies[-1] * 1000:.2f} ms")
+    print(f"  memory: {current / 1e6:.1f} MB live, {peak / 1e6:.1f} MB peak "
+          f"({current / args.subscribers:.0f} B per subscriber)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Show compaction: --days simulated days of --movies movies with four showings
+a day. Every simulated day sells seats on every showing of the horizon
+(advance sales, so a showing sells about --bookings times before it starts),
+then the compactor archives the finished showings and plans the day entering
+the horizon. The hot working set, measured just before each compaction
+(scheduled showings, shows with seat state and their bytes), should stay
+flat while the cold store grows.
+
+    python -m benchmarks.bench_compaction --days 120
+"""
+import argparse
+import datetime
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from booking_service import BookingService, SeatUnavailableError
+from cold_store import ColdStore, Compactor
+from schedule import Schedule
+from seat_inventory import SeatInventory
+
+ROWS, COLS = 12, 20
+TIMINGS = ["10:00 AM", "01:30 PM", "06:00 PM", "09:30 PM"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--movies", type=int, default=50)
+    parser.add_argument("--bookings", type=int, default=21, help="bookings per showing over its days on sale")
+    parser.add_argument("--report-every", type=int, default=15, help="days between report lines")
+    args = parser.parse_args()
+
+    rng = random.Random(20)
+    movies = [{"id": m, "timings": TIMINGS} for m in range(1, args.movies + 1)]
+    clock = [time.mktime((2026, 1, 1, 8, 0, 0, 0, 0, -1))]
+    schedule = Schedule(lambda movie_id: "standard", clock=lambda: clock[0])
+    inventory = SeatInventory(ROWS, COLS)
+    service = BookingService(inventory)
+    directory = tempfile.mkdtemp(prefix="bms-cold-")
+    cold = ColdStore(directory)
+    compactor = Compactor(schedule, inventory, service, cold, forget=(service.forget,),
+                          plan=lambda: schedule.plan(movies))
+    schedule.plan(movies)
+
+    print(f"{args.movies} movies x {len(TIMINGS)} showings/day, {schedule.horizon_days}-day horizon, "
+          f"{args.bookings} bookings per showing")
+    print(f"  {'day':>10} {'hot shows':>10} {'with seats':>11} {'seat KB':>8} {'archived':>9} {'cold MB':>8} "
+          f"{'compact ms':>11}")
+    per_day = max(1, args.bookings // schedule.horizon_days)
+    try:
+        for day in range(1, args.days + 1):
+            # A day of advance sales on every showing still to come, then the day ends
+            today = datetime.date.fromtimestamp(clock[0])
+            for s in schedule.upcoming(after=0):
+                for k in range(per_day):
+                    r, c = rng.randrange(ROWS), rng.randrange(COLS - 1)
+                    try:
+                        service.commit(f"b{k}", s.id, [(r, c), (r, c + 1)])
+                    except SeatUnavailableError:
+                        pass
+            clock[0] += 86400
+            # The hot working set at its largest: a horizon of showings with sales, before compaction
+            hot, with_seats = len(schedule), inventory.shows()
+            seat_bytes = sum(len(inventory.stored(s)) for s in with_seats)
+            start = time.perf_counter()
+            compactor.compact()
+            elapsed = time.perf_counter() - start
+            if day % args.report_every == 0 or day == args.days:
+                size = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory))
+                print(f"  {today.isoformat():>10} {hot:>10,} {len(with_seats):>11,} {seat_bytes / 1e3:>8.1f} "
+                      f"{compactor.archived:>9,} {size / 1e6:>8.2f} {elapsed * 1e3:>11.1f}")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Load test for http_api: many concurrent keep-alive clients hitting the
+seat-map, hold and booking endpoints of an in-process server.
+
+    python -m benchmarks.bench_http --clients 2000 --requests 20
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import http_api
+from booking_core import MOVIES
+
+
+async def request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+                 + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line == b"\r\n":
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def client(port, seed, n_requests, latencies, statuses):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    session = f"bench-{seed}"
+    for _ in range(n_requests):
+        movie = rng.choice(MOVIES)
+        time_slot = rng.choice(movie["timings"])
+        seat = [rng.randrange(5), rng.randrange(6)]
+        start = time.perf_counter()
+        kind = rng.random()
+        if kind < 0.6:
+            status = await request(reader, writer, "GET",
+                                   f"/movies/{movie['id']}/seats?time={time_slot.replace(' ', '%20')}")
+        elif kind < 0.9:
+            status = await request(reader, writer, "POST", f"/movies/{movie['id']}/holds",
+                                   {"session": session, "time": time_slot, "seats": [seat]})
+            await request(reader, writer, "POST", f"/movies/{movie['id']}/release",
+                          {"session": session, "time": time_slot, "seats": [seat]})
+        else:
+            status = await request(reader, writer, "GET", "/movies")
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+    writer.close()
+
+
+async def main(args):
+    server = await asyncio.start_server(http_api.handle_connection, "127.0.0.1", 0, backlog=8192)
+    port = server.sockets[0].getsockname()[1]
+    latencies, statuses = [], {}
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, i, args.requests, latencies, statuses) for i in range(args.clients)))
+    elapsed = time.perf_counter() - start
+    server.close()
+    await server.wait_closed()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{args.clients} concurrent clients, {len(latencies)} requests in {elapsed:.2f}s: "
+          f"{len(latencies) / elapsed:,.0f} req/s, p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"p99 {p99 * 1000:.1f} ms, statuses {statuses}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
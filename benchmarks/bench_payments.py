@@ -0,0 +1,54 @@
+"""
+Payment pipeline throughput: many concurrent charges against FakeGateway
+with injected latency and transient failures. Reports charges/sec and
+p50/p99 end-to-end latency (including retries).
+
+    python -m benchmarks.bench_payments --payments 5000 --failure-rate 0.05
+"""
+import argparse
+import asyncio
+import time
+
+from payments import FakeGateway, PaymentClient, PaymentError
+
+
+async def main(args):
+    gateway = FakeGateway(latency=(args.min_latency, args.max_latency), failure_rate=args.failure_rate, seed=1)
+    client = PaymentClient(gateway, timeout=args.timeout, retries=args.retries, backoff=0.05)
+    card = {"number": "1234567890123456", "expiry": "12/26", "cvv": "123"}
+    latencies, failures = [], 0
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def one(i):
+        nonlocal failures
+        async with limit:
+            start = time.perf_counter()
+            try:
+                await client.charge(100.0, card, idempotency_key=f"bench-{i}")
+            except PaymentError:
+                failures += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.payments)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{args.payments} payments, concurrency {args.concurrency}, failure rate {args.failure_rate:.0%}: "
+          f"{len(latencies) / elapsed:,.0f} charges/s, p50 {p50 * 1000:.0f} ms, p99 {p99 * 1000:.0f} ms, "
+          f"{failures} failed after retries, {gateway.calls} gateway calls")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--payments", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=1000)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--min-latency", type=float, default=0.02)
+    parser.add_argument("--max-latency", type=float, default=0.1)
+    parser.add_argument("--timeout", type=float, default=1.0)
+    parser.add_argument("--retries", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
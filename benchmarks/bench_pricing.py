@@ -0,0 +1,97 @@
+"""
+Dynamic pricing: quotes for --selections seat selections, as a customer
+toggling seats produces them (each party's seats picked one by one, a quote
+after every click), drawn from the suite's Zipf workload on 30%-sold shows.
+Every 5th selection carries a promo code. Compares the static per-layout
+price with PricingEngine cold (tables compiled on first use), warm (every
+selection cached) and while bookings keep moving shows across occupancy tiers
+(that phase's time includes the bookings).
+
+    python -m benchmarks.bench_pricing --selections 1000000
+"""
+import argparse
+import time
+
+import booking_core
+from booking_service import BookingService, SeatUnavailableError
+from pricing import PricingEngine, PricingError
+
+from benchmarks.workload import Workload
+
+PROMOS = ("FIRSTSHOW", "GROUP4", "FLAT50")
+
+
+def selections(workload, n):
+    """ [(show id, coords, promo)]: prefixes of drawn parties, one per click """
+    out = []
+    while len(out) < n:
+        show, coords = workload.request()
+        show = booking_core.get_show(*show)
+        promo = PROMOS[len(out) % 3] if len(out) % 5 == 0 else None
+        out.extend((show, coords[:k], promo) for k in range(1, len(coords) + 1))
+    return out[:n]
+
+
+def run(quote, picks, book=None, every=0):
+    """ Returns (seconds, errors) for quoting every selection; book(k) runs before every `every`-th """
+    errors = 0
+    start = time.perf_counter()
+    for k, (show, coords, promo) in enumerate(picks):
+        if every and k % every == 0:
+            book(k)
+        try:
+            quote(show, coords, promo)
+        except PricingError:
+            errors += 1
+    return time.perf_counter() - start, errors
+
+
+def report(label, picks, elapsed, errors, extra=""):
+    print(f"  {label:<24} {elapsed / len(picks) * 1e9:7.0f} ns/quote  {len(picks) / elapsed:12,.0f} quotes/s"
+          f"  {errors:,} promo rejections{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--selections", type=int, default=1_000_000)
+    parser.add_argument("--movies", type=int, default=2_000)
+    parser.add_argument("--book-every", type=int, default=50, help="quotes between bookings in the last phase")
+    args = parser.parse_args()
+
+    workload = Workload(args.movies, seed=19).install()
+    workload.prefill(0.3)
+    picks = selections(workload, args.selections)
+    shows = len({p[0] for p in picks})
+    print(f"{len(picks):,} selections over {shows:,} shows ({len(workload.demand):,} in the catalog)")
+
+    inventory = booking_core.SEAT_INVENTORY
+    layout, base_price, schedule = booking_core.show_layout, booking_core.base_price, booking_core.SCHEDULE
+    static = lambda show, coords, promo: layout(show).price(base_price(show), coords)
+    report("loop only", picks, *run(lambda show, coords, promo: None, picks))
+    report("static layout price", picks, *run(static, picks))
+
+    service = BookingService(inventory)
+    engine = PricingEngine(layout, base_price, inventory, weekday=lambda show: schedule[show].day.weekday(),
+                           time_of=lambda show: schedule[show].time_slot)
+    engine.attach(service)
+    report("engine, cold", picks, *run(engine.quote, picks), f"  ({engine.compiles:,} tables compiled)")
+    report("engine, warm", picks, *run(engine.quote, picks))
+
+    compiles, booked = engine.compiles, [0]
+
+    def book(k):
+        show, coords = workload.request()
+        try:
+            service.commit(f"b{k}", booking_core.get_show(*show), coords)
+            booked[0] += 1
+        except SeatUnavailableError:
+            pass
+
+    elapsed, errors = run(engine.quote, picks, book, args.book_every)
+    report(f"engine + bookings/{args.book_every}", picks, elapsed, errors,
+           f"  ({booked[0]:,} bookings, {engine.invalidations:,} tier changes, "
+           f"{engine.compiles - compiles:,} recompiles)")
+
+
+if __name__ == "__main__":
+    main()
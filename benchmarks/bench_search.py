@@ -0,0 +1,116 @@
+"""
+Catalog search: "sci-fi shows after 5 PM with >= 4 adjacent free seats" and
+text prefix queries over a synthetic catalog (--movies x --shows-per-movie
+shows, default 50k shows), answered by CatalogIndex vs. a linear scan that
+re-parses genre and time strings for every show.
+
+    python -m benchmarks.bench_search
+"""
+import argparse
+import random
+import statistics
+import time
+
+from allocator import SeatAllocator
+from booking_service import BookingService
+from catalog_index import CatalogIndex, parse_time, split_genres, tokenize
+from seat_inventory import SeatInventory
+
+GENRES = ["Action", "Sci-Fi", "Drama", "Comedy", "Thriller", "Romance", "Animation", "Horror", "Documentary"]
+TIMES = [f"{h:02d}:{m:02d} {'AM' if h24 < 12 else 'PM'}"
+         for h24 in range(9, 24) for m in (0, 30)
+         for h in [h24 % 12 or 12]]
+WORDS = ("galaxy dream heist storm river empire shadow garden winter signal orbit harbor "
+         "legacy frontier echo cipher lantern summit").split()
+ROWS, COLS = 10, 12
+
+
+def make_catalog(movies, shows_per_movie, rng):
+    catalog = []
+    for n in range(movies):
+        catalog.append({
+            "id": n,
+            "title": f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {n}",
+            "genre": "/".join(rng.sample(GENRES, rng.randint(1, 2))),
+            "price": 250.0,
+            "timings": sorted(rng.sample(TIMES, shows_per_movie), key=parse_time),
+            "description": " ".join(rng.choice(WORDS) for _ in range(15)),
+        })
+    return catalog
+
+
+def fill_halls(inventory, catalog, rng):
+    """ Books most seats of a random half of the shows, leaving few long free runs """
+    for movie in catalog:
+        for t in movie["timings"]:
+            if rng.random() < 0.5:
+                inventory.mark_booked_indices((movie["id"], t),
+                                              [i for i in range(ROWS * COLS) if rng.random() < 0.8])
+
+
+def linear_search(catalog, allocator, text, genre, after, count, limit):
+    result = []
+    words = tokenize(text or "")
+    for movie in catalog:
+        if genre and genre not in split_genres(movie["genre"]):
+            continue
+        if words:
+            tokens = tokenize(movie["title"]) + tokenize(movie["description"])
+            if not all(any(t.startswith(w) for t in tokens) for w in words):
+                continue
+        for t in movie["timings"]:
+            if after is not None and parse_time(t) < after:
+                continue
+            if count and allocator.longest_free_run((movie["id"], t)) < count:
+                continue
+            result.append((movie["id"], t))
+            if limit is not None and len(result) >= limit:
+                return result
+    return result
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return result, statistics.median(samples) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--movies", type=int, default=10_000)
+    parser.add_argument("--shows-per-movie", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    catalog = make_catalog(args.movies, args.shows_per_movie, rng)
+    inventory = SeatInventory(ROWS, COLS)
+    fill_halls(inventory, catalog, rng)
+    allocator = SeatAllocator(inventory, BookingService(inventory))
+
+    start = time.perf_counter()
+    index = CatalogIndex(catalog)
+    print(f"{args.movies * args.shows_per_movie:,} shows, index built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    keep = lambda shows: allocator.with_adjacent_free(shows, 4)
+    five_pm = parse_time("05:00 PM")
+    queries = [
+        ("sci-fi after 5 PM, >= 4 together, first 50", dict(genre="sci-fi", count=4, limit=50)),
+        ("sci-fi after 5 PM, >= 4 together, all", dict(genre="sci-fi", count=4, limit=None)),
+        ("text 'galax stor' after 5 PM, all", dict(text="galax stor", count=0, limit=None)),
+    ]
+    for name, q in queries:
+        text, genre, count, limit = q.get("text"), q.get("genre"), q["count"], q["limit"]
+        indexed, indexed_us = timed(lambda: index.search(text, genre, five_pm, None,
+                                                         keep if count else None, limit), args.repeat)
+        scanned, scan_us = timed(lambda: linear_search(catalog, allocator, text, genre, five_pm, count, limit),
+                                 max(1, args.repeat // 10))
+        assert sorted(indexed) == sorted(scanned) or limit is not None, "index and scan disagree"
+        print(f"  {name:42s}: {len(indexed):6,} shows, index {indexed_us:9.1f} us, scan {scan_us:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Seat map open/repaint times: the old one-ToggleButton-per-seat grid vs.
+SeatMapCanvas, at 30, 300 and 3000 seats. Needs wxPython and a display;
+on a headless machine run it under a virtual one:
+
+    xvfb-run -a python -m benchmarks.bench_seat_map
+"""
+import argparse
+import resource
+import time
+
+import wx
+
+from seat_map import SOLD, SeatMapCanvas
+
+SIZES = {30: (5, 6), 300: (15, 20), 3000: (50, 60)}
+
+
+def rss_kb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+
+class WidgetGridFrame(wx.Frame):
+    """ The pre-canvas approach: one ToggleButton (with its own font) per seat """
+
+    def __init__(self, rows, cols):
+        super().__init__(None, size=(900, 700))
+        panel = wx.ScrolledWindow(self)
+        grid = wx.GridSizer(rows=rows, cols=cols, vgap=15, hgap=15)
+        self.buttons = []
+        for r in range(rows):
+            for c in range(cols):
+                btn = wx.ToggleButton(panel, wx.ID_ANY, f"{r}-{c + 1}", size=(45, 45))
+                btn.SetFont(wx.Font(10, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD))
+                btn.Bind(wx.EVT_TOGGLEBUTTON, lambda e: None)
+                grid.Add(btn, 0)
+                self.buttons.append(btn)
+        panel.SetSizer(grid)
+        panel.SetScrollRate(10, 10)
+
+    def load(self, states):
+        for btn, state in zip(self.buttons, states):
+            btn.SetBackgroundColour("#333333" if state == SOLD else wx.NullColour)
+            btn.Enable(state != SOLD)
+            btn.SetValue(False)
+            btn.SetLabel("X" if state == SOLD else btn.GetLabel())
+
+    def set_seat(self, index, state):
+        btn = self.buttons[index]
+        btn.SetBackgroundColour("#333333" if state == SOLD else wx.NullColour)
+        btn.Enable(state != SOLD)
+        btn.Update()
+
+
+class CanvasFrame(wx.Frame):
+    def __init__(self, rows, cols):
+        super().__init__(None, size=(900, 700))
+        self.canvas = SeatMapCanvas(self, rows, cols)
+
+    def load(self, states):
+        self.canvas.set_states(states)
+
+    def set_seat(self, index, state):
+        self.canvas.set_seat_state(index, state)
+        self.canvas.Update()
+
+
+def measure(frame_cls, rows, cols, repaints):
+    states = bytes(SOLD if i % 3 == 0 else 0 for i in range(rows * cols))
+    before = rss_kb()
+    start = time.perf_counter()
+    frame = frame_cls(rows, cols)
+    frame.load(states)
+    frame.Show()
+    frame.Layout()
+    frame.Update()
+    wx.SafeYield()
+    open_ms = (time.perf_counter() - start) * 1000
+    memory_kb = rss_kb() - before
+
+    start = time.perf_counter()
+    for n in range(repaints):
+        frame.set_seat(n % (rows * cols), SOLD if n % 2 else 0)
+    repaint_us = (time.perf_counter() - start) / repaints * 1e6
+    frame.Destroy()
+    wx.SafeYield()
+    return open_ms, repaint_us, memory_kb
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seat map open/repaint benchmark")
+    parser.add_argument("--repaints", type=int, default=200)
+    args = parser.parse_args()
+
+    app = wx.App(False)
+    for seats, (rows, cols) in SIZES.items():
+        for name, frame_cls in (("widget grid", WidgetGridFrame), ("canvas", CanvasFrame)):
+            open_ms, repaint_us, memory_kb = measure(frame_cls, rows, cols, args.repaints)
+            print(f"{seats:5d} seats, {name:11s}: open {open_ms:8.1f} ms, "
+                  f"repaint one seat {repaint_us:8.1f} us, +{memory_kb:,} KiB RSS")
+    app.Destroy()
+
+
+if __name__ == "__main__":
+    main()
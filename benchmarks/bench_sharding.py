@@ -0,0 +1,83 @@
+"""
+Sharded backend throughput: booking commits/s with 1..--max-shards worker
+processes, driven by as many load processes as shards, each pipelining
+--window requests at a time over the Unix socket protocol. Requests come from
+the suite's Zipf workload (2-6 adjacent seats, many conflicting). Scaling can
+only be close to linear when there is a free core per shard and per load
+process; the core count is printed with the results.
+
+    python -m benchmarks.bench_sharding --requests 200000 --max-shards 8
+"""
+import argparse
+import datetime
+import multiprocessing
+import os
+import time
+
+from schedule import dated
+from sharding import ShardedBackend
+
+from benchmarks.workload import Workload
+
+
+def load_process(paths, orders, window, start_event, results):
+    from sharding import ShardClient
+
+    client = ShardClient(paths)
+    start_event.wait()
+    began = time.perf_counter()
+    outcome = client.commit_many(orders, window)
+    results.put((time.perf_counter() - began, sum(1 for r in outcome if r == [])))
+    client.close()
+
+
+def run(shards, orders, movies, window):
+    backend = ShardedBackend(shards, movies)
+    try:
+        context = multiprocessing.get_context("fork")
+        start_event, results = context.Event(), context.Queue()
+        share = (len(orders) + shards - 1) // shards
+        loaders = [context.Process(target=load_process,
+                                   args=(backend.paths, orders[k * share:(k + 1) * share], window, start_event,
+                                         results))
+                   for k in range(shards)]
+        for p in loaders:
+            p.start()
+        time.sleep(0.5)  # Let every load process connect
+        start = time.perf_counter()
+        start_event.set()
+        booked = sum(results.get()[1] for _ in loaders)
+        elapsed = time.perf_counter() - start
+        for p in loaders:
+            p.join()
+        return len(orders) / elapsed, booked
+    finally:
+        backend.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--movies", type=int, default=2_000)
+    parser.add_argument("--max-shards", type=int, default=max(2, os.cpu_count() or 1))
+    parser.add_argument("--window", type=int, default=256, help="requests in flight per load process")
+    args = parser.parse_args()
+
+    workload = Workload(args.movies, seed=5)
+    # Shards key shows by dated schedule keys: book every show's showing today
+    today = datetime.date.today()
+    orders = []
+    for k in range(args.requests):
+        (movie_id, time_slot), coords = workload.request()
+        orders.append((f"s{k}", (movie_id, dated(today, time_slot)), coords))
+    print(f"{os.cpu_count()} cores, {args.requests:,} commit requests over {len(workload.demand):,} shows")
+    shards, base = 1, None
+    while shards <= args.max_shards:
+        rate, booked = run(shards, orders, workload.movies, args.window)
+        base = base or rate
+        print(f"  {shards:2d} shards: {rate:10,.0f} commits/s  (x{rate / base:.2f}, {booked:,} booked)")
+        shards *= 2
+
+
+if __name__ == "__main__":
+    main()
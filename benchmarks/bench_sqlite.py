@@ -0,0 +1,101 @@
+"""
+In-memory SeatInventory vs. SqliteStore as the catalog grows.
+
+For each catalog size: bulk-load time, per-show seat lookup latency and
+single-seat booking latency (median, in microseconds).
+
+    python -m benchmarks.bench_sqlite --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from booking_service import BookingService, SeatUnavailableError
+from seat_inventory import SeatInventory
+from sqlite_store import SqliteStore
+
+TIMES = ["09:00 AM", "12:00 PM", "03:00 PM", "06:00 PM", "09:00 PM"]
+ROWS, COLS = 20, 30
+
+
+def make_catalog(n_shows):
+    movies = []
+    for movie_id in range(1, n_shows // len(TIMES) + 1):
+        movies.append({"id": movie_id, "title": f"Movie {movie_id}", "genre": "Drama", "price": 250.0,
+                       "timings": list(TIMES), "description": "Synthetic benchmark title."})
+    return movies
+
+
+def median_us(fn, samples):
+    timings = []
+    for args in samples:
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e6
+
+
+def run(n_shows, n_ops, directory):
+    movies = make_catalog(n_shows)
+    shows = [(m["id"], t) for m in movies for t in m["timings"]]
+    rng = random.Random(n_shows)
+    lookups = [(rng.choice(shows),) for _ in range(n_ops)]
+    bookings = [(rng.choice(shows), rng.randrange(ROWS * COLS)) for _ in range(n_ops)]
+
+    # In-memory
+    start = time.perf_counter()
+    inventory = SeatInventory(ROWS, COLS)
+    for show in shows:
+        inventory.ensure_show(show)
+    mem_load = time.perf_counter() - start
+    service = BookingService(inventory)
+
+    def mem_book(show, index):
+        try:
+            service.commit("bench", show, [inventory.coord(index)])
+        except SeatUnavailableError:
+            pass
+
+    mem_lookup = median_us(inventory.booked_seats, lookups)
+    mem_booking = median_us(mem_book, bookings)
+
+    # SQLite
+    store = SqliteStore(os.path.join(directory, f"bench-{n_shows}.db"))
+    start = time.perf_counter()
+    store.load_catalog(movies)
+    sql_load = time.perf_counter() - start
+
+    def sql_book(show, index):
+        try:
+            store.book(show, [index])
+        except SeatUnavailableError:
+            pass
+
+    sql_lookup = median_us(store.booked_seats, lookups)
+    sql_booking = median_us(sql_book, bookings)
+    store.close()
+
+    print(f"{len(shows):>7,} shows | load: mem {mem_load * 1000:7.1f} ms, sqlite {sql_load * 1000:7.1f} ms | "
+          f"lookup: mem {mem_lookup:6.1f} us, sqlite {sql_lookup:6.1f} us | "
+          f"booking: mem {mem_booking:6.1f} us, sqlite {sql_booking:7.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--ops", type=int, default=2000)
+    args = parser.parse_args()
+    directory = tempfile.mkdtemp(prefix="bms-sqlite-")
+    try:
+        for size in args.sizes:
+            run(size, args.ops, directory)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
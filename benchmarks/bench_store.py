@@ -0,0 +1,108 @@
+"""
+Write-ahead log benchmarks.
+
+1. Sustained commits/sec through BookingService with concurrent committers,
+   at several group-commit (fsync batch) sizes.
+2. Startup recovery time after --history bookings (snapshot + log tail).
+
+    python -m benchmarks.bench_store --history 1000000
+"""
+import argparse
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from booking_service import BookingService, SeatUnavailableError
+from booking_store import BookingLog
+from seat_inventory import SeatInventory
+
+ROWS, COLS = 20, 40
+
+
+def sustained_writes(directory, batch_size, threads, seconds):
+    inventory = SeatInventory(ROWS, COLS)
+    store = BookingLog(directory, batch_size=batch_size, snapshot_every=10 ** 9)
+    store.recover(inventory)
+    service = BookingService(inventory, store=store)
+    counts = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def worker(n):
+        rng = random.Random(n)
+        while time.perf_counter() < deadline:
+            show = (rng.randrange(100_000), "09:00 AM")
+            try:
+                service.commit(f"w{n}", show, [(rng.randrange(ROWS), rng.randrange(COLS))])
+                counts[n] += 1
+            except SeatUnavailableError:
+                pass
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    store.close()
+    print(f"  fsync batch {batch_size:4d}, {threads} committers: {sum(counts) / elapsed:10,.0f} commits/s")
+
+
+def recovery(directory, history, tail):
+    inventory = SeatInventory(ROWS, COLS)
+    store = BookingLog(directory, snapshot_every=10 ** 9)
+    store.recover(inventory)
+    rng = random.Random(7)
+    shows = [(m, t) for m in range(1, 1251) for t in ("10:00 AM", "01:00 PM", "04:00 PM", "07:00 PM")]
+
+    start = time.perf_counter()
+    ticket = 0
+    for n in range(history + tail):
+        if n == history:
+            store.wait_durable(ticket)
+            store.snapshot()
+        show = rng.choice(shows)
+        indices = [rng.randrange(ROWS * COLS)]
+        inventory.mark_booked_indices(show, indices)
+        ticket = store.append(show, indices)
+    store.wait_durable(ticket)
+    store.close()
+    print(f"  wrote {history:,} bookings + snapshot + {tail:,} tail in {time.perf_counter() - start:.1f}s")
+
+    recovered = SeatInventory(ROWS, COLS)
+    start = time.perf_counter()
+    replayed = BookingLog(directory).recover(recovered)
+    elapsed = time.perf_counter() - start
+    assert all(recovered.snapshot(s) == inventory.snapshot(s) for s in inventory.shows())
+    print(f"  recovery: {elapsed * 1000:.0f} ms ({len(recovered.shows()):,} shows, {replayed:,} tail records replayed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--history", type=int, default=1_000_000)
+    parser.add_argument("--tail", type=int, default=10_000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print("Sustained writes:")
+    for batch_size in (1, 8, 64, 256):
+        directory = tempfile.mkdtemp(prefix="bms-wal-")
+        try:
+            # A batch can only fill if there are more concurrent committers than its size
+            sustained_writes(directory, batch_size, max(args.threads, 2 * batch_size), args.seconds)
+        finally:
+            shutil.rmtree(directory)
+
+    print("Recovery:")
+    directory = tempfile.mkdtemp(prefix="bms-wal-")
+    try:
+        recovery(directory, args.history, args.tail)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
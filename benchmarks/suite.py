@@ -0,0 +1,372 @@
+"""
+Benchmark suite for the booking flow, on a synthetic workload (Zipf movie
+popularity, prime-time show times, small/medium/large halls; see workload.py).
+Results are written as JSON so two runs can be compared:
+
+    python -m benchmarks.suite --out base.json
+    ... change something ...
+    python -m benchmarks.suite --out new.json --compare base.json
+
+Headless cases exercise booking_core the way the dialogs call it. The wx cases
+(dialog open and pooled reopen, seat load, seat toggle + update_totals, main
+window startup) run in-process when wx and a display are available, and
+otherwise in a child process under xvfb-run when it is installed; without
+either they are recorded as skipped. Exits with status 1 if --compare finds a regression.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import booking_core
+import instrumentation
+from booking_service import SeatUnavailableError
+from catalog_index import CatalogIndex
+
+from benchmarks.workload import Workload
+
+SESSION = "bench"
+
+
+def stats(samples, unit="us", scale=1e6):
+    """ Median / p95 / min of per-call times in seconds, as a result entry (lower is better) """
+    samples = sorted(samples)
+    return {"value": statistics.median(samples) * scale, "p95": samples[int(len(samples) * 0.95)] * scale,
+            "min": samples[0] * scale, "n": len(samples), "unit": unit, "better": "lower"}
+
+
+def rate(count, elapsed, unit):
+    return {"value": count / elapsed, "unit": unit, "better": "higher", "n": count}
+
+
+def timed(fn, calls):
+    samples = []
+    for args in calls:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def free_seat(show, layout):
+    """ Some free seat of a (movie_id, time) show, as (index, coord), or None if it is full """
+    i = booking_core.SEAT_INVENTORY.snapshot(booking_core.get_show(*show)).find(0)
+    return None if i == -1 else (i, layout.coord(i))
+
+
+# --- Headless cases ---
+
+def bench_seat_map_load(workload, n):
+    """ seat_states(): what load_seats_for_time() fetches, on shows where other sessions hold seats """
+    shows = [workload.show() for _ in range(n)]
+    for k, show in enumerate(shows[:50]):
+        try:
+            booking_core.hold_seats(f"other-{k}", *show, workload.seats(show))
+        except SeatUnavailableError:
+            pass
+    samples = timed(lambda show: booking_core.seat_states(*show, session=SESSION), [(s,) for s in shows])
+    for k, show in enumerate(shows[:50]):
+        booking_core.release_seats(f"other-{k}", *show)
+    return {"seat_map_load": stats(samples)}
+
+
+def bench_seat_toggle(workload, n):
+    """ One seat click and un-click: hold / release plus the quote update_totals() shows """
+    select, unselect = [], []
+    for _ in range(n):
+        show = workload.show()
+        movie, seat = workload.movie(show), free_seat(show, workload.layout(show))
+        if seat is None:
+            continue
+        start = time.perf_counter()
+        booking_core.hold_seats(SESSION, *show, [seat[1]])
+        booking_core.quote(movie, [seat[1]], show[1])
+        select.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        booking_core.release_seats(SESSION, *show, [seat[1]])
+        booking_core.quote(movie, [], show[1])
+        unselect.append(time.perf_counter() - start)
+    return {"seat_select": stats(select), "seat_unselect": stats(unselect)}
+
+
+def bench_booking_commit(workload, n, label="booking_commit"):
+    """ hold + confirm_booking() of a party's seats (final_book_seats() minus its message boxes) """
+    samples, conflicts = [], 0
+    for k in range(n):
+        show, coords = workload.request()
+        start = time.perf_counter()
+        try:
+            booking_core.hold_seats(SESSION, *show, coords)
+            booking_core.confirm_booking(SESSION, *show, coords)
+        except SeatUnavailableError:
+            booking_core.release_seats(SESSION, *show)
+            conflicts += 1
+        samples.append(time.perf_counter() - start)
+    result = stats(samples)
+    result["conflicts"] = conflicts
+    return {label: result}
+
+
+def bench_booking_commit_wal(workload, n):
+    """ booking_commit with every commit appended to (and synced by) the write-ahead log """
+    directory = tempfile.mkdtemp(prefix="bench-suite-")
+    try:
+        store = booking_core.enable_persistence(directory)
+        try:
+            return bench_booking_commit(workload, n, "booking_commit_wal")
+        finally:
+            store.close()
+            booking_core.BOOKING_SERVICE.store = None
+    finally:
+        shutil.rmtree(directory)
+
+
+def bench_catalog_startup(workload, n):
+    """ What the main window needs before its first paint: the search index and the first catalog page """
+    samples = timed(lambda: (CatalogIndex(booking_core.MOVIES).genres(), booking_core.catalog_source().page(0)),
+                    [()] * max(3, n // 100))
+    return {"catalog_startup": stats(samples, "ms", 1e3)}
+
+
+def bench_concurrent_booking(workload, n, threads=16):
+    """ Threads booking pre-drawn requests at once; popular shows make them contend for the same seats """
+    plans = [[workload.request() for _ in range(n // threads)] for _ in range(threads)]
+    shows = [booking_core.get_show(*s) for s in workload.demand]
+    booked_before = sum(booking_core.SEAT_INVENTORY.count_booked(s) for s in shows)
+    sold = [0] * threads
+
+    def worker(k):
+        session = f"{SESSION}-{k}"
+        for show, coords in plans[k]:
+            try:
+                booking_core.hold_seats(session, *show, coords)
+                booking_core.confirm_booking(session, *show, coords)
+                sold[k] += len(coords)
+            except SeatUnavailableError:
+                booking_core.release_seats(session, *show)
+
+    workers = [threading.Thread(target=worker, args=(k,)) for k in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    booked = sum(booking_core.SEAT_INVENTORY.count_booked(s) for s in shows) - booked_before
+    assert booked == sum(sold), f"inventory gained {booked} seats, sessions sold {sum(sold)}"
+    attempts = sum(len(p) for p in plans)
+    return {"concurrent_attempts": rate(attempts, elapsed, "attempts/s"),
+            "concurrent_seats": rate(booked, elapsed, "seats/s")}
+
+
+CORE_CASES = [bench_catalog_startup, bench_seat_map_load, bench_seat_toggle, bench_booking_commit,
+              bench_booking_commit_wal, bench_concurrent_booking]
+
+
+# --- wx cases ---
+
+def gui_available():
+    """ None if the wx cases can run in this process, else the reason they cannot """
+    try:
+        import wx  # noqa: F401
+    except ImportError:
+        return "wxPython is not installed"
+    if sys.platform.startswith("linux") and not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")):
+        return "no display"
+    return None
+
+
+def run_gui_cases(workload, n):
+    import wx
+    from mac import SEAT_DIALOGS, MainFrame, SeatSelectionDialog, seat_dialog
+    from seat_map import SELECTED, SeatToggledEvent
+
+    results = {}
+    app = wx.App(False)
+    samples = []
+    for _ in range(5):
+        start = time.perf_counter()
+        frame = MainFrame()
+        frame.Show()
+        wx.SafeYield()
+        samples.append(time.perf_counter() - start)
+        frame.Destroy()
+        wx.SafeYield()
+    results["gui_catalog_startup"] = stats(samples, "ms", 1e3)
+
+    parent = wx.Frame(None)
+    opened, loads, toggles = [], [], []
+    for _ in range(max(5, n // 100)):
+        show = workload.show()
+        movie = workload.movie(show)
+        start = time.perf_counter()
+        dialog = SeatSelectionDialog(parent, movie)
+        dialog.Show()
+        wx.SafeYield()
+        opened.append(time.perf_counter() - start)
+
+        for t in movie["timings"]:
+            start = time.perf_counter()
+            dialog.load_seats_for_time(t)
+            dialog.seat_map.Update()
+            loads.append(time.perf_counter() - start)
+
+        # A click as SeatMapCanvas delivers it: the seat is painted selected, then the dialog holds it
+        for _ in range(10):
+            seat = free_seat((movie["id"], dialog.current_time), dialog.layout)
+            if seat is None:
+                break
+            index, coord = seat
+            for selected in (True, False):
+                start = time.perf_counter()
+                dialog.seat_map.set_seat_state(index, SELECTED if selected else 0)
+                dialog.on_seat_click(SeatToggledEvent(dialog.seat_map.GetId(), index=index, coord=coord,
+                                                      selected=selected))
+                dialog.seat_map.Update()
+                toggles.append(time.perf_counter() - start)
+        dialog.release_holds()
+        dialog.Destroy()
+        wx.SafeYield()
+
+    # Reopening recently viewed movies from the dialog pool (built once each, then rebound)
+    recent = [workload.movie(workload.show()) for _ in range(3)]
+    reopened = []
+    for k in range(max(15, n // 100)):
+        pooled = SEAT_DIALOGS.get(recent[k % 3]["id"]) is not None
+        start = time.perf_counter()
+        dialog = seat_dialog(parent, recent[k % 3])
+        dialog.Show()
+        wx.SafeYield()
+        if pooled:
+            reopened.append(time.perf_counter() - start)
+        dialog.Hide()
+        dialog.suspend()
+    SEAT_DIALOGS.clear()
+    parent.Destroy()
+    app.Destroy()
+    results["gui_dialog_open"] = stats(opened, "ms", 1e3)
+    results["gui_dialog_reopen"] = stats(reopened, "ms", 1e3)
+    results["gui_seat_map_load"] = stats(loads, "ms", 1e3)
+    results["gui_seat_toggle"] = stats(toggles)
+    return results
+
+
+def run_gui_under_xvfb(args):
+    """ The wx cases in a child process on a virtual display; their results, or {"skipped": reason} """
+    xvfb = shutil.which("xvfb-run")
+    if xvfb is None:
+        return None
+    fd, path = tempfile.mkstemp(suffix=".json", prefix="bench-gui-")
+    os.close(fd)
+    try:
+        command = [xvfb, "-a", sys.executable, "-m", "benchmarks.suite", "--gui-only", "--out", path,
+                   "--movies", str(args.movies), "--seed", str(args.seed), "--n", str(args.n)]
+        if args.instrument:
+            command.append("--instrument")
+        subprocess.run(command, check=True)
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["results"]
+    except (subprocess.CalledProcessError, OSError, ValueError) as e:
+        return {"gui": {"skipped": f"xvfb-run failed: {e}"}}
+    finally:
+        os.remove(path)
+
+
+# --- Results ---
+
+def metadata(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"time": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "commit": commit or None, "python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(), "movies": args.movies, "seed": args.seed, "n": args.n,
+            "instrumented": args.instrument}
+
+
+def compare(results, baseline, threshold):
+    """ Prints each metric against the baseline run; returns the names that got worse by more than `threshold` """
+    regressions = []
+    print(f"\n{'metric':24s} {'baseline':>12s} {'this run':>12s} {'change':>8s}")
+    for name, new in results.items():
+        old = baseline.get(name)
+        if not old or "value" not in old or "value" not in new or not old["value"]:
+            continue
+        change = new["value"] / old["value"] - 1
+        worse = change > threshold if new["better"] == "lower" else change < -threshold
+        if worse:
+            regressions.append(name)
+        print(f"{name:24s} {old['value']:12.1f} {new['value']:12.1f} {change:+8.1%} {new['unit']}"
+              f"{'  REGRESSION' if worse else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--movies", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--n", type=int, default=2_000, help="calls per case")
+    parser.add_argument("--out", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+    parser.add_argument("--no-gui", action="store_true", help="skip the wx cases")
+    parser.add_argument("--instrument", action="store_true",
+                        help="run with instrumentation enabled (to measure its overhead) and save its numbers")
+    parser.add_argument("--gui-only", action="store_true", help=argparse.SUPPRESS)  # Child run under xvfb-run
+    args = parser.parse_args()
+
+    if args.instrument:
+        instrumentation.enable()
+    workload = Workload(args.movies, args.seed).install()
+    workload.prefill()
+    results = {}
+    if not args.gui_only:
+        for case in CORE_CASES:
+            results.update(case(workload, args.n))
+
+    if not args.no_gui:
+        reason = gui_available()
+        if reason is None:
+            results.update(run_gui_cases(workload, args.n))
+        elif args.gui_only:
+            results["gui"] = {"skipped": reason}
+        else:
+            results.update(run_gui_under_xvfb(args) or {"gui": {"skipped": f"{reason} and no xvfb-run"}})
+
+    for name, r in results.items():
+        if "value" in r:
+            extra = f"  (p95 {r['p95']:.1f})" if "p95" in r else ""
+            print(f"{name:24s} {r['value']:12.1f} {r['unit']}{extra}")
+        else:
+            print(f"{name:24s} skipped: {r['skipped']}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            report = {"meta": metadata(args), "results": results}
+            if args.instrument:
+                report["instrumentation"] = instrumentation.snapshot()
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        settings = [k for k in ("movies", "seed", "n") if baseline["meta"].get(k) != getattr(args, k)]
+        if settings:
+            print(f"\nnote: the baseline ran with different --{' --'.join(settings)}; numbers may not be comparable")
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Synthetic workload for the benchmark suite: a catalog whose movie popularity
+follows a Zipf law, show times clustered around matinee and prime time, halls
+of realistic sizes, and a stream of booking requests (group sizes, seat
+choices) drawn from that demand. Everything derives from one seed, so two runs
+of the suite see the same shows and requests.
+
+    workload = Workload(movies=500, seed=1)
+    workload.install()              # adds the movies to booking_core
+    show, coords = workload.request()
+"""
+import bisect
+import itertools
+import random
+
+import booking_core
+from catalog_index import parse_time
+from layouts import load_layout, parse_layout, register_layout
+
+FIRST_ID = 10_000
+GENRES = ["Action", "Sci-Fi", "Drama", "Comedy", "Thriller", "Romance", "Animation", "Horror", "Family"]
+WORDS = ("galaxy dream heist storm river empire shadow garden winter signal orbit harbor "
+         "legacy frontier echo cipher lantern summit").split()
+
+# (name, rows, seats per row, aisle after seat, share of screens); at most 26 rows (A-Z)
+HALLS = [
+    ("bench-small", 8, 12, 6, 0.35),
+    ("bench-medium", 14, 20, 10, 0.45),
+    ("bench-large", 22, 30, 15, 0.20),
+]
+# Start times on a 15 minute grid with their share of demand: few mornings, a matinee bump, busy evenings
+SLOTS = [(f"{h:02d}:{m:02d}", weight) for h, weight in ((9, 1), (10, 2), (11, 2), (12, 3), (13, 4), (14, 4),
+                                                         (15, 4), (16, 5), (17, 6), (18, 9), (19, 10), (20, 9),
+                                                         (21, 7), (22, 4), (23, 1))
+         for m in (0, 15, 30, 45)]
+# Party sizes: mostly couples, then solo, families, groups
+GROUPS = [(1, 0.20), (2, 0.45), (3, 0.12), (4, 0.15), (5, 0.04), (6, 0.04)]
+
+
+def hall_layout(name, rows, cols, aisle):
+    """ A rectangular hall with one aisle: standard seats up front, premium in the back third """
+    premium = rows - rows // 3
+    lines = ["[classes]", "S standard 0", "P premium 120", "[rows]"]
+    for r in range(rows):
+        ch = "P" if r >= premium else "S"
+        lines.append(f"{chr(ord('A') + r)}: {ch * aisle}.{ch * (cols - aisle)}")
+    return register_layout(parse_layout("\n".join(lines), name))
+
+
+def seat_blocks(layout):
+    """ (first column, length) of each run of seats between aisles; every row of a hall_layout() is alike """
+    blocks, start = [], None
+    for c in range(layout.cols + 1):
+        seat = c < layout.cols and layout.is_seat((0, c))
+        if seat and start is None:
+            start = c
+        elif not seat and start is not None:
+            blocks.append((start, c - start))
+            start = None
+    return blocks
+
+
+def zipf_weights(n, s=1.1):
+    """ Relative popularity of ranks 1..n: rank k is picked 1 / k**s as often as rank 1 """
+    return [1.0 / (rank ** s) for rank in range(1, n + 1)]
+
+
+def to_12h(hhmm):
+    h, m = map(int, hhmm.split(":"))
+    return f"{h % 12 or 12:02d}:{m:02d} {'AM' if h < 12 else 'PM'}"
+
+
+class Weighted:
+    """ Draws items by weight in O(log n) (cumulative table + bisect) """
+
+    def __init__(self, items, weights):
+        self.items = list(items)
+        self.cumulative = list(itertools.accumulate(weights))
+
+    def pick(self, rng):
+        return self.items[bisect.bisect(self.cumulative, rng.random() * self.cumulative[-1])]
+
+
+class Workload:
+    def __init__(self, movies=500, seed=1, zipf=1.1, shows_per_movie=(3, 7)):
+        self.rng = random.Random(seed)
+        self.layouts = {name: hall_layout(name, rows, cols, aisle) for name, rows, cols, aisle, _ in HALLS}
+        self.blocks = {name: seat_blocks(layout) for name, layout in self.layouts.items()}
+        halls = Weighted([h[0] for h in HALLS], [h[4] for h in HALLS])
+        slots = Weighted(*zip(*SLOTS))
+        self.movies = []
+        for n in range(movies):
+            times, count = set(), self.rng.randint(*shows_per_movie)
+            while len(times) < count:
+                times.add(to_12h(slots.pick(self.rng)))
+            self.movies.append({
+                "id": FIRST_ID + n,
+                "title": f"{self.rng.choice(WORDS).title()} {self.rng.choice(WORDS).title()} {n}",
+                "genre": "/".join(self.rng.sample(GENRES, self.rng.randint(1, 2))),
+                "price": float(self.rng.choice((180, 220, 250, 300, 350))),
+                "timings": sorted(times, key=parse_time),
+                "screen": halls.pick(self.rng),
+                "description": " ".join(self.rng.choice(WORDS) for _ in range(20)),
+            })
+        self.by_id = {m["id"]: m for m in self.movies}
+        # Rank = catalog position, so the first movies are the blockbusters
+        slot_weight = dict((to_12h(t), w) for t, w in SLOTS)
+        popularity = zipf_weights(movies, zipf)
+        self.demand = {(m["id"], t): p * slot_weight[t] for m, p in zip(self.movies, popularity) for t in m["timings"]}
+        self.shows = Weighted(self.demand, self.demand.values())
+        self.groups = Weighted(*zip(*GROUPS))
+
+    def install(self):
+        """ Adds the synthetic movies to booking_core's catalog and search index """
+        booking_core.MOVIES.extend(self.movies)
+        booking_core.MOVIES_BY_ID.update((m["id"], m) for m in self.movies)
+        booking_core.CATALOG_INDEX.rebuild(booking_core.MOVIES)
+        booking_core.SCHEDULE.plan(self.movies)
+        return self
+
+    def movie(self, show):
+        return self.by_id[show[0]]
+
+    def layout(self, show):
+        return load_layout(self.movie(show)["screen"])
+
+    def show(self):
+        """ A show drawn by movie popularity x time of day """
+        return self.shows.pick(self.rng)
+
+    def seats(self, show, count=None):
+        """ `count` (default: a drawn party size) adjacent seats in one row, preferring the middle rows """
+        layout = self.layout(show)
+        count = count or self.groups.pick(self.rng)
+        fitting = [b for b in self.blocks[layout.name] if b[1] >= count] or [max(self.blocks[layout.name],
+                                                                                key=lambda b: b[1])]
+        start, length = self.rng.choice(fitting)
+        count = min(count, length)
+        r = min(layout.rows - 1, max(0, int(self.rng.gauss(layout.rows * 0.6, layout.rows / 4))))
+        c = start + self.rng.randrange(length - count + 1)
+        return [(r, c + k) for k in range(count)]
+
+    def request(self):
+        """ (show, seat coords) for the next booking attempt """
+        show = self.show()
+        return show, self.seats(show)
+
+    def prefill(self, fraction=0.3):
+        """ Books seats of every show in proportion to its demand (`fraction` for an average show, at most 95%) """
+        inventory = booking_core.SEAT_INVENTORY
+        mean = sum(self.demand.values()) / len(self.demand)
+        for show, demand in self.demand.items():
+            share = min(0.95, fraction * demand / mean)
+            template = self.layout(show).template
+            inventory.mark_booked_indices(booking_core.get_show(*show), [i for i, cell in enumerate(template)
+                                                 if cell == 0 and self.rng.random() < share])
+        booking_core.ALLOCATOR.reset()  # Booked behind the service's back: drop any run index built before
@@ -0,0 +1,484 @@
+# --- BOOKING CORE ---
+# Headless business logic shared by every client (the wx app in mac.py, the
+# HTTP API in http_api.py). Must not import wx.
+
+import asyncio
+import logging
+import os
+
+from allocator import SeatAllocator
+from booking_service import BookingError, BookingService, SeatUnavailableError, UnknownShowError
+from booking_store import BookingLog
+from catalog import CatalogSource
+from catalog_index import CatalogIndex, parse_time
+from change_feed import ChangeFeed
+from cold_store import ColdStore, Compactor
+from sqlite_store import SqliteStore
+from layouts import load_layout
+from payments import FakeGateway, PaymentClient
+from pricing import PricingEngine
+from schedule import Schedule, dated, split_time, start_minute
+from seat_inventory import SeatInventory, BOOKED, BLOCKED
+
+DEFAULT_SCREEN = "standard"
+
+log = logging.getLogger(__name__)
+
+# --- MOCK DATA ---
+MOVIES = [
+    {
+        "id": 1,
+        "title": "Avengers: Endgame",
+        "genre": "Action/Sci-Fi",
+        "price": 350.00,
+        "timings": ["09:00 AM", "01:00 PM", "05:00 PM"],
+        "screen": "imax",
+        "description": "The Avengers take a final stand against Thanos, culminating in an epic battle for the fate of the universe."
+    },
+    {
+        "id": 2,
+        "title": "The Lion King",
+        "genre": "Animation/Drama",
+        "price": 250.00,
+        "timings": ["10:30 AM", "02:00 PM", "06:00 PM"],
+        "screen": "standard",
+        "description": "Simba idolizes his father, King Mufasa, and takes to heart his own royal destiny, facing betrayal and destiny."
+    },
+    {
+        "id": 3,
+        "title": "Inception",
+        "genre": "Sci-Fi/Thriller",
+        "price": 300.00,
+        "timings": ["11:00 AM", "03:30 PM", "08:00 PM"],
+        "screen": "imax",
+        "description": "A thief who steals corporate secrets through dream-sharing technology must plant an idea in a target's mind."
+    },
+    {
+        "id": 4,
+        "title": "Titanic",
+        "genre": "Romance/Drama",
+        "price": 200.00,
+        "timings": ["12:00 PM", "04:00 PM"],
+        "screen": "standard",
+        "description": "A seventeen-year-old aristocrat falls in love with a kind but poor artist aboard the ill-fated RMS Titanic."
+    }
+]
+
+# --- SEED BOOKINGS ---
+# Structure: { MovieID: { "Time String": [(row, col), (row, col)] } }
+# Loaded once into SEAT_INVENTORY (as the next showing of each time), which
+# holds the live per-show seat state. Coordinates are cells of the movie's
+# screen layout: Avengers plays on the imax screen, whose first two columns
+# are aisle, so its 09:00 AM seats A2 and A3 are cells (0, 3) and (0, 4).
+BOOKED_SEATS_DB = {
+    1: {
+        "09:00 AM": [(0, 3), (0, 4)],
+        "01:00 PM": [],
+        "05:00 PM": [(2, 2), (2, 3), (2, 4)]
+    },
+    2: {"10:30 AM": [], "02:00 PM": [], "06:00 PM": []},
+    3: {"11:00 AM": [(1, 1)], "03:30 PM": [], "08:00 PM": []},
+    4: {"12:00 PM": [], "04:00 PM": []}
+}
+
+MOVIES_BY_ID = {m["id"]: m for m in MOVIES}
+
+
+def movie_layout(movie):
+    return load_layout(movie.get("screen", DEFAULT_SCREEN))
+
+
+def movie_screen(movie_id):
+    movie = MOVIES_BY_ID.get(movie_id)
+    return movie.get("screen", DEFAULT_SCREEN) if movie is not None else DEFAULT_SCREEN
+
+
+def show_instance(show):
+    """ ShowInstance of a show id; UnknownShowError once it is archived (or if it never existed) """
+    instance = SCHEDULE.get(show)
+    if instance is None:
+        raise UnknownShowError(f"Show {show} has finished")
+    return instance
+
+
+def show_movie(show):
+    """ Movie id of a show id (or of a stored (movie_id, time) key) """
+    return show_instance(show).movie_id if show.__class__ is int else show[0]
+
+
+def show_layout(show):
+    """ Compiled screen layout a show plays on """
+    if show.__class__ is int:
+        return load_layout(show_instance(show).screen)
+    return load_layout(movie_screen(show[0]))
+
+
+def base_price(show):
+    movie = MOVIES_BY_ID.get(show_movie(show))
+    return movie["price"] if movie is not None else 0.0
+
+
+# Shows are the schedule's integer ids (see schedule.py)
+SCHEDULE = Schedule(movie_screen)
+SCHEDULE.plan(MOVIES)
+SEAT_INVENTORY = SeatInventory.from_db(BOOKED_SEATS_DB, rows=5, cols=6, layout_for=show_layout,
+                                       show_for=SCHEDULE.showing)
+BOOKING_SERVICE = BookingService(SEAT_INVENTORY)
+ALLOCATOR = SeatAllocator(SEAT_INVENTORY, BOOKING_SERVICE)
+CHANGE_FEED = ChangeFeed(BOOKING_SERVICE)
+CATALOG_INDEX = CatalogIndex(MOVIES)
+PRICING = PricingEngine(show_layout, base_price, SEAT_INVENTORY,
+                        weekday=lambda show: show_instance(show).day.weekday(),
+                        time_of=lambda show: show_instance(show).time_slot)
+PRICING.attach(BOOKING_SERVICE)
+# Archives finished shows and plans new days; start() it in long-running processes
+COMPACTOR = Compactor(SCHEDULE, SEAT_INVENTORY, BOOKING_SERVICE, ColdStore(),
+                      forget=(ALLOCATOR.forget, CHANGE_FEED.forget, PRICING.invalidate),
+                      plan=lambda: SCHEDULE.plan(MOVIES))
+
+# Swap FakeGateway for a real processor's PaymentGateway implementation in production
+PAYMENTS = PaymentClient(FakeGateway(latency=(0.2, 0.5)))
+
+
+class PaymentDetailsError(BookingError):
+    pass
+
+
+def use_cold_store(directory):
+    """ Archives finished shows under `directory` instead of in memory """
+    COMPACTOR.cold = ColdStore(directory)
+    SCHEDULE.archive_until(COMPACTOR.cold.until)  # Showings planned before the archive was known
+    return COMPACTOR.cold
+
+
+def enable_persistence(directory, **log_options):
+    """
+    Recovers saved bookings from `directory` and logs every new commit there;
+    finished shows are archived to its "archive" subdirectory
+    """
+    use_cold_store(os.path.join(directory, "archive"))
+    store = BookingLog(directory, **log_options)
+    store.keys = SCHEDULE
+    store.recover(SEAT_INVENTORY)
+    ALLOCATOR.reset()
+    PRICING.invalidate()
+    BOOKING_SERVICE.store = store
+    return store
+
+
+def enable_sqlite(path, **options):
+    """
+    Uses an SQLite database for the catalog and bookings instead of the
+    in-memory literals. An empty database is seeded from MOVIES. Finished
+    shows are archived next to it, in "<name>-archive", and deleted from it.
+    """
+    use_cold_store(os.path.splitext(path)[0] + "-archive")
+    store = SqliteStore(path, **options)
+    store.keys = SCHEDULE
+    if not store.movies():
+        store.load_catalog(MOVIES)
+        for movie_id, timings in BOOKED_SEATS_DB.items():
+            for time_slot, booked in timings.items():
+                if booked:
+                    show = SCHEDULE.showing(movie_id, time_slot)
+                    store.book(show, [SEAT_INVENTORY.index(c, show) for c in booked])
+    MOVIES[:] = store.movies()
+    MOVIES_BY_ID.clear()
+    MOVIES_BY_ID.update((m["id"], m) for m in MOVIES)
+    CATALOG_INDEX.rebuild(MOVIES)
+    SCHEDULE.plan(MOVIES)
+    store.load_inventory(SEAT_INVENTORY)
+    ALLOCATOR.reset()
+    PRICING.invalidate()
+    BOOKING_SERVICE.store = store
+    COMPACTOR.prune = store.prune  # Archived showings leave the database too
+    return store
+
+
+def new_analytics():
+    """ An empty analytics.BookingAnalytics for this catalog (imports NumPy) """
+    from analytics import BookingAnalytics
+    return BookingAnalytics(show_layout, base_price)
+
+
+def booking_history(store=None, cold=None):
+    """
+    (key, indices, booked_at) events of every booking: the archived showings
+    in `cold` (default: the compactor's cold store; booked_at None), then
+    those of `store` (a BookingLog or SqliteStore) that are not archived.
+    """
+    cold = COMPACTOR.cold if cold is None else cold
+    for movie_id, day, time_slot, _, seats in cold.final_shows():
+        indices = [i for i, state in enumerate(seats) if state == BOOKED]
+        if indices:
+            yield (movie_id, dated(day, time_slot)), indices, None
+    if store is None:
+        return
+    archived = {}  # { time text: archived? }
+    for key, indices, booked_at in store.history():
+        done = archived.get(key[1])
+        if done is None:
+            day, time_slot = split_time(key[1])
+            done = archived[key[1]] = day is not None and start_minute(day, time_slot) <= cold.until
+        if not done:  # Archived ones are in the log until the next snapshot, and already counted above
+            yield key, indices, booked_at
+
+
+def enable_analytics(store=None):
+    """
+    Loads the booking history of `store` (a BookingLog or SqliteStore) and of
+    the archived showings into a new BookingAnalytics and keeps it fed with
+    every later commit; call its flush() before reading reports.
+    """
+    analytics = new_analytics()
+    analytics.add_events(booking_history(store))
+    analytics.attach(BOOKING_SERVICE, key=SCHEDULE.key)  # Same (movie_id, time) keys as store.history()
+    return analytics
+
+
+# --- Catalog ---
+
+def list_movies():
+    return MOVIES
+
+
+def catalog_page(offset, limit, movies=MOVIES):
+    return movies[offset:offset + limit]
+
+
+def catalog_source(movies=None, page_size=50):
+    """ Paged view of the catalog (or of a search result) for clients that only show a window of it """
+    movies = MOVIES if movies is None else movies
+    return CatalogSource(lambda offset, limit: catalog_page(offset, limit, movies), lambda: len(movies), page_size)
+
+
+def search_movies(text=None, genre=None):
+    """ Movies whose title/description words start with the words of `text`, in catalog order """
+    ids = CATALOG_INDEX.match(text, genre)
+    return MOVIES if ids is None else [m for m in MOVIES if m["id"] in ids]
+
+
+def search_shows(text=None, genre=None, after=None, before=None, min_adjacent=0, limit=None):
+    """
+    Shows matching a text query, genre and start time window ("05:00 PM" /
+    "17:00", both inclusive) that still have `min_adjacent` free seats (neither
+    sold nor held) side by side in one row.
+    Raises ValueError for unparseable times.
+    """
+    after = parse_time(after) if after else None
+    before = parse_time(before) if before else None
+    keep = None
+    if min_adjacent > 0:
+        def keep(shows):
+            # Seats are counted on each time's next showing
+            ids = [SCHEDULE.showing(movie_id, time_slot) for movie_id, time_slot in shows]
+            free = set(ALLOCATOR.with_adjacent_free(ids, min_adjacent))
+            return [show for show, show_id in zip(shows, ids) if show_id in free]
+    return [{"movie_id": movie_id, "title": MOVIES_BY_ID[movie_id]["title"], "time": time_slot}
+            for movie_id, time_slot in CATALOG_INDEX.search(text, genre, after, before, keep, limit)]
+
+
+def upcoming_shows(after=None, limit=50, movie_id=None):
+    """
+    Scheduled showings starting at or after `after` ("YYYY-MM-DD hh:mm AM",
+    or a bare time for today; default now), soonest first. Raises ValueError
+    for an unparseable time.
+    """
+    start = None
+    if after:
+        day, time_slot = split_time(after)
+        start = start_minute(day or SCHEDULE.today(), time_slot)
+    return [{"show_id": s.id, "movie_id": s.movie_id, "title": MOVIES_BY_ID[s.movie_id]["title"],
+             "date": s.day.isoformat(), "time": dated(s.day, s.time_slot), "screen": s.screen}
+            for s in SCHEDULE.upcoming(start, limit, movie_id) if s.movie_id in MOVIES_BY_ID]
+
+
+def get_show(movie_id, time_slot):
+    """
+    Returns the show id of a movie's showing, checking that the movie plays
+    at that time. `time_slot` is "YYYY-MM-DD hh:mm AM" for a given day, or a
+    bare "hh:mm AM" for the next showing at that time that has not finished.
+    """
+    movie = MOVIES_BY_ID.get(movie_id)
+    if movie is None:
+        raise UnknownShowError(f"Unknown movie id {movie_id}")
+    try:
+        day, bare_time = split_time(time_slot)
+    except ValueError:
+        raise UnknownShowError(f"Bad show date in {time_slot!r}")
+    if bare_time not in movie["timings"]:
+        raise UnknownShowError(f"{movie['title']} has no {bare_time} show")
+    if day is not None and (day - SCHEDULE.today()).days >= SCHEDULE.horizon_days:
+        raise UnknownShowError(f"{movie['title']} is not scheduled for {day} yet")
+    show = SCHEDULE.showing(movie_id, bare_time, day)
+    if show is None:
+        raise UnknownShowError(f"The {time_slot} show of {movie['title']} has finished")
+    return show
+
+
+def show_time(show):
+    """ "YYYY-MM-DD hh:mm AM" of a show id """
+    return show_instance(show).key[1]
+
+
+def seat_label(movie_id, coord):
+    """ Printed seat name, e.g. "C7" (seat numbers skip aisles) """
+    return movie_layout(MOVIES_BY_ID[movie_id]).label(coord)
+
+
+def seat_states(movie_id, time_slot, session=None):
+    """
+    One byte per cell, row-major: FREE (0) if the session may pick the seat,
+    BOOKED (1) if it is sold or held by another session, BLOCKED for aisles.
+    """
+    show = get_show(movie_id, time_slot)
+    states = bytearray(SEAT_INVENTORY.snapshot(show))
+    for coord in BOOKING_SERVICE.held_seats(show, exclude_session=session):
+        states[SEAT_INVENTORY.index(coord, show)] = BOOKED
+    return states
+
+
+def seat_map(movie_id, time_slot, session=None):
+    """
+    Availability of every cell in a show as rows of "available" / "booked" /
+    "held" (held by another session; a session always sees its own holds as
+    available) / null for aisles, plus the seat labels, classes and current
+    prices (see pricing.py).
+    """
+    show = get_show(movie_id, time_slot)
+    layout = movie_layout(MOVIES_BY_ID[movie_id])
+    seats = SEAT_INVENTORY.snapshot(show)
+    held = {SEAT_INVENTORY.index(c, show) for c in BOOKING_SERVICE.held_seats(show, exclude_session=session)}
+    names = {BOOKED: "booked", BLOCKED: None}
+    states = [names.get(state, "available") if i not in held else "held" for i, state in enumerate(seats)]
+    prices = PRICING.table(show)
+    cols = layout.cols
+    rows = range(layout.rows)
+    return {
+        "movie_id": movie_id,
+        "time": show_time(show),
+        "screen": layout.name,
+        "rows": layout.rows,
+        "cols": cols,
+        "classes": [{"name": n, "price": p} for n, p in zip(layout.class_names, PRICING.class_prices(show))],
+        "seats": [states[r * cols:(r + 1) * cols] for r in rows],
+        "labels": [layout.labels[r * cols:(r + 1) * cols] for r in rows],
+        "prices": [list(prices[r * cols:(r + 1) * cols]) for r in rows],
+    }
+
+
+# --- Pricing & payment ---
+
+def quote(movie, coords, time_slot, promo=None):
+    """
+    Total for the given seats of one show: base price plus class surcharge,
+    scaled for demand, time and day, less the promo code's discount. Raises
+    PricingError (a BookingError) for an invalid promo or too many seats.
+    """
+    return PRICING.quote(get_show(movie["id"], time_slot), coords, promo)
+
+
+def price_breakdown(movie_id, time_slot, coords, promo=None):
+    """ Subtotal, promo discount and total for the seats, plus the show's current price multiplier """
+    show = get_show(movie_id, time_slot)
+    subtotal, discount, total = PRICING.quote_details(show, coords, promo)
+    return {"subtotal": subtotal, "discount": discount, "total": total, "multiplier": PRICING.multiplier(show)}
+
+
+def validate_card(card_number, expiry, cvv):
+    """ Raises PaymentDetailsError for obviously invalid (mock) card details """
+    if len(card_number) < 16 or len(cvv) < 3:
+        raise PaymentDetailsError("Please enter valid mock card details.")
+
+
+# --- Booking flow ---
+
+def hold_seats(session, movie_id, time_slot, coords):
+    return BOOKING_SERVICE.hold(session, get_show(movie_id, time_slot), coords)
+
+
+def hold_best_seats(session, movie_id, time_slot, count, attempts=3):
+    """
+    Picks and holds the best `count` adjacent seats. Returns their coordinates,
+    or None when no row has that many free seats next to each other.
+    """
+    show = get_show(movie_id, time_slot)
+    for _ in range(attempts):
+        coords = ALLOCATOR.best_seats(show, count)
+        if coords is None:
+            return None
+        try:
+            BOOKING_SERVICE.hold(session, show, coords)
+            return coords
+        except SeatUnavailableError:
+            continue  # Someone got there first; the index is already updated, try again
+    return None
+
+
+def release_seats(session, movie_id, time_slot, coords=None):
+    BOOKING_SERVICE.release(session, get_show(movie_id, time_slot), coords)
+
+
+def confirm_booking(session, movie_id, time_slot, coords, promo=None):
+    """ Commits the seats and returns a booking summary; raises SeatUnavailableError on conflicts """
+    return book_show(session, get_show(movie_id, time_slot), coords, promo)
+
+
+def book_show(session, show, coords, promo=None, wait=True):
+    """
+    confirm_booking() for a show id resolved earlier (e.g. before a payment),
+    so the booking can never move to another showing. Raises UnknownShowError
+    if the showing has finished meanwhile. With wait=False the booking is not
+    yet durable: call BOOKING_SERVICE.sync() before reporting it.
+    """
+    instance = show_instance(show)
+    if instance.start + SCHEDULE.show_minutes <= SCHEDULE.now():
+        raise UnknownShowError(f"The {dated(instance.day, instance.time_slot)} show of "
+                               f"{MOVIES_BY_ID[instance.movie_id]['title']} has finished")
+    total = PRICING.quote(show, coords, promo)  # The price the customer was shown
+    BOOKING_SERVICE.commit(session, show, coords, wait=wait)
+    return {
+        "movie_id": instance.movie_id,
+        "time": dated(instance.day, instance.time_slot),
+        "seats": [seat_label(instance.movie_id, c) for c in coords],
+        "total": total,
+    }
+
+
+async def refund_failed_booking(charge_id, amount, error):
+    """
+    Refunds the charge of a booking that failed with `error`. A refund that
+    fails too is logged for follow-up, so the caller still re-raises `error`.
+    """
+    try:
+        await PAYMENTS.refund(charge_id, amount)
+    except Exception:
+        log.exception("refund of charge %s (%.2f) failed; the booking had failed with %r", charge_id, amount, error)
+
+
+async def pay_and_confirm(session, movie_id, time_slot, coords, card, idempotency_key=None, promo=None):
+    """
+    Charges the card and commits the seats. Show, seats, promo and card are
+    all checked before the charge; if the booking still fails afterwards (e.g.
+    SeatUnavailableError when the seats were taken while the payment was in
+    flight) the charge is refunded and the error re-raised.
+    """
+    show = get_show(movie_id, time_slot)
+    validate_card(str(card.get("number", "")), str(card.get("expiry", "")), str(card.get("cvv", "")))
+    BOOKING_SERVICE.check(show, coords)
+    amount = PRICING.quote(show, coords, promo)
+    charge_id = await PAYMENTS.charge(amount, card, idempotency_key)
+    try:
+        summary = book_show(session, show, coords, promo, wait=False)  # The showing that was paid for
+    except BaseException as e:  # Whatever went wrong, a customer without tickets gets the money back
+        await refund_failed_booking(charge_id, amount, e)
+        raise
+    try:
+        # The log's fsync blocks: wait in a worker thread so concurrent bookings share one group commit
+        await asyncio.to_thread(BOOKING_SERVICE.sync)
+    except Exception as e:
+        await refund_failed_booking(charge_id, amount, e)
+        raise
+    summary["total"] = amount  # What was charged, even if demand moved the price meanwhile
+    summary["charge_id"] = charge_id
+    return summary
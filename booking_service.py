@@ -0,0 +1,296 @@
+# --- BOOKING SERVICE ---
+# Transaction layer on top of SeatInventory: time-limited seat holds and
+# all-or-nothing commits. Shows are spread over a fixed set of lock shards, so
+# sessions booking different shows (almost) never wait on each other.
+
+import logging
+import threading
+import time
+
+from instrumentation import timed
+from seat_inventory import BLOCKED, BOOKED, FREE, HELD
+
+DEFAULT_HOLD_SECONDS = 300
+DEFAULT_SHARDS = 64
+
+log = logging.getLogger(__name__)
+
+
+class BookingError(Exception):
+    pass
+
+
+class InvalidSeatError(BookingError):
+    pass
+
+
+class UnknownShowError(BookingError):
+    pass
+
+
+class SeatUnavailableError(BookingError):
+    def __init__(self, show, seats):
+        self.show = show
+        self.seats = sorted(seats)
+        super().__init__(f"Seats no longer available for {show}: {self.seats}")
+
+
+class BookingService:
+    def __init__(self, inventory, hold_seconds=DEFAULT_HOLD_SECONDS, shards=DEFAULT_SHARDS,
+                 clock=time.monotonic, store=None):
+        self.inventory = inventory
+        self.store = store  # Optional durable log (booking_store.BookingLog)
+        self.hold_seconds = hold_seconds
+        self.clock = clock
+        # Re-entrant so observers may call back into the service for the same show
+        self._locks = [threading.RLock() for _ in range(shards)]
+        self._holds = {}  # { show: { seat_index: (session, expires_at) } }
+        self._closed = set()  # Shows being archived: their seat state is final
+        self._pending = []  # (show, indices) committed with wait=False, not yet synced
+        self._pending_lock = threading.Lock()
+        self._observers = []
+
+    def add_observer(self, callback):
+        """
+        Registers callback(show, indices, state, session) for every seat change
+        (state is HELD, FREE or BOOKED; session is the acting session, None for
+        hold expiry). It runs under the show's lock, so it must be quick. The
+        change has already happened: an exception from it is logged, not raised.
+        """
+        self._observers.append(callback)
+
+    def _notify(self, show, indices, state, session=None):
+        for callback in self._observers:
+            try:
+                callback(show, indices, state, session)
+            except Exception:  # A broken index must not fail a booking that is already recorded
+                log.exception("seat change observer %r failed for show %r", callback, show)
+
+    def lock_for(self, show):
+        """ The shard lock guarding a show's seats and holds """
+        return self._locks[hash(show) % len(self._locks)]
+
+    def _live_holds(self, show, now):
+        """ Returns the hold table for a show with expired entries dropped (lock must be held) """
+        holds = self._holds.get(show)
+        if holds is None:
+            holds = self._holds[show] = {}
+        expired = [i for i, (_, expires_at) in holds.items() if expires_at <= now]
+        for i in expired:
+            del holds[i]
+        if expired:
+            self._notify(show, expired, FREE)
+        return holds
+
+    def _check_open(self, show):
+        if show in self._closed:
+            raise UnknownShowError(f"Show {show} has finished")
+
+    def _indices(self, show, coords):
+        try:
+            return list(dict.fromkeys(self.inventory.index(c, show) for c in coords))
+        except ValueError as e:
+            raise InvalidSeatError(str(e))
+
+    def _conflicts(self, show, seats, holds, session, indices):
+        for i in indices:
+            if i >= len(seats):
+                raise InvalidSeatError(f"seat index {i} is outside the hall")
+            if seats[i] == BLOCKED:  # An aisle or gap is not a seat, not a taken one
+                raise InvalidSeatError(f"no seat at {self.inventory.coord(i, show)}")
+        return [i for i in indices
+                if seats[i] != FREE or (i in holds and holds[i][0] != session)]
+
+    def _coords(self, show, indices):
+        return [self.inventory.coord(i, show) for i in indices]
+
+    def _raise_store_conflict(self, show, error):
+        """ A store (e.g. SqliteStore) that found seats already booked names them by index """
+        if isinstance(error, SeatUnavailableError):
+            raise SeatUnavailableError(show, self._coords(show, error.seats)) from None
+
+    def _revert(self, show, indices):
+        """ Frees the seats of a commit the store never made durable, so they can be sold again """
+        with self.lock_for(show):
+            if not self.inventory.has_show(show):
+                return  # Archived meanwhile
+            seats = self.inventory.ensure_show(show)
+            freed = [i for i in indices if seats[i] == BOOKED]
+            if freed:
+                self.inventory.mark_free_indices(show, freed)
+                self._notify(show, freed, FREE)
+
+    def _wait_durable(self, show, indices, ticket, wait):
+        if ticket is None:
+            return
+        if not wait:
+            with self._pending_lock:
+                self._pending.append((show, indices))
+            return
+        try:
+            self.store.wait_durable(ticket)
+        except Exception:
+            self._revert(show, indices)
+            raise
+
+    def check(self, show, coords):
+        """ Raises InvalidSeatError unless the coordinates name at least one seat, all in the hall (taken or not) """
+        indices = self._indices(show, coords)
+        if not indices:
+            raise InvalidSeatError("no seats selected")
+        seats = self.inventory.ensure_show(show)
+        for i in indices:
+            if i >= len(seats) or seats[i] == BLOCKED:
+                raise InvalidSeatError(f"no seat at {self.inventory.coord(i, show)}")
+
+    # --- Holds ---
+
+    def hold(self, session, show, coords, hold_seconds=None):
+        """ Holds every seat for the session or none of them; returns the expiry time """
+        indices = self._indices(show, coords)
+        expires_at = self.clock() + (self.hold_seconds if hold_seconds is None else hold_seconds)
+        with self.lock_for(show):
+            self._check_open(show)
+            seats = self.inventory.ensure_show(show)
+            holds = self._live_holds(show, self.clock())
+            taken = self._conflicts(show, seats, holds, session, indices)
+            if taken:
+                raise SeatUnavailableError(show, self._coords(show, taken))
+            for i in indices:
+                holds[i] = (session, expires_at)
+            self._notify(show, indices, HELD, session)
+        return expires_at
+
+    def release(self, session, show, coords=None):
+        """ Drops the session's holds on a show (all of them when coords is None) """
+        with self.lock_for(show):
+            holds = self._holds.get(show)
+            if not holds:
+                return
+            if coords is None:
+                indices = [i for i, (owner, _) in holds.items() if owner == session]
+            else:
+                indices = self._indices(show, coords)
+            released = [i for i in indices if i in holds and holds[i][0] == session]
+            for i in released:
+                del holds[i]
+            if released:
+                self._notify(show, released, FREE, session)
+
+    def close(self, show):
+        """
+        Refuses further holds and commits on a show (UnknownShowError), so its
+        seat state is final, e.g. before it is archived (cold_store.Compactor).
+        Commits already under way finish first.
+        """
+        with self.lock_for(show):
+            self._closed.add(show)
+
+    def forget(self, show):
+        """ Drops a closed or finished show's holds without notifying anyone, e.g. once it is archived """
+        with self.lock_for(show):
+            self._holds.pop(show, None)
+            self._closed.discard(show)
+
+    def held_seats(self, show, exclude_session=None):
+        """ Coordinates currently held on a show, optionally ignoring one session's holds """
+        with self.lock_for(show):
+            holds = self._live_holds(show, self.clock())
+            return [self.inventory.coord(i, show) for i, (owner, _) in holds.items()
+                    if owner != exclude_session]
+
+    # --- Commit ---
+
+    @timed("booking.commit")
+    def commit(self, session, show, coords, wait=True):
+        """
+        Books the seats atomically. Fails with SeatUnavailableError (and books
+        nothing) if any seat was sold or is held by another session meanwhile.
+        If the store cannot make the booking durable the seats are freed again
+        and its error (e.g. OSError) raised. With wait=False the log write is
+        not awaited; call sync() before reporting the booking as done.
+        """
+        indices = self._indices(show, coords)
+        with self.lock_for(show):
+            self._check_open(show)
+            seats = self.inventory.ensure_show(show)
+            holds = self._live_holds(show, self.clock())
+            taken = self._conflicts(show, seats, holds, session, indices)
+            if taken:
+                raise SeatUnavailableError(show, self._coords(show, taken))
+            self.inventory.mark_booked_indices(show, indices)
+            ticket = None
+            if self.store is not None:
+                try:
+                    ticket = self.store.append(show, indices)
+                except Exception as e:
+                    self.inventory.mark_free_indices(show, indices)  # The seats were free before
+                    self._raise_store_conflict(show, e)
+                    raise
+            for i in indices:
+                holds.pop(i, None)
+            self._notify(show, indices, BOOKED, session)
+        # Wait for the fsync outside the shard lock so other commits can join the same batch
+        self._wait_durable(show, indices, ticket, wait)
+        return len(indices)
+
+    @timed("booking.commit_batch")
+    def commit_batch(self, show, orders, wait=True):
+        """
+        Commits many independent orders for one show under a single lock and
+        one log record. `orders` is a list of (session, seat indices); each order
+        is all-or-nothing, and a seat asked for twice goes to the earlier order.
+        Returns, per order, the unavailable seat indices ([] if it was booked).
+        Indices must already be checked against the layout. With wait=False the
+        log write is not awaited; call sync() before reporting orders as booked.
+        """
+        results, accepted = [], []
+        with self.lock_for(show):
+            self._check_open(show)
+            seats = self.inventory.ensure_show(show)
+            holds = self._live_holds(show, self.clock())
+            size = len(seats)
+            claimed = set()
+            for session, indices in orders:
+                taken = [i for i in indices
+                         if i >= size or seats[i] != FREE or i in claimed
+                         or (i in holds and holds[i][0] != session)]
+                if taken:
+                    results.append(taken)
+                    continue
+                claimed.update(indices)
+                accepted.extend(indices)
+                results.append([])
+            if not accepted:
+                return results
+            self.inventory.mark_booked_indices(show, accepted)
+            ticket = None
+            if self.store is not None:
+                try:
+                    ticket = self.store.append(show, accepted)
+                except Exception as e:
+                    self.inventory.mark_free_indices(show, accepted)
+                    self._raise_store_conflict(show, e)
+                    raise
+            for i in accepted:
+                holds.pop(i, None)
+            self._notify(show, accepted, BOOKED)
+        self._wait_durable(show, accepted, ticket, wait)
+        return results
+
+    def sync(self):
+        """
+        Waits until every commit so far is durable in the store. If the store
+        failed, the seats of every wait=False commit not yet synced are freed
+        and its error is raised.
+        """
+        if self.store is None:
+            return
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        try:
+            self.store.sync()
+        except Exception:
+            for show, indices in pending:
+                self._revert(show, indices)
+            raise
@@ -0,0 +1,342 @@
+# --- DURABLE BOOKING STORE ---
+# Append-only write-ahead log of booking events with group commit (one fsync
+# per batch of concurrent commits), compact snapshots of every show's seat
+# bytearray, and recovery that loads the latest snapshot and replays only the
+# log segments written after it. With `keys` set (a schedule.Schedule), the
+# in-memory show ids are recorded under their (movie_id, "YYYY-MM-DD hh:mm AM")
+# keys, and recovery skips showings that are already in the cold store.
+#
+# Files in the data directory:
+#   wal-<segment>.log        records: <crc32 u32><length u16><payload>
+#                            payload: show, seat indices, booked-at (unix seconds)
+#   snapshot-<segment>.bin   full seat state; log replay starts at <segment>
+
+import os
+import struct
+import threading
+import time
+import zlib
+
+from instrumentation import timed
+from seat_inventory import BOOKED
+
+RECORD_HEADER = struct.Struct("<IH")
+SHOW_HEADER = struct.Struct("<IB")    # movie id, length of the time string
+SEATS_HEADER = struct.Struct("<H")    # number of seat indices (u16 each) that follow
+SNAPSHOT_MAGIC = b"BMSSNAP1"
+SNAPSHOT_SHOW = struct.Struct("<IBI")  # movie id, time length, seat count
+BOOKED_AT = struct.Struct("<I")        # Trailer; records written before it was added end after the seats
+
+
+def encode_booking(show, indices, booked_at=None):
+    movie_id, time_slot = show
+    time_bytes = time_slot.encode()
+    return (SHOW_HEADER.pack(movie_id, len(time_bytes)) + time_bytes
+            + SEATS_HEADER.pack(len(indices)) + struct.pack(f"<{len(indices)}H", *indices)
+            + BOOKED_AT.pack(int(time.time() if booked_at is None else booked_at)))
+
+
+def decode_record(payload):
+    """ (show, indices, booked_at); booked_at is None for records without the trailer """
+    movie_id, time_len = SHOW_HEADER.unpack_from(payload)
+    offset = SHOW_HEADER.size
+    time_slot = payload[offset:offset + time_len].decode()
+    offset += time_len
+    (count,) = SEATS_HEADER.unpack_from(payload, offset)
+    offset += SEATS_HEADER.size
+    indices = struct.unpack_from(f"<{count}H", payload, offset)
+    offset += 2 * count
+    booked_at = BOOKED_AT.unpack_from(payload, offset)[0] if len(payload) >= offset + BOOKED_AT.size else None
+    return (movie_id, time_slot), indices, booked_at
+
+
+def decode_booking(payload):
+    show, indices, _ = decode_record(payload)
+    return show, indices
+
+
+def iter_records(data):
+    """ Yields (end_offset, payload) for each intact record, stopping at the first torn one """
+    offset = 0
+    while offset + RECORD_HEADER.size <= len(data):
+        crc, length = RECORD_HEADER.unpack_from(data, offset)
+        payload = data[offset + RECORD_HEADER.size:offset + RECORD_HEADER.size + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return  # Torn write from a crash: everything after it was never acknowledged
+        offset += RECORD_HEADER.size + length
+        yield offset, payload
+
+
+def iter_snapshot(path):
+    """ Yields (show, seat bytes) for every show in a snapshot file """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:8] != SNAPSHOT_MAGIC:
+        raise ValueError(f"{path} is not a booking snapshot")
+    (count,) = struct.unpack_from("<I", data, 8)
+    offset = 12
+    for _ in range(count):
+        movie_id, time_len, seat_count = SNAPSHOT_SHOW.unpack_from(data, offset)
+        offset += SNAPSHOT_SHOW.size
+        time_slot = data[offset:offset + time_len].decode()
+        offset += time_len
+        yield (movie_id, time_slot), data[offset:offset + seat_count]
+        offset += seat_count
+
+
+class BookingLog:
+    def __init__(self, directory, batch_size=64, flush_interval=0.002, snapshot_every=100_000):
+        """
+        `batch_size` is the number of pending records that forces an fsync,
+        `flush_interval` the longest a record waits for its batch to fill.
+        """
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+        os.makedirs(directory, exist_ok=True)
+
+        self.inventory = None
+        self.keys = None
+        self._lock = threading.Lock()
+        self._work = threading.Condition(self._lock)   # wakes the flusher
+        self._done = threading.Condition(self._lock)   # wakes committers waiting for fsync
+        self._io_lock = threading.Lock()               # serializes writes with segment rotation
+        self._buffer = []
+        self._written = 0       # records handed to append()
+        self._durable = 0       # records fsynced
+        self._since_snapshot = 0
+        self._closed = False
+        self._error = None      # write / fsync failure that stopped the flusher
+        self._snapshotting = False
+        self._segment = max(self._segments(), default=0)
+        self._file = None
+        self._flusher = None
+
+    # --- File helpers ---
+
+    def _path(self, kind, segment):
+        ext = "log" if kind == "wal" else "bin"
+        return os.path.join(self.directory, f"{kind}-{segment:08d}.{ext}")
+
+    def _list(self, kind):
+        prefix = f"{kind}-"
+        return sorted(int(name[len(prefix):len(prefix) + 8]) for name in os.listdir(self.directory)
+                      if name.startswith(prefix) and not name.endswith(".tmp"))
+
+    def _segments(self):
+        return self._list("wal")
+
+    # --- Recovery ---
+
+    def recover(self, inventory):
+        """
+        Rebuilds the inventory from the latest snapshot plus the log tail, then
+        opens the log for appending. Returns the number of replayed records.
+        """
+        self.inventory = inventory
+        snapshots = self._list("snapshot")
+        start_segment = 0
+        if snapshots:
+            start_segment = snapshots[-1]
+            self._load_snapshot(self._path("snapshot", start_segment), inventory)
+
+        replayed = 0
+        for segment in self._segments():
+            if segment >= start_segment:
+                replayed += self._replay(self._path("wal", segment), inventory)
+        self._since_snapshot = replayed
+
+        self._file = open(self._path("wal", self._segment), "ab")
+        self._flusher = threading.Thread(target=self._flush_loop, name="wal-flusher", daemon=True)
+        self._flusher.start()
+        return replayed
+
+    def _show(self, key):
+        """ In-memory show for a stored key; None if it was archived """
+        return key if self.keys is None else self.keys.show(key)
+
+    def _load_snapshot(self, path, inventory):
+        for key, seats in iter_snapshot(path):
+            show = self._show(key)
+            if show is not None:
+                inventory.restore(show, seats)
+
+    def _replay(self, path, inventory):
+        with open(path, "rb") as f:
+            data = f.read()
+        offset = replayed = 0
+        for offset, payload in iter_records(data):
+            key, indices = decode_booking(payload)
+            show = self._show(key)
+            if show is not None:
+                inventory.mark_booked_indices(show, indices)
+            replayed += 1
+        if offset < len(data):
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+        return replayed
+
+    def history(self):
+        """
+        Read-only stream of (show, indices, booked_at): the booked seats in the
+        latest snapshot first (booked_at None, row-major, since snapshots
+        keep no order), then every logged booking after it in commit order.
+        Each booked seat is yielded once: log records written while the
+        snapshot was taken are already in it, so those seats are skipped.
+        """
+        snapshots = self._list("snapshot")
+        start_segment = snapshots[-1] if snapshots else 0
+        in_snapshot = {}  # { show: seat bytes } of the snapshot the log tail starts from
+        if snapshots:
+            for show, seats in iter_snapshot(self._path("snapshot", start_segment)):
+                indices = [i for i, state in enumerate(seats) if state == BOOKED]
+                if indices:
+                    in_snapshot[show] = seats
+                    yield show, indices, None
+        for segment in self._segments():
+            if segment >= start_segment:
+                with open(self._path("wal", segment), "rb") as f:
+                    data = f.read()
+                for _, payload in iter_records(data):
+                    show, indices, booked_at = decode_record(payload)
+                    seats = in_snapshot.get(show)
+                    if seats is not None:
+                        indices = [i for i in indices if i >= len(seats) or seats[i] != BOOKED]
+                        if not indices:
+                            continue
+                    yield show, indices, booked_at
+
+    # --- Appending (group commit) ---
+
+    def append(self, show, indices):
+        """ Queues a booking record; returns a ticket to pass to wait_durable() """
+        payload = encode_booking(show if self.keys is None else self.keys.key(show), indices)
+        record = RECORD_HEADER.pack(zlib.crc32(payload), len(payload)) + payload
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("booking log is closed")
+            self._check_failed()
+            self._buffer.append(record)
+            self._written += 1
+            if len(self._buffer) == 1 or len(self._buffer) >= self.batch_size:
+                self._work.notify()
+            return self._written
+
+    def _check_failed(self):
+        """ Raises OSError once a log write has failed (lock must be held); nothing after it is durable """
+        if self._error is not None:
+            raise OSError(f"booking log write failed: {self._error}") from self._error
+
+    @timed("store.durable_write")
+    def wait_durable(self, ticket):
+        """ Blocks until the record behind `ticket` has been fsynced; raises OSError if it never will be """
+        with self._lock:
+            while self._durable < ticket:
+                self._check_failed()
+                self._done.wait()
+
+    def sync(self):
+        """ Blocks until every record appended so far has been fsynced """
+        with self._lock:
+            target = self._written
+        self.wait_durable(target)
+
+    def _flush_loop(self):
+        while True:
+            with self._lock:
+                if not self._buffer and not self._closed:
+                    self._work.wait()
+                if self._buffer and len(self._buffer) < self.batch_size and not self._closed:
+                    # Give concurrent committers a moment to join this batch
+                    self._work.wait(self.flush_interval)
+                batch, self._buffer = self._buffer, []
+                target = self._written
+                closed = self._closed
+            if batch:
+                try:
+                    with self._io_lock:
+                        self._file.write(b"".join(batch))
+                        self._file.flush()
+                        os.fsync(self._file.fileno())
+                except Exception as e:  # Disk full, EIO...: fail the waiting committers rather than hang them
+                    with self._lock:
+                        self._error = e
+                        self._done.notify_all()
+                    return
+            with self._lock:
+                self._durable = target
+                self._since_snapshot += len(batch)
+                self._done.notify_all()
+            if closed and not batch:
+                return
+            if self._since_snapshot >= self.snapshot_every and self.inventory is not None \
+                    and not self._snapshotting:
+                self._snapshotting = True
+                threading.Thread(target=self._background_snapshot, name="wal-snapshot", daemon=True).start()
+
+    def _background_snapshot(self):
+        try:
+            self.snapshot()
+        finally:
+            self._snapshotting = False
+
+    # --- Snapshots ---
+
+    def snapshot(self):
+        """
+        Starts a new log segment, then writes the seat state of every show.
+        Records in the new segment may already be in the snapshot too; replaying
+        them is harmless because marking a seat booked is idempotent.
+        """
+        with self._io_lock:
+            old_file = self._file
+            self._segment += 1
+            segment = self._segment
+            self._file = open(self._path("wal", segment), "ab")
+            old_file.close()  # Everything in it was fsynced by the flusher
+        with self._lock:
+            self._since_snapshot = 0
+
+        inventory = self.inventory
+        parts = [SNAPSHOT_MAGIC, b""]
+        count = 0
+        for show in inventory.shows():
+            if self.keys is None:
+                movie_id, time_slot = show
+            else:
+                instance = self.keys.get(show)
+                if instance is None:
+                    continue  # Archived meanwhile
+                movie_id, time_slot = instance.key
+            seats = inventory.stored(show)
+            if seats is None:
+                continue
+            time_bytes = time_slot.encode()
+            parts.append(SNAPSHOT_SHOW.pack(movie_id, len(time_bytes), len(seats)) + time_bytes + seats)
+            count += 1
+        parts[1] = struct.pack("<I", count)
+
+        path = self._path("snapshot", segment)
+        with open(path + ".tmp", "wb") as f:
+            f.write(b"".join(parts))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+        # Older snapshots and segments are now redundant
+        for old in self._list("snapshot"):
+            if old < segment:
+                os.remove(self._path("snapshot", old))
+        for old in self._segments():
+            if old < segment:
+                os.remove(self._path("wal", old))
+        return path
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._work.notify()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._file.close()
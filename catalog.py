@@ -0,0 +1,95 @@
+# --- CATALOG PAGING ---
+# Headless helpers for the catalog view: a paged data source, so a client
+# fetches movies as they scroll into view instead of all at once, and a
+# word-wrap cache, so a description is wrapped once per width rather than
+# once per card creation. Must not import wx.
+
+from collections import OrderedDict
+
+
+class CatalogSource:
+    """
+    Random access to a catalog through `fetch(offset, limit)` (returning a list
+    of MOVIES-shaped dicts) and `count()`. Pages are fetched on first access
+    and the most recently used `max_pages` are kept.
+    """
+
+    def __init__(self, fetch, count, page_size=50, max_pages=20):
+        self.fetch = fetch
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self._count = count
+        self._pages = OrderedDict()  # { page_no: [movie, ...] }
+        self.fetches = 0
+
+    def __len__(self):
+        return self._count()
+
+    def page(self, page_no):
+        rows = self._pages.get(page_no)
+        if rows is None:
+            rows = self._pages[page_no] = self.fetch(page_no * self.page_size, self.page_size)
+            self.fetches += 1
+            if len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page_no)
+        return rows
+
+    def get(self, index):
+        page_no, offset = divmod(index, self.page_size)
+        rows = self.page(page_no)
+        return rows[offset] if offset < len(rows) else None
+
+    def invalidate(self):
+        """ Drops every cached page, e.g. after the catalog changed """
+        self._pages.clear()
+
+
+class WrapCache:
+    """
+    Greedy word wrap against a `measure(text) -> width` function (e.g. a wx
+    DC's GetTextExtent for one font). Word widths and finished wraps are cached
+    per (text, width).
+    """
+
+    def __init__(self, measure, max_entries=4096):
+        self.measure = measure
+        self.max_entries = max_entries
+        self._widths = {}
+        self._wrapped = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _width(self, text):
+        width = self._widths.get(text)
+        if width is None:
+            width = self._widths[text] = self.measure(text)
+        return width
+
+    def wrap(self, text, width):
+        """ `text` with newlines inserted so no line is wider than `width` (long words overflow) """
+        key = (text, width)
+        wrapped = self._wrapped.get(key)
+        if wrapped is not None:
+            self.hits += 1
+            self._wrapped.move_to_end(key)
+            return wrapped
+        self.misses += 1
+
+        space = self._width(" ")
+        lines = []
+        for paragraph in text.split("\n"):
+            line, line_width = [], 0
+            for word in paragraph.split():
+                w = self._width(word)
+                if line and line_width + space + w > width:
+                    lines.append(" ".join(line))
+                    line, line_width = [], 0
+                line_width += (space if line else 0) + w
+                line.append(word)
+            lines.append(" ".join(line))
+        wrapped = self._wrapped[key] = "\n".join(lines)
+        if len(self._wrapped) > self.max_entries:
+            self._wrapped.popitem(last=False)
+        return wrapped
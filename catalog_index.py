@@ -0,0 +1,144 @@
+# --- CATALOG SEARCH INDEX ---
+# Precomputed lookups over the catalog so searches never scan MOVIES:
+#   - an inverted index from title/description tokens to movie ids, with the
+#     token list kept sorted for prefix matching ("aven" -> "avengers")
+#   - a genre facet index ("Action/Sci-Fi" is filed under "action" and "sci-fi")
+#   - show-time indexes holding parsed minutes since midnight, sorted, so a time
+#     range is two bisections instead of re-parsing "09:00 AM" strings
+# The adjacency filter ("at least N free seats next to each other") runs last,
+# on the few shows the indexes leave, as one dict lookup per show in
+# allocator.SeatAllocator's longest-free-run table.
+
+import re
+from bisect import bisect_left, bisect_right
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_TIME = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*([AaPp][Mm])?\s*$")
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+def parse_time(text):
+    """ "05:00 PM" or "17:00" -> minutes since midnight; raises ValueError otherwise """
+    m = _TIME.match(text)
+    if m is None:
+        raise ValueError(f"not a show time: {text!r}")
+    hours, minutes, half = int(m.group(1)), int(m.group(2)), m.group(3)
+    if half is not None:
+        if not 1 <= hours <= 12:
+            raise ValueError(f"not a show time: {text!r}")
+        hours = hours % 12 + (12 if half.lower() == "pm" else 0)
+    if hours > 23 or minutes > 59:
+        raise ValueError(f"not a show time: {text!r}")
+    return hours * 60 + minutes
+
+
+def split_genres(genre):
+    return [g.strip().lower() for g in genre.split("/") if g.strip()]
+
+
+class _ShowList:
+    """ Shows sorted by start time: parallel lists of minutes and (movie_id, time) keys """
+
+    __slots__ = ("minutes", "shows")
+
+    def __init__(self, entries):
+        entries.sort()
+        self.minutes = [m for m, _ in entries]
+        self.shows = [show for _, show in entries]
+
+    def between(self, start, end):
+        lo = bisect_left(self.minutes, start) if start is not None else 0
+        hi = bisect_right(self.minutes, end) if end is not None else len(self.minutes)
+        return self.shows[lo:hi]
+
+
+class CatalogIndex:
+    def __init__(self, movies=()):
+        self.rebuild(movies)
+
+    def rebuild(self, movies):
+        """ Indexes a list of MOVIES-shaped dicts, replacing any previous contents """
+        tokens, genres, by_genre, by_movie, everything = {}, {}, {}, {}, []
+        for movie in movies:
+            movie_id = movie["id"]
+            for token in set(tokenize(movie["title"]) + tokenize(movie.get("description", ""))):
+                tokens.setdefault(token, set()).add(movie_id)
+            entries = [(parse_time(t), (movie_id, t)) for t in movie["timings"]]
+            by_movie[movie_id] = _ShowList(list(entries))
+            everything.extend(entries)
+            for genre in split_genres(movie["genre"]):
+                genres.setdefault(genre, set()).add(movie_id)
+                by_genre.setdefault(genre, []).extend(entries)
+
+        # Swapped in at the end, so readers never see a half-built index
+        self._tokens = tokens
+        self._sorted_tokens = sorted(tokens)
+        self._genres = genres
+        self._by_genre = {g: _ShowList(entries) for g, entries in by_genre.items()}
+        self._by_movie = by_movie
+        self._all = _ShowList(everything)
+
+    # --- Lookups ---
+
+    def genres(self):
+        """ Every genre facet with its number of movies, by name """
+        return {g: len(ids) for g, ids in sorted(self._genres.items())}
+
+    def prefix(self, prefix):
+        """ Ids of movies with a title/description token starting with `prefix` """
+        tokens = self._sorted_tokens
+        ids = set()
+        i = bisect_left(tokens, prefix)
+        while i < len(tokens) and tokens[i].startswith(prefix):
+            ids |= self._tokens[tokens[i]]
+            i += 1
+        return ids
+
+    def match(self, text=None, genre=None):
+        """ Ids of movies matching every word of `text` (as prefixes) and the genre; None means "all" """
+        ids = None
+        if genre:
+            ids = set(self._genres.get(genre.strip().lower(), ()))
+        for word in tokenize(text or ""):
+            found = self.prefix(word)
+            ids = found if ids is None else ids & found
+            if not ids:
+                break
+        return ids
+
+    def shows(self, text=None, genre=None, after=None, before=None):
+        """
+        (movie_id, time) of every show matching the filters, in start time order
+        (per movie when `text` narrows the search). `after` / `before` are minutes.
+        """
+        if text and tokenize(text):
+            ids = self.match(text, genre)
+            result = []
+            for movie_id in sorted(ids):
+                result.extend(self._by_movie[movie_id].between(after, before))
+            return result
+        if genre:
+            shows = self._by_genre.get(genre.strip().lower())
+            return shows.between(after, before) if shows is not None else []
+        return self._all.between(after, before)
+
+    def search(self, text=None, genre=None, after=None, before=None, keep=None, limit=None):
+        """
+        Like shows(), further narrowed by `keep(shows) -> shows` (a bulk filter,
+        e.g. SeatAllocator.with_adjacent_free) and cut off after `limit` results
+        """
+        shows = self.shows(text, genre, after, before)
+        if keep is None:
+            return shows if limit is None else shows[:limit]
+        if limit is None:
+            return keep(shows)
+        # Filter in growing chunks so a small limit does not pay for every candidate
+        result, start, chunk = [], 0, max(limit * 2, 64)
+        while start < len(shows) and len(result) < limit:
+            result.extend(keep(shows[start:start + chunk]))
+            start += chunk
+            chunk *= 2
+        return result[:limit]
@@ -0,0 +1,134 @@
+# --- VIRTUALIZED CATALOG VIEW ---
+# A scrollable grid of movie cards that only keeps widgets for the rows in
+# view (plus a little overscan). Cards scrolled out are hidden and reused for
+# the movies scrolling in, so the number of live widgets depends on the
+# window height, not the catalog size. Movies come from a catalog.CatalogSource
+# and are fetched a page at a time as they are first shown.
+
+import wx
+
+from catalog import WrapCache
+from instrumentation import timed
+
+
+def text_measure(font):
+    """ measure(text) -> pixel width in `font`, for catalog.WrapCache """
+    dc = wx.MemoryDC(wx.Bitmap(1, 1))
+    dc.SetFont(font)
+    return lambda text: dc.GetTextExtent(text)[0]
+
+
+def wrap_cache(font):
+    return WrapCache(text_measure(font))
+
+
+class CatalogView(wx.ScrolledWindow):
+    def __init__(self, parent, source, make_card, card_size, cols=2, gap=40, overscan=1):
+        """
+        `make_card(parent)` creates an empty card widget with a `set_movie(movie)`
+        method; cards are `card_size` (w, h) and laid out `cols` per row.
+        """
+        super().__init__(parent, style=wx.VSCROLL)
+        self.SetBackgroundColour(parent.GetBackgroundColour())
+        self.source = source
+        self.make_card = make_card
+        self.card_w, self.card_h = card_size
+        self.cols = cols
+        self.gap = gap
+        self.overscan = overscan
+        self._cards = {}  # { catalog index: card } currently placed
+        self._spare = []  # Hidden cards ready for reuse
+        self._update_pending = False
+
+        self.SetScrollRate(0, 20)
+        self.reload()
+        self.Bind(wx.EVT_SIZE, self.on_size)
+        self.Bind(wx.EVT_SCROLLWIN, self.on_scroll)
+        self.Bind(wx.EVT_MOUSEWHEEL, self.on_scroll)
+
+    # --- Geometry ---
+
+    def row_pitch(self):
+        return self.card_h + self.gap
+
+    def row_count(self):
+        return (len(self.source) + self.cols - 1) // self.cols
+
+    def content_width(self):
+        return self.cols * (self.card_w + self.gap) + self.gap
+
+    def card_position(self, index):
+        """ Logical (unscrolled) top-left of a card; the grid is centred horizontally """
+        row, col = divmod(index, self.cols)
+        left = max(0, (self.GetClientSize().width - self.content_width()) // 2)
+        return left + self.gap + col * (self.card_w + self.gap), self.gap + row * self.row_pitch()
+
+    def visible_range(self):
+        """ Catalog indices [first, last) of the rows in view, with overscan """
+        _, top = self.CalcUnscrolledPosition(0, 0)
+        height = self.GetClientSize().height
+        first_row = max(0, top // self.row_pitch() - self.overscan)
+        last_row = min(self.row_count(), (top + height) // self.row_pitch() + 1 + self.overscan)
+        return first_row * self.cols, min(len(self.source), last_row * self.cols)
+
+    # --- Data ---
+
+    def reload(self):
+        """ Re-reads the catalog size and rebinds every visible card, e.g. after the catalog changed """
+        self.source.invalidate()
+        for card in self._cards.values():
+            card.Hide()
+            self._spare.append(card)
+        self._cards.clear()
+        self.SetVirtualSize(self.content_width(), self.gap + self.row_count() * self.row_pitch())
+        self.update_cards()
+
+    def set_source(self, source):
+        """ Shows another catalog, e.g. a search result, from the top """
+        self.source = source
+        self.Scroll(0, 0)
+        self.reload()
+
+    @timed("ui.catalog_render")
+    def update_cards(self):
+        self._update_pending = False
+        first, last = self.visible_range()
+        self.Freeze()
+        try:
+            for index in [i for i in self._cards if not first <= i < last]:
+                card = self._cards.pop(index)
+                card.Hide()
+                self._spare.append(card)
+            for index in range(first, last):
+                card = self._cards.get(index)
+                if card is None:
+                    movie = self.source.get(index)
+                    if movie is None:
+                        continue
+                    card = self._spare.pop() if self._spare else self.make_card(self)
+                    card.set_movie(movie)
+                    self._cards[index] = card
+                x, y = self.CalcScrolledPosition(*self.card_position(index))
+                card.SetSize(x, y, self.card_w, self.card_h)
+                card.Show()
+        finally:
+            self.Thaw()
+
+    def card_count(self):
+        """ Live card widgets (placed + spare) """
+        return len(self._cards) + len(self._spare)
+
+    # --- Events ---
+
+    def schedule_update(self):
+        if not self._update_pending:
+            self._update_pending = True
+            wx.CallAfter(self.update_cards)
+
+    def on_scroll(self, event):
+        event.Skip()  # Let the window scroll first, then fill in the rows that came into view
+        self.schedule_update()
+
+    def on_size(self, event):
+        event.Skip()
+        self.schedule_update()
@@ -0,0 +1,120 @@
+# --- SEAT CHANGE FEED ---
+# Publish/subscribe on top of BookingService notifications. Every hold,
+# release, expiry or booking bumps the show's version and is merged into the
+# pending delta of each subscriber of that show. A subscriber that falls behind
+# still holds at most one entry per changed seat, and receives everything
+# since its last poll as a single batch.
+
+import threading
+
+
+class SeatDelta:
+    """ Coalesced changes of one show: { seat_index: (state, session) } up to `version` """
+
+    __slots__ = ("show", "version", "changes")
+
+    def __init__(self, show, version, changes):
+        self.show = show
+        self.version = version
+        self.changes = changes
+
+    def __repr__(self):
+        return f"SeatDelta({self.show!r}, v{self.version}, {len(self.changes)} seats)"
+
+
+class Subscription:
+    def __init__(self, feed, notify=None):
+        """
+        `notify()` is called (from the publishing thread) whenever the
+        subscription goes from idle to having pending changes, e.g. to schedule
+        a wx.CallAfter; further changes are merged until the next poll().
+        """
+        self.feed = feed
+        self.notify = notify
+        self.shows = set()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._pending = {}  # { show: [version, {seat_index: (state, session)}] }
+
+    def _push(self, show, version, indices, state, session):
+        with self._lock:
+            was_idle = not self._pending
+            entry = self._pending.get(show)
+            if entry is None:
+                entry = self._pending[show] = [version, {}]
+            entry[0] = version
+            changes = entry[1]
+            for i in indices:
+                changes[i] = (state, session)
+            if was_idle:
+                self._ready.notify()
+        if was_idle and self.notify is not None:
+            self.notify()
+
+    def poll(self):
+        """ Returns and clears all pending deltas (an empty list if nothing changed) """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return [SeatDelta(show, version, changes) for show, (version, changes) in pending.items()]
+
+    def wait(self, timeout=None):
+        """ Blocks until there is something to poll (or the timeout passes), then polls """
+        with self._lock:
+            if not self._pending:
+                self._ready.wait(timeout)
+        return self.poll()
+
+    def subscribe(self, show):
+        self.feed._add(self, show)
+
+    def unsubscribe(self, show):
+        self.feed._remove(self, show)
+
+    def close(self):
+        for show in list(self.shows):
+            self.feed._remove(self, show)
+
+
+class ChangeFeed:
+    def __init__(self, service):
+        self._subscribers = {}  # { show: set(Subscription) }
+        self._versions = {}     # { show: int }
+        self._lock = threading.Lock()
+        service.add_observer(self._publish)
+
+    def version(self, show):
+        return self._versions.get(show, 0)
+
+    def subscription(self, notify=None):
+        return Subscription(self, notify)
+
+    def _add(self, subscription, show):
+        with self._lock:
+            # Copy-on-write so publishers can iterate without taking the feed lock
+            subscribers = set(self._subscribers.get(show, ()))
+            subscribers.add(subscription)
+            self._subscribers[show] = subscribers
+            subscription.shows.add(show)
+
+    def _remove(self, subscription, show):
+        with self._lock:
+            subscribers = set(self._subscribers.get(show, ()))
+            subscribers.discard(subscription)
+            if subscribers:
+                self._subscribers[show] = subscribers
+            else:
+                self._subscribers.pop(show, None)
+            subscription.shows.discard(show)
+
+    def forget(self, show):
+        """ Drops a show's version and subscribers, e.g. once it is archived """
+        with self._lock:
+            for subscription in self._subscribers.pop(show, ()):
+                subscription.shows.discard(show)
+            self._versions.pop(show, None)
+
+    def _publish(self, show, indices, state, session):
+        # Runs under the show's lock in BookingService, so versions are ordered per show
+        version = self._versions[show] = self._versions.get(show, 0) + 1
+        for subscription in self._subscribers.get(show, ()):
+            subscription._push(show, version, indices, state, session)
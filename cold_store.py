@@ -0,0 +1,233 @@
+# --- COLD STORE & COMPACTION ---
+# Finished shows leave hot memory. Compactor periodically takes the showings
+# that have finished (a prefix of the schedule), appends their final seat
+# state to the cold store as one zlib-compressed block, and only then drops
+# them from the schedule, the inventory, the booking service's holds and any
+# per-show index. It also plans the days that came into the horizon, so the
+# working set stays at roughly one horizon of showings however long the
+# process runs.
+#
+# Files in the archive directory:
+#   shows-<YYYY-MM>.z   blocks: <crc32 u32><length u32><zlib(records)>
+#                       record: movie id, day (ordinal), screen, time, seat bytes
+#   archived-until      schedule minute (see schedule.start_minute) up to which
+#                       every showing has been archived
+
+import datetime
+import logging
+import os
+import struct
+import threading
+import zlib
+
+from seat_inventory import BOOKED
+
+BLOCK_HEADER = struct.Struct("<II")
+ARCHIVED_SHOW = struct.Struct("<IIBBH")  # movie id, day ordinal, screen length, time length, seat count
+UNTIL = struct.Struct("<q")
+DEFAULT_INTERVAL = 300.0
+
+log = logging.getLogger(__name__)
+
+
+def encode_shows(shows):
+    """ shows: (movie_id, day, time_slot, screen, seat bytes) tuples """
+    parts = []
+    for movie_id, day, time_slot, screen, seats in shows:
+        screen_bytes, time_bytes = screen.encode(), time_slot.encode()
+        parts.append(ARCHIVED_SHOW.pack(movie_id, day.toordinal(), len(screen_bytes), len(time_bytes), len(seats))
+                     + screen_bytes + time_bytes + seats)
+    return b"".join(parts)
+
+
+def decode_shows(data):
+    offset = 0
+    while offset < len(data):
+        movie_id, ordinal, screen_len, time_len, count = ARCHIVED_SHOW.unpack_from(data, offset)
+        offset += ARCHIVED_SHOW.size
+        screen = data[offset:offset + screen_len].decode()
+        offset += screen_len
+        time_slot = data[offset:offset + time_len].decode()
+        offset += time_len
+        yield movie_id, datetime.date.fromordinal(ordinal), time_slot, screen, data[offset:offset + count]
+        offset += count
+
+
+def iter_blocks(data):
+    """ Yields the decompressed payload of each intact block, stopping at the first torn one """
+    offset = 0
+    while offset + BLOCK_HEADER.size <= len(data):
+        crc, length = BLOCK_HEADER.unpack_from(data, offset)
+        block = data[offset + BLOCK_HEADER.size:offset + BLOCK_HEADER.size + length]
+        if len(block) < length or zlib.crc32(block) != crc:
+            return
+        offset += BLOCK_HEADER.size + length
+        yield zlib.decompress(block)
+
+
+class ColdStore:
+    def __init__(self, directory=None, level=6):
+        """ Archives under `directory`, or in memory (still compressed) when it is None """
+        self.directory = directory
+        self.level = level
+        self._blocks = {}  # { "YYYY-MM": [block bytes] } when in memory
+        self._lock = threading.Lock()
+        self.until = -1
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            try:
+                with open(self._path("archived-until"), "rb") as f:
+                    (self.until,) = UNTIL.unpack(f.read(UNTIL.size))
+            except FileNotFoundError:
+                pass
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def months(self):
+        if self.directory is None:
+            return sorted(self._blocks)
+        return sorted(name[6:13] for name in os.listdir(self.directory)
+                      if name.startswith("shows-") and name.endswith(".z"))
+
+    def append(self, shows, until):
+        """
+        Archives (movie_id, day, time_slot, screen, seat bytes) tuples, one
+        compressed block per month, and records that every showing starting
+        at or before the schedule minute `until` is archived. Durable on return.
+        """
+        by_month = {}
+        for show in shows:
+            by_month.setdefault(show[1].strftime("%Y-%m"), []).append(show)
+        with self._lock:
+            for month, group in by_month.items():
+                block = zlib.compress(encode_shows(group), self.level)
+                framed = BLOCK_HEADER.pack(zlib.crc32(block), len(block)) + block
+                if self.directory is None:
+                    self._blocks.setdefault(month, []).append(framed)
+                    continue
+                with open(self._path(f"shows-{month}.z"), "ab") as f:
+                    end = f.tell()
+                    try:
+                        f.write(framed)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    except OSError:
+                        f.truncate(end)  # A torn block would hide every block appended after it
+                        raise
+            self.until = max(self.until, until)
+            if self.directory is not None:
+                path = self._path("archived-until")
+                with open(path + ".tmp", "wb") as f:
+                    f.write(UNTIL.pack(self.until))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(path + ".tmp", path)
+
+    def iter_shows(self, month=None):
+        """ Yields archived (movie_id, day, time_slot, screen, seat bytes), by month then archive order """
+        for m in ([month] if month is not None else self.months()):
+            if self.directory is None:
+                data = b"".join(self._blocks.get(m, ()))
+            else:
+                try:
+                    with open(self._path(f"shows-{m}.z"), "rb") as f:
+                        data = f.read()
+                except FileNotFoundError:
+                    continue
+            for payload in iter_blocks(data):
+                yield from decode_shows(payload)
+
+    def final_shows(self):
+        """ Like iter_shows(), but a showing archived twice yields only its last copy """
+        for month in self.months():
+            latest = {}
+            for archived in self.iter_shows(month):
+                latest[archived[:3]] = archived
+            yield from latest.values()
+
+    def get(self, movie_id, day, time_slot):
+        """ Final seat bytes of an archived showing, or None """
+        found = None
+        for archived in self.iter_shows(day.strftime("%Y-%m")):
+            if archived[0] == movie_id and archived[1] == day and archived[2] == time_slot:
+                found = archived[4]  # A show archived twice (crash before a snapshot): the last copy wins
+        return found
+
+
+class Compactor:
+    """
+    Moves finished showings from `schedule`, `inventory` and `service` into
+    `cold`. `forget(show)` callbacks drop a show from other per-show indexes;
+    `prune(keys)` (e.g. SqliteStore.prune) deletes the archived showings'
+    (movie_id, time) keys from a store; `plan()` schedules the days entering
+    the horizon.
+    """
+
+    def __init__(self, schedule, inventory, service, cold, forget=(), plan=None, interval=DEFAULT_INTERVAL,
+                 prune=None):
+        self.schedule = schedule
+        self.inventory = inventory
+        self.service = service
+        self.cold = cold
+        self.forget = list(forget)
+        self.prune = prune
+        self.plan = plan
+        self.interval = interval
+        self.archived = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()  # One compaction at a time
+
+    def compact(self, now=None):
+        """ Archives and drops every finished showing; returns how many showings were dropped """
+        with self._lock:
+            # Finished showings are no longer handed out (Schedule.showing), so their state is final
+            finished = [self.schedule[i] for i in self.schedule.finished(now)]
+            records, until = [], self.cold.until
+            for s in finished:
+                until = max(until, s.start)
+                with self.service.lock_for(s.id):
+                    # Commits already under way land first; later ones fail, so this state is final
+                    self.service.close(s.id)
+                    seats = self.inventory.stored(s.id)
+                if seats is not None and BOOKED in seats:
+                    records.append((s.movie_id, s.day, s.time_slot, s.screen, seats))
+            if finished:
+                # Durable in the cold store before the hot copies go
+                self.cold.append(records, until)
+                self.schedule.archived_until = self.cold.until
+                self.schedule.drop([s.id for s in finished])
+            for s in finished:
+                with self.service.lock_for(s.id):
+                    self.inventory.forget(s.id)
+                    self.service.forget(s.id)
+                for callback in self.forget:
+                    try:
+                        callback(s.id)
+                    except Exception:  # The show is gone from the schedule; the other indexes still drop it
+                        log.exception("forget callback %r failed for show %r", callback, s.id)
+            self.archived += len(records)
+            if finished and self.prune is not None:
+                self.prune([s.key for s in finished])  # In the cold store now; a failure here leaves only dead rows
+            if self.plan is not None:
+                self.plan()
+            return len(finished)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.compact()
+            except Exception:  # E.g. a full disk: keep the thread alive and retry next interval
+                log.exception("show compaction failed")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="show-compactor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,276 @@
+"""
+Asyncio HTTP front end for booking_core. Runs headless (no wx, no display).
+
+    python http_api.py --port 8080
+
+    GET  /movies
+    GET  /search?q=incep&genre=sci-fi&after=05:00%20PM&before=11:00%20PM&seats=4&limit=50
+    GET  /shows?after=2026-10-18%2005:00%20PM&movie=<id>&limit=50   (upcoming showings, soonest first)
+    GET  /movies/<id>/seats?time=09:00%20AM&session=<id>
+    POST /movies/<id>/holds       {"session": ..., "time": ..., "seats": [[row, col], ...]}
+    POST /movies/<id>/best        {"session": ..., "time": ..., "count": 4}  (holds the best adjacent seats)
+    POST /movies/<id>/release     {"session": ..., "time": ..., "seats": [[row, col], ...]}  (seats optional)
+    POST /movies/<id>/quote       {"time": ..., "seats": [[row, col], ...], "promo": "FLAT50"}  (promo optional)
+    POST /movies/<id>/bookings    {"session": ..., "time": ..., "seats": [...], "promo": ...,
+                                   "card": {"number": ..., "expiry": ..., "cvv": ...}}
+                                  (optional Idempotency-Key header makes payment retries safe)
+
+A "time" is "2026-10-18 09:00 AM" for that day's showing, or a bare
+"09:00 AM" for the next showing at that time that has not finished.
+"""
+import argparse
+import asyncio
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import booking_core
+import instrumentation
+from booking_core import PaymentDetailsError, UnknownShowError
+from booking_service import BookingError, SeatUnavailableError
+from instrumentation import timed
+from payments import GatewayUnavailableError, PaymentDeclinedError
+
+MAX_BODY = 64 * 1024
+
+REASONS = {200: "OK", 400: "Bad Request", 402: "Payment Required", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+           500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        self.status = status
+        super().__init__(message)
+
+
+# --- Routes ---
+
+def _coords(body):
+    try:
+        return [(int(r), int(c)) for r, c in body.get("seats", [])]
+    except (TypeError, ValueError):
+        raise HttpError(400, "seats must be a list of [row, col] pairs")
+
+
+def _required(body, key):
+    value = body.get(key)
+    if not value:
+        raise HttpError(400, f"missing '{key}'")
+    return value
+
+
+def list_movies(movie_id, query, body, headers):
+    return {"movies": booking_core.list_movies()}
+
+
+def search(movie_id, query, body, headers):
+    arg = lambda name: query.get(name, [None])[0]
+    try:
+        min_adjacent = int(arg("seats") or 0)
+        limit = int(arg("limit")) if arg("limit") else None
+        shows = booking_core.search_shows(arg("q"), arg("genre"), arg("after"), arg("before"), min_adjacent, limit)
+    except ValueError as e:
+        raise HttpError(400, str(e))
+    return {"shows": shows}
+
+
+def upcoming(movie_id, query, body, headers):
+    arg = lambda name: query.get(name, [None])[0]
+    try:
+        limit = int(arg("limit") or 50)
+        movie = int(arg("movie")) if arg("movie") else None
+        shows = booking_core.upcoming_shows(arg("after"), limit, movie)
+    except ValueError as e:
+        raise HttpError(400, str(e))
+    return {"shows": shows}
+
+
+def get_seats(movie_id, query, body, headers):
+    time_slot = query.get("time", [None])[0]
+    if time_slot is None:
+        raise HttpError(400, "missing 'time' query parameter")
+    return booking_core.seat_map(movie_id, time_slot, session=query.get("session", [None])[0])
+
+
+def hold(movie_id, query, body, headers):
+    coords = _coords(body)
+    expires_at = booking_core.hold_seats(_required(body, "session"), movie_id, _required(body, "time"), coords)
+    return {"held": len(coords), "expires_in": round(expires_at - booking_core.BOOKING_SERVICE.clock(), 1)}
+
+
+def best(movie_id, query, body, headers):
+    try:
+        count = int(body.get("count", 0))
+    except (TypeError, ValueError):
+        raise HttpError(400, "count must be an integer")
+    if count <= 0:
+        raise HttpError(400, "count must be positive")
+    coords = booking_core.hold_best_seats(_required(body, "session"), movie_id, _required(body, "time"), count)
+    if coords is None:
+        return {"seats": [], "labels": []}
+    return {"seats": [list(c) for c in coords], "labels": [booking_core.seat_label(movie_id, c) for c in coords]}
+
+
+def release(movie_id, query, body, headers):
+    coords = _coords(body) if "seats" in body else None
+    booking_core.release_seats(_required(body, "session"), movie_id, _required(body, "time"), coords)
+    return {"released": True}
+
+
+def quote(movie_id, query, body, headers):
+    return booking_core.price_breakdown(movie_id, _required(body, "time"), _coords(body), body.get("promo") or None)
+
+
+async def book(movie_id, query, body, headers):
+    coords = _coords(body)
+    if not coords:
+        raise HttpError(400, "no seats selected")
+    return await booking_core.pay_and_confirm(_required(body, "session"), movie_id, _required(body, "time"),
+                                              coords, body.get("card") or {}, headers.get("idempotency-key"),
+                                              body.get("promo") or None)
+
+
+ROUTES = {
+    ("GET", "movies"): list_movies,
+    ("GET", "search"): search,
+    ("GET", "shows"): upcoming,
+    ("GET", "seats"): get_seats,
+    ("POST", "holds"): hold,
+    ("POST", "best"): best,
+    ("POST", "release"): release,
+    ("POST", "quote"): quote,
+    ("POST", "bookings"): book,
+}
+
+
+@timed("http.request")
+async def dispatch(method, target, headers, raw_body):
+    """ Returns (status, payload) for one request """
+    url = urlsplit(target)
+    parts = [p for p in url.path.split("/") if p]
+    movie_id = None
+    if parts in (["movies"], ["search"], ["shows"]):
+        action = parts[0]
+    elif len(parts) == 3 and parts[0] == "movies" and parts[1].isdigit():
+        movie_id, action = int(parts[1]), parts[2]
+    else:
+        return 404, {"error": "not found"}
+
+    handler = ROUTES.get((method, action))
+    if handler is None:
+        return 405 if any(a == action for _, a in ROUTES) else 404, {"error": f"{method} {url.path}"}
+
+    try:
+        body = json.loads(raw_body) if raw_body else {}
+        if not isinstance(body, dict):
+            raise HttpError(400, "body must be a JSON object")
+        result = handler(movie_id, parse_qs(url.query), body, headers)
+        if asyncio.iscoroutine(result):
+            result = await result
+        return 200, result
+    except json.JSONDecodeError:
+        return 400, {"error": "invalid JSON"}
+    except HttpError as e:
+        return e.status, {"error": str(e)}
+    except UnknownShowError as e:
+        return 404, {"error": str(e)}
+    except SeatUnavailableError as e:
+        return 409, {"error": "seats unavailable", "seats": [booking_core.seat_label(movie_id, c) for c in e.seats]}
+    except PaymentDeclinedError as e:
+        return 402, {"error": str(e)}
+    except GatewayUnavailableError as e:
+        return 503, {"error": str(e)}
+    except (PaymentDetailsError, BookingError) as e:
+        return 400, {"error": str(e)}
+
+
+# --- HTTP/1.1 plumbing ---
+
+async def read_request(reader):
+    """ Returns (method, target, headers, body) or None when the client closed the connection """
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HttpError(400, "invalid Content-Length")
+    if length < 0:
+        raise HttpError(400, "invalid Content-Length")
+    if length > MAX_BODY:
+        raise HttpError(413, "request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, target, headers, body
+
+
+def encode_response(status, payload, keep_alive):
+    body = json.dumps(payload).encode()
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+async def handle_connection(reader, writer):
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+            except HttpError as e:
+                writer.write(encode_response(e.status, {"error": str(e)}, keep_alive=False))
+                break
+            if request is None:
+                break
+            method, target, headers, body = request
+            keep_alive = headers.get("connection", "").lower() != "close"
+            try:
+                status, payload = await dispatch(method, target, headers, body)
+            except Exception as e:  # Never take the server down for one bad request
+                status, payload = 500, {"error": repr(e)}
+            writer.write(encode_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host="127.0.0.1", port=8080):
+    server = await asyncio.start_server(handle_connection, host, port, backlog=4096)
+    if instrumentation.ENABLED:
+        instrumentation.LoopLagMonitor(asyncio.get_running_loop().call_later, "http.loop_lag").start()
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BookMyShow HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--data-dir", help="persist bookings to this directory (write-ahead log)")
+    parser.add_argument("--sqlite", help="use this SQLite database for the catalog and bookings")
+    args = parser.parse_args()
+    if args.sqlite:
+        booking_core.enable_sqlite(args.sqlite)
+    elif args.data_dir:
+        booking_core.enable_persistence(args.data_dir)
+    booking_core.COMPACTOR.start()
+    instrumentation.configure_from_env()  # BMS_METRICS* / BMS_PROFILE, see instrumentation.py
+    print(f"Serving on http://{args.host}:{args.port}")
+    asyncio.run(serve(args.host, args.port))
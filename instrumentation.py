@@ -0,0 +1,415 @@
+# --- INSTRUMENTATION ---
+# Timers and counters around the hot paths of the UI and the booking flow, an
+# event-loop lag monitor, a sampling profiler and exporters (Prometheus text /
+# JSON, to a file or a local HTTP endpoint). Headless; wx is only imported by
+# monitor_wx_loop().
+#
+# Functions are marked with @timed("name") where they are defined. While
+# instrumentation is disabled (the default) the decorator returns the function
+# itself, so nothing runs on the hot path. enable() swaps every marked
+# function for a timing wrapper in its module / class and disable() puts the
+# originals back. Event handlers bound before enable() keep the unwrapped
+# method, so enable it at startup (configure_from_env) rather than mid-run.
+#
+# The wrappers only append a duration to a deque (atomic, no lock); the
+# deques are folded into histograms when they grow large or on export.
+#
+#   BMS_METRICS=1                  collect timers and counters
+#   BMS_METRICS_FILE=metrics.prom  rewrite this file every few seconds (.json for JSON)
+#   BMS_METRICS_PORT=9464          serve /metrics (Prometheus) and /metrics.json on 127.0.0.1
+#   BMS_PROFILE=stacks.txt         sample the main thread; collapsed stacks written at exit
+
+import atexit
+import bisect
+import collections
+import functools
+import http.server
+import inspect
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+
+ENABLED = False
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+DRAIN_AT = 4096  # Pending samples that trigger folding them into the histogram
+
+_MARKED = []     # (function, timer) for every @timed function
+_PATCHED = []    # (owner, attribute, original) while enabled
+_LOCK = threading.Lock()
+
+
+class Timer:
+    """ Latency histogram of one operation, plus how often it raised """
+
+    def __init__(self, name, help=""):
+        self.name = name
+        self.help = help
+        self.pending = collections.deque()
+        self.failures = collections.deque()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self._drain_lock = threading.Lock()
+
+    def record(self, seconds):
+        self.pending.append(seconds)
+        if len(self.pending) > DRAIN_AT:
+            self.drain()
+
+    def drain(self):
+        """ Folds pending samples into the histogram; safe against concurrent record() calls """
+        with self._drain_lock:
+            pending, buckets = self.pending, self.buckets
+            while pending:
+                seconds = pending.popleft()
+                self.count += 1
+                self.total += seconds
+                if seconds > self.max:
+                    self.max = seconds
+                buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+            while self.failures:
+                self.errors += self.failures.popleft()
+
+    def snapshot(self):
+        self.drain()
+        return {"count": self.count, "sum": self.total, "max": self.max, "errors": self.errors,
+                "mean": self.total / self.count if self.count else 0.0,
+                "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], itertools.accumulate(self.buckets)))}
+
+
+class Counter:
+    def __init__(self, name, help=""):
+        self.name = name
+        self.help = help
+        self.pending = collections.deque()
+        self.value = 0
+        self._drain_lock = threading.Lock()
+
+    def inc(self, n=1):
+        self.pending.append(n)
+        if len(self.pending) > DRAIN_AT:
+            self.drain()
+
+    def drain(self):
+        with self._drain_lock:
+            pending = self.pending
+            while pending:
+                self.value += pending.popleft()
+
+    def snapshot(self):
+        self.drain()
+        return {"value": self.value}
+
+
+TIMERS = {}
+COUNTERS = {}
+
+
+def timer(name, help=""):
+    t = TIMERS.get(name)
+    if t is None:
+        t = TIMERS.setdefault(name, Timer(name, help))
+    return t
+
+
+def counter(name, help=""):
+    c = COUNTERS.get(name)
+    if c is None:
+        c = COUNTERS.setdefault(name, Counter(name, help))
+    return c
+
+
+def count(name, n=1):
+    """ Adds to a counter; call sites guard it with `if instrumentation.ENABLED` """
+    counter(name).inc(n)
+
+
+# --- Timing wrappers ---
+
+def _wrap(fn, t):
+    record, failures, clock = t.record, t.failures, time.perf_counter
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return await fn(*args, **kwargs)
+            except BaseException:
+                failures.append(1)
+                raise
+            finally:
+                record(clock() - start)
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return fn(*args, **kwargs)
+            except BaseException:
+                failures.append(1)
+                raise
+            finally:
+                record(clock() - start)
+    wrapper.__instrumented__ = fn
+    return wrapper
+
+
+def timed(name, help=""):
+    """ Marks a function or method to be timed as `name` while instrumentation is enabled """
+    def decorate(fn):
+        t = timer(name, help)
+        _MARKED.append((fn, t))
+        return _wrap(fn, t) if ENABLED else fn
+    return decorate
+
+
+def _owner(fn):
+    """ (module or class, attribute) through which callers reach a module-level function or method """
+    owner = sys.modules.get(fn.__module__)
+    *path, attribute = fn.__qualname__.split(".")
+    for part in path:
+        owner = getattr(owner, part, None)
+    return owner, attribute
+
+
+def enable():
+    """ Swaps every @timed function for its timing wrapper """
+    global ENABLED
+    with _LOCK:
+        if ENABLED:
+            return
+        ENABLED = True
+        for fn, t in _MARKED:
+            owner, attribute = _owner(fn)
+            if owner is None or owner.__dict__.get(attribute) is not fn:
+                continue  # Defined while enabled (already wrapped), or not reachable by name
+            setattr(owner, attribute, _wrap(fn, t))
+            _PATCHED.append((owner, attribute, fn))
+
+
+def disable():
+    """ Puts the original functions back; collected numbers are kept """
+    global ENABLED
+    with _LOCK:
+        ENABLED = False
+        for owner, attribute, fn in _PATCHED:
+            setattr(owner, attribute, fn)
+        _PATCHED.clear()
+
+
+def reset():
+    for t in TIMERS.values():
+        t.drain()
+        t.count, t.total, t.max, t.errors = 0, 0.0, 0.0, 0
+        t.buckets = [0] * (len(BUCKETS) + 1)
+    for c in COUNTERS.values():
+        c.drain()
+        c.value = 0
+
+
+# --- Event loop lag ---
+
+class LoopLagMonitor:
+    """
+    Asks the event loop to call back every `interval` seconds and records how
+    late each call arrives, i.e. how long the loop was busy with other work.
+    `schedule(delay, fn)` is the loop's call-later (asyncio's loop.call_later,
+    or see monitor_wx_loop).
+    """
+
+    def __init__(self, schedule, name="ui.loop_lag", interval=0.1):
+        self.schedule = schedule
+        self.interval = interval
+        self.timer = timer(name, "Delay of event loop callbacks beyond their due time")
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self._due = time.perf_counter() + self.interval
+        self.schedule(self.interval, self._tick)
+        return self
+
+    def stop(self):
+        self.running = False
+
+    def _tick(self):
+        if not self.running:
+            return
+        now = time.perf_counter()
+        self.timer.record(max(0.0, now - self._due))
+        self._due = now + self.interval
+        self.schedule(self.interval, self._tick)
+
+
+def monitor_wx_loop(interval=0.1):
+    """ Lag monitor for the wx main loop; call after the wx.App exists """
+    import wx
+    return LoopLagMonitor(lambda delay, fn: wx.CallLater(int(delay * 1000), fn), interval=interval).start()
+
+
+# --- Sampling profiler ---
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread (default: the calling one) every
+    `interval` seconds from a background thread and counts identical stacks.
+    collapsed() returns them in the "a;b;c count" format flame graph tools read.
+    """
+
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break  # Thread ended
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            self.stacks[tuple(codes)] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        lines = []
+        for codes, n in self.stacks.most_common():
+            names = ";".join(f"{os.path.basename(c.co_filename)}:{c.co_name}" for c in reversed(codes))
+            lines.append(f"{names} {n}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+
+
+# --- Export ---
+
+def snapshot():
+    """ Every timer and counter as plain data """
+    return {"time": time.time(),
+            "timers": {name: t.snapshot() for name, t in sorted(TIMERS.items())},
+            "counters": {name: c.snapshot()["value"] for name, c in sorted(COUNTERS.items())}}
+
+
+def _metric_name(name):
+    return "bms_" + "".join(ch if ch.isalnum() else "_" for ch in name)
+
+
+def prometheus_text():
+    lines = []
+    for name, t in sorted(TIMERS.items()):
+        s, metric = t.snapshot(), _metric_name(name) + "_seconds"
+        if not s["count"]:
+            continue
+        lines.append(f"# HELP {metric} {t.help or name}")
+        lines.append(f"# TYPE {metric} histogram")
+        lines.extend(f'{metric}_bucket{{le="{le}"}} {n}' for le, n in s["buckets"].items())
+        lines.append(f"{metric}_sum {s['sum']:.9f}")
+        lines.append(f"{metric}_count {s['count']}")
+        if s["errors"]:
+            lines.append(f"# TYPE {_metric_name(name)}_errors_total counter")
+            lines.append(f"{_metric_name(name)}_errors_total {s['errors']}")
+    for name, c in sorted(COUNTERS.items()):
+        metric = _metric_name(name) + "_total"
+        lines.append(f"# HELP {metric} {c.help or name}")
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {c.snapshot()['value']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path):
+    """ Atomically replaces `path` with the current numbers (JSON for .json, else Prometheus text) """
+    text = json.dumps(snapshot(), indent=1) if path.endswith(".json") else prometheus_text()
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+class FileExporter:
+    """ Rewrites a metrics file every `interval` seconds, and once more on stop() """
+
+    def __init__(self, path, interval=5.0):
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            write_metrics(self.path)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        write_metrics(self.path)
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, kind = prometheus_text().encode(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, kind = json.dumps(snapshot()).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", kind)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    """ Serves /metrics and /metrics.json from a daemon thread; returns the server (shutdown() stops it) """
+    server = http.server.ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def configure_from_env(environ=os.environ):
+    """ Enables what the BMS_METRICS* / BMS_PROFILE variables ask for; returns True if metrics are on """
+    if environ.get("BMS_PROFILE"):
+        profiler = SamplingProfiler().start()
+        atexit.register(lambda: (profiler.stop(), profiler.write(environ["BMS_PROFILE"])))
+    if not (environ.get("BMS_METRICS") or environ.get("BMS_METRICS_FILE") or environ.get("BMS_METRICS_PORT")):
+        return False
+    enable()
+    if environ.get("BMS_METRICS_FILE"):
+        atexit.register(FileExporter(environ["BMS_METRICS_FILE"]).start().stop)
+    if environ.get("BMS_METRICS_PORT"):
+        serve_metrics(int(environ["BMS_METRICS_PORT"]))
+    return True
@@ -0,0 +1,146 @@
+# --- AUDITORIUM LAYOUTS ---
+# Screens are described in small text files (layouts/<name>.layout) and
+# compiled once into flat per-seat lookup tables (label, class, price), so
+# rendering, pricing and availability never redo string work per seat.
+#
+# File format:
+#
+#   # comment
+#   [classes]
+#   R recliner 200        <code> <name> <surcharge over the movie's base price>
+#   S standard 0
+#   [rows]
+#   A: RRRR..RRRR         <row name>: one character per column, a class code
+#   B:  SSS..SSS            for a seat, "." or " " for an aisle / gap
+#
+# Rows may have different lengths; the hall is as wide as the longest row.
+# Seats are numbered from 1 within each row, skipping gaps.
+
+import os
+
+from seat_inventory import BLOCKED, FREE
+
+LAYOUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "layouts")
+GAP = 0xFF  # Category of a cell without a seat
+GAP_CHARS = ". "
+
+
+class LayoutError(ValueError):
+    pass
+
+
+class ScreenLayout:
+    def __init__(self, name, row_names, cells, classes):
+        """ `cells` is a list of strings (one per row), `classes` a list of (code, name, surcharge) """
+        self.name = name
+        self.rows = len(cells)
+        self.cols = max((len(row) for row in cells), default=0)
+        self.row_names = row_names
+        self.class_names = [name for _, name, _ in classes]
+        self.surcharges = [surcharge for _, _, surcharge in classes]
+        codes = {code: i for i, (code, _, _) in enumerate(classes)}
+
+        size = self.rows * self.cols
+        self.categories = bytearray([GAP]) * size
+        self.labels = [None] * size
+        for r, row in enumerate(cells):
+            number = 0
+            for c, ch in enumerate(row):
+                if ch in GAP_CHARS:
+                    continue
+                if ch not in codes:
+                    raise LayoutError(f"{name}: unknown seat class '{ch}' in row {row_names[r]}")
+                number += 1
+                i = r * self.cols + c
+                self.categories[i] = codes[ch]
+                self.labels[i] = f"{row_names[r]}{number}"
+
+        # Initial seat state for a new show: gaps can never be booked
+        self.template = bytes(FREE if cat != GAP else BLOCKED for cat in self.categories)
+        self.seat_count = size - self.categories.count(GAP)
+        self._price_tables = {}
+        self._label_index = None
+
+    def index(self, coord):
+        r, c = coord
+        return r * self.cols + c
+
+    def coord(self, index):
+        return divmod(index, self.cols)
+
+    def label(self, coord):
+        return self.labels[self.index(coord)]
+
+    def label_indices(self):
+        """ { printed seat name: cell index }, built on first use """
+        if self._label_index is None:
+            self._label_index = {name: i for i, name in enumerate(self.labels) if name is not None}
+        return self._label_index
+
+    def label_index(self, label):
+        """ Cell index of a printed seat name ("C7", "c7 "), or None if the layout has no such seat """
+        return self.label_indices().get(label.strip().upper())
+
+    def is_seat(self, coord):
+        r, c = coord
+        return 0 <= r < self.rows and 0 <= c < self.cols and self.categories[r * self.cols + c] != GAP
+
+    def price_table(self, base_price):
+        """ Price of every cell for a movie's base price (0 for gaps), built once per base price """
+        table = self._price_tables.get(base_price)
+        if table is None:
+            by_class = [base_price + s for s in self.surcharges]
+            table = self._price_tables[base_price] = tuple(
+                by_class[cat] if cat != GAP else 0.0 for cat in self.categories)
+        return table
+
+    def price(self, base_price, coords):
+        table = self.price_table(base_price)
+        cols = self.cols
+        return sum(table[r * cols + c] for r, c in coords)
+
+
+def parse_layout(text, name="layout"):
+    classes, row_names, cells = [], [], []
+    section = None
+    for line_no, raw in enumerate(text.splitlines(), 1):
+        line = raw.rstrip()
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        if line.strip() in ("[classes]", "[rows]"):
+            section = line.strip()
+            continue
+        if section == "[classes]":
+            parts = line.split()
+            if len(parts) != 3 or len(parts[0]) != 1 or parts[0] in GAP_CHARS:
+                raise LayoutError(f"{name}:{line_no}: expected '<code> <name> <surcharge>'")
+            classes.append((parts[0], parts[1], float(parts[2])))
+        elif section == "[rows]":
+            row_name, sep, seats = line.partition(":")
+            if not sep or not row_name.strip():
+                raise LayoutError(f"{name}:{line_no}: expected '<row>: <seats>'")
+            row_names.append(row_name.strip())
+            cells.append(seats[1:] if seats.startswith(" ") else seats)
+        else:
+            raise LayoutError(f"{name}:{line_no}: content outside [classes] / [rows]")
+    if not classes or not cells:
+        raise LayoutError(f"{name}: a layout needs a [classes] and a [rows] section")
+    return ScreenLayout(name, row_names, cells, classes)
+
+
+_LAYOUTS = {}
+
+
+def load_layout(name):
+    """ Compiled layout for layouts/<name>.layout, parsed once per process """
+    layout = _LAYOUTS.get(name)
+    if layout is None:
+        with open(os.path.join(LAYOUT_DIR, f"{name}.layout"), encoding="utf-8") as f:
+            layout = _LAYOUTS[name] = parse_layout(f.read(), name)
+    return layout
+
+
+def register_layout(layout):
+    """ Makes a layout built at runtime (parse_layout) loadable by name, e.g. synthetic halls """
+    _LAYOUTS[layout.name] = layout
+    return layout
@@ -1,6 +1,21 @@
 import wx
 import wx.grid
+import os
 import time
+import uuid
+
+import booking_core
+import instrumentation
+from booking_core import PaymentDetailsError, UnknownShowError
+from booking_service import BookingError, SeatUnavailableError
+from catalog_view import CatalogView, wrap_cache
+from instrumentation import timed
+from payments import BackgroundLoop, PaymentError
+from pricing import PricingError
+from resources import LruPool, colour, font
+from schedule import split_time
+from seat_inventory import FREE
+from seat_map import AVAILABLE, EVT_SEAT_TOGGLED, SELECTED, SOLD, SeatMapCanvas
 
 # --- PRESENTATION THEME CONFIGURATION ---
 THEME = {
@@ -12,56 +27,8 @@ THEME = {
     "seat_available": "#FFFFFF",
     "seat_selected": "#FFD700",  # Gold for better visibility
     "seat_booked": "#333333",  # Dark grey for unavailable
-    "screen_color": "#555555"  # Screen visual color
-}
-
-# --- MOCK DATA ---
-MOVIES = [
-    {
-        "id": 1,
-        "title": "Avengers: Endgame",
-        "genre": "Action/Sci-Fi",
-        "price": 350.00,
-        "timings": ["09:00 AM", "01:00 PM", "05:00 PM"],
-        "description": "The Avengers take a final stand against Thanos, culminating in an epic battle for the fate of the universe."
-    },
-    {
-        "id": 2,
-        "title": "The Lion King",
-        "genre": "Animation/Drama",
-        "price": 250.00,
-        "timings": ["10:30 AM", "02:00 PM", "06:00 PM"],
-        "description": "Simba idolizes his father, King Mufasa, and takes to heart his own royal destiny, facing betrayal and destiny."
-    },
-    {
-        "id": 3,
-        "title": "Inception",
-        "genre": "Sci-Fi/Thriller",
-        "price": 300.00,
-        "timings": ["11:00 AM", "03:30 PM", "08:00 PM"],
-        "description": "A thief who steals corporate secrets through dream-sharing technology must plant an idea in a target's mind."
-    },
-    {
-        "id": 4,
-        "title": "Titanic",
-        "genre": "Romance/Drama",
-        "price": 200.00,
-        "timings": ["12:00 PM", "04:00 PM"],
-        "description": "A seventeen-year-old aristocrat falls in love with a kind but poor artist aboard the ill-fated RMS Titanic."
-    }
-]
-
-# --- UPDATED DATABASE STRUCTURE ---
-# Structure: { MovieID: { "Time String": [(row, col), (row, col)] } }
-BOOKED_SEATS_DB = {
-    1: {
-        "09:00 AM": [(0, 1), (0, 2)],
-        "01:00 PM": [],
-        "05:00 PM": [(2, 2), (2, 3), (2, 4)]
-    },
-    2: {"10:30 AM": [], "02:00 PM": [], "06:00 PM": []},
-    3: {"11:00 AM": [(1, 1)], "03:30 PM": [], "08:00 PM": []},
-    4: {"12:00 PM": [], "04:00 PM": []}
+    "screen_color": "#555555",  # Screen visual color
+    "seat_classes": ["#555555", "#4FC3F7", "#E50914"]  # Seat outline per layout class (standard, premium, ...)
 }
 
 # Prevent mac native metal dark-mode override (best-effort)
@@ -71,32 +38,43 @@ except Exception:
     pass
 
 
+# Payments run on this loop so the wx main loop never blocks on the gateway
+PAYMENT_LOOP = BackgroundLoop()
+
+# Seat selection dialogs of the most recently booked movies are hidden and reused rather than
+# rebuilt; older ones are destroyed, so at most this many exist
+SEAT_DIALOG_POOL_SIZE = 4
+SEAT_DIALOGS = LruPool(SEAT_DIALOG_POOL_SIZE, dispose=lambda dlg: dlg.dispose())
+
+
 # --- PAYMENT DIALOG ---
 class PaymentDialog(wx.Dialog):
     def __init__(self, parent, total_amount):
         super().__init__(parent, title="Complete Payment", size=(450, 400))
         self.total_amount = total_amount
         self.payment_successful = False
-        self.SetBackgroundColour(THEME["bg_main"])
+        self.charge_id = None
+        self.idempotency_key = uuid.uuid4().hex  # Re-clicking PAY never charges twice
+        self.SetBackgroundColour(colour(THEME["bg_main"]))
         self.init_ui()
         self.Centre()
 
     def init_ui(self):
         panel = wx.Panel(self)
-        panel.SetBackgroundColour(THEME["bg_card"])
+        panel.SetBackgroundColour(colour(THEME["bg_card"]))
         vbox = wx.BoxSizer(wx.VERTICAL)
 
         lbl_header = wx.StaticText(panel, label=f"Total Due: ₹{self.total_amount:.2f}")
-        lbl_header.SetFont(wx.Font(16, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD))
-        lbl_header.SetForegroundColour(THEME["accent"])
+        lbl_header.SetFont(font(16, wx.FONTWEIGHT_BOLD))
+        lbl_header.SetForegroundColour(colour(THEME["accent"]))
         vbox.Add(lbl_header, 0, wx.ALL | wx.CENTER, 20)
 
         form_sizer = wx.FlexGridSizer(rows=3, cols=2, vgap=15, hgap=10)
 
         def create_label(text):
             l = wx.StaticText(panel, label=text)
-            l.SetForegroundColour(THEME["text_white"])
-            l.SetFont(wx.Font(11, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD))
+            l.SetForegroundColour(colour(THEME["text_white"]))
+            l.SetFont(font(11, wx.FONTWEIGHT_BOLD))
             return l
 
         form_sizer.Add(create_label("Card Number:"), 0, wx.ALIGN_CENTER_VERTICAL | wx.ALIGN_RIGHT)
@@ -114,108 +92,110 @@ class PaymentDialog(wx.Dialog):
         vbox.Add(form_sizer, 0, wx.ALL | wx.CENTER, 20)
 
         self.btn_pay = wx.Button(panel, label=f"PAY ₹{self.total_amount:.2f}")
-        self.btn_pay.SetBackgroundColour(THEME["accent"])
-        self.btn_pay.SetForegroundColour(THEME["text_white"])
-        self.btn_pay.SetFont(wx.Font(12, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD))
+        self.btn_pay.SetBackgroundColour(colour(THEME["accent"]))
+        self.btn_pay.SetForegroundColour(colour(THEME["text_white"]))
+        self.btn_pay.SetFont(font(12, wx.FONTWEIGHT_BOLD))
         self.btn_pay.Bind(wx.EVT_BUTTON, self.on_pay)
         vbox.Add(self.btn_pay, 0, wx.ALL | wx.EXPAND, 30)
 
         self.gauge = wx.Gauge(panel, range=100, size=(250, 10))
         vbox.Add(self.gauge, 0, wx.ALL | wx.EXPAND, 30)
 
-        btn_cancel = wx.Button(panel, wx.ID_CANCEL, "Cancel Transaction")
-        vbox.Add(btn_cancel, 0, wx.ALL | wx.CENTER, 5)
+        self.btn_cancel = wx.Button(panel, wx.ID_CANCEL, "Cancel Transaction")
+        vbox.Add(self.btn_cancel, 0, wx.ALL | wx.CENTER, 5)
 
         panel.SetSizer(vbox)
 
     def on_pay(self, event):
-        if len(self.txt_card.GetValue()) < 16 or len(self.txt_cvv.GetValue()) < 3:
-            wx.MessageBox("Please enter valid mock card details.", "Validation Error", wx.OK | wx.ICON_ERROR)
+        try:
+            booking_core.validate_card(self.txt_card.GetValue(), self.txt_expiry.GetValue(),
+                                       self.txt_cvv.GetValue())
+        except PaymentDetailsError as e:
+            wx.MessageBox(str(e), "Validation Error", wx.OK | wx.ICON_ERROR)
             return
 
         self.btn_pay.Disable()
-        self.btn_pay.SetLabel("Processing Payment...")
+        self.btn_cancel.Disable()  # The charge is in flight; the gateway client bounds it with timeouts
+        self.btn_pay.SetLabel("Authorizing Bank...")
 
+        # The gauge only pulses while waiting; it no longer adds any delay of its own
         self.timer = wx.Timer(self)
         self.Bind(wx.EVT_TIMER, self.on_timer, self.timer)
         self.timer.Start(100)
-        self.gauge_value = 0
 
+        card = {"number": self.txt_card.GetValue(), "expiry": self.txt_expiry.GetValue(),
+                "cvv": self.txt_cvv.GetValue()}
+        future = PAYMENT_LOOP.submit(booking_core.PAYMENTS.charge(self.total_amount, card, self.idempotency_key))
+        future.add_done_callback(lambda f: wx.CallAfter(self.on_payment_done, f))
+
+    @timed("ui.payment_poll")
     def on_timer(self, event):
-        self.gauge_value += 5
-        self.gauge.SetValue(self.gauge_value)
+        self.gauge.Pulse()
 
-        if self.gauge_value >= 100:
-            self.timer.Stop()
-            self.payment_successful = True
+    def on_payment_done(self, future):
+        self.timer.Stop()
+        try:
+            self.charge_id = future.result()
+        except PaymentError as e:
+            self.payment_failed(f"Payment failed: {e}")
+            return
+        except BookingError as e:
+            self.payment_failed(str(e))
+            return
+        except Exception as e:  # Anything else must not leave Pay / Cancel disabled either
+            self.payment_failed(f"Payment could not be completed: {e}")
+            return
 
-            self.btn_pay.SetLabel("PAYMENT SUCCESSFUL")
-            self.btn_pay.SetBackgroundColour("#46D369")  # Green for success
+        self.payment_successful = True
+        self.gauge.SetValue(100)
+        self.btn_pay.SetLabel("PAYMENT SUCCESSFUL")
+        self.btn_pay.SetBackgroundColour(colour("#46D369"))  # Green for success
+        self.EndModal(wx.ID_OK)
 
-            wx.CallLater(1000, self.EndModal, wx.ID_OK)
-        elif self.gauge_value == 50:
-            self.btn_pay.SetLabel("Authorizing Bank...")
+    def payment_failed(self, message):
+        """ Shows why the payment did not go through and lets the user retry or cancel """
+        self.gauge.SetValue(0)
+        self.btn_pay.SetLabel(f"PAY ₹{self.total_amount:.2f}")
+        self.btn_pay.Enable()
+        self.btn_cancel.Enable()
+        wx.MessageBox(message, "Payment Error", wx.OK | wx.ICON_ERROR)
 
 
 # --- SEAT SELECTION DIALOG (Updated Logic) ---
 
-class SeatButton(wx.ToggleButton):
-    def __init__(self, parent, id, label, coordinate):
-        super().__init__(parent, id, label, size=(45, 45))
-        self.coordinate = coordinate
-        self.SetFont(wx.Font(10, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD))
-        self.Bind(wx.EVT_TOGGLEBUTTON, self.on_toggle)
-
-    def on_toggle(self, event):
-        if self.GetValue():
-            # Set to the new Gold color
-            self.SetBackgroundColour(THEME["seat_selected"])
-            self.SetForegroundColour("BLACK")
-        else:
-            self.SetBackgroundColour(wx.NullColour)
-            self.SetForegroundColour("BLACK")
-        event.Skip()
-
-    def set_booked(self, is_booked):
-        """ Helper to change look if booked """
-        if is_booked:
-            self.SetBackgroundColour(THEME["seat_booked"])
-            self.SetForegroundColour("GREY")
-            self.Disable()
-            self.SetValue(False)
-            self.SetLabel("X")
-        else:
-            self.SetBackgroundColour(wx.NullColour)
-            self.SetForegroundColour("BLACK")
-            self.Enable()
-            self.SetValue(False)
-            # Reset Label based on coordinate
-            rows = "ABCDE"
-            r, c = self.coordinate
-            self.SetLabel(f"{rows[r]}{c + 1}")
-
-
 class SeatSelectionDialog(wx.Dialog):
+    @timed("ui.dialog_open")
     def __init__(self, parent, movie_data):
         super().__init__(parent, title=f"Booking: {movie_data['title']}", size=(600, 750))
         self.movie = movie_data
         self.selected_seats = []
-        self.ticket_price = movie_data['price']
-        self.timings = movie_data['timings']
-        self.SetBackgroundColour(THEME["bg_main"])
-
-        # Ensure DB entry exists for this movie
-        if self.movie['id'] not in BOOKED_SEATS_DB:
-            BOOKED_SEATS_DB[self.movie['id']] = {}
-        for t in self.timings:
-            if t not in BOOKED_SEATS_DB[self.movie['id']]:
-                BOOKED_SEATS_DB[self.movie['id']][t] = []
+        self.session = uuid.uuid4().hex  # Owner of this dialog's seat holds
+        self.current_time = None  # Dated time of the show on display
+        self.show = None  # Its show id (see schedule.py)
+        self.finish_pending = False  # show_finished() already queued
+        # Live seat changes from other sessions, delivered in coalesced batches on the UI thread
+        self.updates = booking_core.CHANGE_FEED.subscription(notify=lambda: wx.CallAfter(self.on_seat_updates))
+        self.layout = booking_core.movie_layout(movie_data)
+        self.showings = self.upcoming_showings()
+        self.SetBackgroundColour(colour(THEME["bg_main"]))
 
         self.init_ui()
         self.Centre()
 
         # Trigger initial load for the first time slot
-        self.load_seats_for_time(self.timings[0])
+        self.load_seats_for_time(self.showings[0])
+
+    def upcoming_showings(self):
+        """ Dated times of the movie's next showings, a few days' worth """
+        shows = booking_core.upcoming_shows(limit=3 * len(self.movie['timings']), movie_id=self.movie['id'])
+        return [s["time"] for s in shows] or list(self.movie['timings'])
+
+    def showing_labels(self):
+        labels = []
+        for showing in self.showings:
+            day, time_slot = split_time(showing)
+            labels.append(f"{day:%a %d %b}, {time_slot}" if day is not None else time_slot)
+        return labels
 
     def init_ui(self):
         panel = wx.Panel(self)
@@ -223,65 +203,70 @@ class SeatSelectionDialog(wx.Dialog):
 
         # 1. Header
         lbl_title = wx.StaticText(panel, label=self.movie['title'])
-        lbl_title.SetFont(wx.Font(20, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD))
-        lbl_title.SetForegroundColour(THEME["text_white"])
+        lbl_title.SetFont(font(20, wx.FONTWEIGHT_BOLD))
+        lbl_title.SetForegroundColour(colour(THEME["text_white"]))
 
-        lbl_price = wx.StaticText(panel, label=f"Ticket Price: ₹{self.ticket_price:.2f}")
-        lbl_price.SetForegroundColour(THEME["text_grey"])
-        lbl_price.SetFont(wx.Font(12, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL))
+        # Class prices depend on the show (demand, time, day); filled in by load_seats_for_time()
+        self.lbl_price = wx.StaticText(panel, label="")
+        self.lbl_price.SetForegroundColour(colour(THEME["text_grey"]))
+        self.lbl_price.SetFont(font(12))
 
         vbox.Add(lbl_title, 0, wx.ALL | wx.CENTER, 10)
-        vbox.Add(lbl_price, 0, wx.ALL | wx.CENTER, 5)
+        vbox.Add(self.lbl_price, 0, wx.ALL | wx.CENTER, 5)
 
         # 2. Time Selector
         hbox_time = wx.BoxSizer(wx.HORIZONTAL)
         lbl_time = wx.StaticText(panel, label="Select Show Time: ")
-        lbl_time.SetForegroundColour("WHITE")
-        lbl_time.SetFont(wx.Font(11, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD))
+        lbl_time.SetForegroundColour(colour("WHITE"))
+        lbl_time.SetFont(font(11, wx.FONTWEIGHT_BOLD))
 
-        self.choice_time = wx.Choice(panel, choices=self.timings)
+        self.choice_time = wx.Choice(panel, choices=self.showing_labels())
         self.choice_time.SetSelection(0)
         self.choice_time.Bind(wx.EVT_CHOICE, self.on_time_changed)  # NEW: Bind Event
 
         hbox_time.Add(lbl_time, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 10)
         hbox_time.Add(self.choice_time, 0, wx.ALIGN_CENTER_VERTICAL)
+
+        # Group bookings: let the allocator pick the best adjacent seats
+        self.spin_count = wx.SpinCtrl(panel, min=1, max=10, initial=2, size=(60, -1))
+        btn_best = wx.Button(panel, label="BEST SEATS")
+        btn_best.Bind(wx.EVT_BUTTON, self.on_best_seats)
+        hbox_time.Add(self.spin_count, 0, wx.ALIGN_CENTER_VERTICAL | wx.LEFT, 25)
+        hbox_time.Add(btn_best, 0, wx.ALIGN_CENTER_VERTICAL | wx.LEFT, 5)
         vbox.Add(hbox_time, 0, wx.ALL | wx.CENTER, 15)
 
         # 3. Screen Visual
         screen_panel = wx.Panel(panel, size=(-1, 40))
-        screen_panel.SetBackgroundColour(THEME["screen_color"])
+        screen_panel.SetBackgroundColour(colour(THEME["screen_color"]))
         screen_sizer = wx.BoxSizer(wx.VERTICAL)
         lbl_screen = wx.StaticText(screen_panel, label="S C R E E N")
-        lbl_screen.SetForegroundColour("WHITE")
-        lbl_screen.SetFont(wx.Font(10, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD))
+        lbl_screen.SetForegroundColour(colour("WHITE"))
+        lbl_screen.SetFont(font(10, wx.FONTWEIGHT_BOLD))
         screen_sizer.Add(lbl_screen, 1, wx.ALIGN_CENTER | wx.ALL, 10)
         screen_panel.SetSizer(screen_sizer)
         vbox.Add(screen_panel, 0, wx.EXPAND | wx.ALL, 20)
 
-        # 4. Seat Grid
-        grid_sizer = wx.GridSizer(rows=5, cols=6, vgap=15, hgap=15)
-        self.seat_buttons = {}
-
-        rows = "ABCDE"
-        for r in range(5):
-            for c in range(6):
-                seat_label = f"{rows[r]}{c + 1}"
-                coord = (r, c)
-                btn = SeatButton(panel, wx.ID_ANY, seat_label, coord)
-                btn.Bind(wx.EVT_TOGGLEBUTTON, self.on_seat_click)
-                grid_sizer.Add(btn, 0)
-                self.seat_buttons[coord] = btn  # Store reference to update later
-
-        vbox.Add(grid_sizer, 1, wx.ALIGN_CENTER | wx.ALL, 10)
+        # 4. Seat Map (a single custom-drawn control, however many seats the hall has)
+        layout = self.layout
+        self.seat_map = SeatMapCanvas(panel, layout.rows, layout.cols,
+                                      label_for=lambda r, c: layout.labels[r * layout.cols + c],
+                                      categories=layout.categories,
+                                      colours={"background": THEME["bg_main"],
+                                               "available": THEME["seat_available"],
+                                               "selected": THEME["seat_selected"],
+                                               "sold": THEME["seat_booked"],
+                                               "classes": THEME["seat_classes"]})
+        self.seat_map.Bind(EVT_SEAT_TOGGLED, self.on_seat_click)
+        vbox.Add(self.seat_map, 1, wx.ALIGN_CENTER | wx.ALL, 10)
 
         # 5. Legend
         hbox_legend = wx.BoxSizer(wx.HORIZONTAL)
 
         def add_legend_item(color, text):
             p = wx.Panel(panel, size=(20, 20))
-            p.SetBackgroundColour(color)
+            p.SetBackgroundColour(colour(color))
             t = wx.StaticText(panel, label=text)
-            t.SetForegroundColour("WHITE")
+            t.SetForegroundColour(colour("WHITE"))
             hbox_legend.Add(p, 0, wx.RIGHT, 5)
             hbox_legend.Add(t, 0, wx.RIGHT, 15)
 
@@ -292,21 +277,33 @@ class SeatSelectionDialog(wx.Dialog):
 
         # 6. Footer
         footer_panel = wx.Panel(panel)
-        footer_panel.SetBackgroundColour(THEME["bg_card"])
+        footer_panel.SetBackgroundColour(colour(THEME["bg_card"]))
         footer_sizer = wx.BoxSizer(wx.VERTICAL)
 
         self.lbl_total = wx.StaticText(footer_panel, label="Selected: 0  |  Total: ₹0.00")
-        self.lbl_total.SetFont(wx.Font(14, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD))
-        self.lbl_total.SetForegroundColour(THEME["text_white"])
+        self.lbl_total.SetFont(font(14, wx.FONTWEIGHT_BOLD))
+        self.lbl_total.SetForegroundColour(colour(THEME["text_white"]))
         footer_sizer.Add(self.lbl_total, 0, wx.ALIGN_CENTER | wx.TOP, 15)
 
+        hbox_promo = wx.BoxSizer(wx.HORIZONTAL)
+        lbl_promo = wx.StaticText(footer_panel, label="Promo code: ")
+        lbl_promo.SetForegroundColour(colour(THEME["text_grey"]))
+        self.txt_promo = wx.TextCtrl(footer_panel, size=(120, -1))
+        self.txt_promo.Bind(wx.EVT_TEXT, lambda event: self.update_totals())
+        self.lbl_promo_status = wx.StaticText(footer_panel, label="")
+        self.lbl_promo_status.SetForegroundColour(colour(THEME["text_grey"]))
+        hbox_promo.Add(lbl_promo, 0, wx.ALIGN_CENTER_VERTICAL)
+        hbox_promo.Add(self.txt_promo, 0, wx.ALIGN_CENTER_VERTICAL)
+        hbox_promo.Add(self.lbl_promo_status, 0, wx.ALIGN_CENTER_VERTICAL | wx.LEFT, 10)
+        footer_sizer.Add(hbox_promo, 0, wx.ALIGN_CENTER | wx.TOP, 10)
+
         hbox_btns = wx.BoxSizer(wx.HORIZONTAL)
         btn_cancel = wx.Button(footer_panel, wx.ID_CANCEL, "Cancel")
 
         self.btn_proceed = wx.Button(footer_panel, wx.ID_OK, "PROCEED TO PAYMENT")
-        self.btn_proceed.SetBackgroundColour(THEME["accent"])
-        self.btn_proceed.SetForegroundColour("WHITE")
-        self.btn_proceed.SetFont(wx.Font(11, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD))
+        self.btn_proceed.SetBackgroundColour(colour(THEME["accent"]))
+        self.btn_proceed.SetForegroundColour(colour("WHITE"))
+        self.btn_proceed.SetFont(font(11, wx.FONTWEIGHT_BOLD))
         self.btn_proceed.Disable()
         self.btn_proceed.Bind(wx.EVT_BUTTON, self.on_proceed_to_payment)
 
@@ -322,46 +319,186 @@ class SeatSelectionDialog(wx.Dialog):
 
     def on_time_changed(self, event):
         """ Triggered when user picks a different time from dropdown """
-        new_time = self.choice_time.GetString(self.choice_time.GetSelection())
-        self.load_seats_for_time(new_time)
+        self.load_seats_for_time(self.showings[self.choice_time.GetSelection()])
 
+    @timed("ui.seat_load")
     def load_seats_for_time(self, time_slot):
         """ Refreshes the grid based on the time slot """
-        # 1. Clear current selections when switching time
+        # 1. Clear current selections (and their holds) when switching time
+        self.release_holds()
+        if self.show is not None:
+            self.updates.unsubscribe(self.show)
+        self.current_time = time_slot
         self.selected_seats = []
+        try:
+            self.show = booking_core.get_show(self.movie['id'], time_slot)
+        except UnknownShowError:
+            self.show = None
+            self.show_finished()
+            return
+        self.update_prices()
         self.update_totals()
 
-        # 2. Fetch booked seats for THIS specific time
-        movie_timings_db = BOOKED_SEATS_DB.get(self.movie['id'], {})
-        booked_for_this_slot = movie_timings_db.get(time_slot, [])
-
-        # 3. Update all buttons
-        for coord, btn in self.seat_buttons.items():
-            if coord in booked_for_this_slot:
-                btn.set_booked(True)
-            else:
-                btn.set_booked(False)
-
-        self.Layout()  # Refresh layout if needed
+        # 2. Follow changes first, then fetch seat state for THIS specific time and
+        # repaint the map once (seats held by other sessions show as unavailable)
+        self.updates.subscribe(self.show)
+        self.updates.poll()  # Anything queued so far is already in the snapshot below
+        self.seat_map.set_states(booking_core.seat_states(self.movie['id'], time_slot, session=self.session))
 
+    @timed("ui.seat_updates")
+    def on_seat_updates(self):
+        """ Repaints only the seats other sessions changed since the last batch """
+        if not self:  # Dialog already destroyed
+            return
+        changed = False
+        for delta in self.updates.poll():
+            if delta.show != self.show:
+                continue
+            changed = True
+            if instrumentation.ENABLED:
+                instrumentation.count("ui.seat_changes_received", len(delta.changes))
+            for index, (state, session) in delta.changes.items():
+                if session == self.session:
+                    continue
+                if state == FREE:
+                    if self.seat_map.states[index] == SOLD:
+                        self.seat_map.set_seat_state(index, AVAILABLE)
+                elif self.seat_map.states[index] != SELECTED:
+                    self.seat_map.set_seat_state(index, SOLD)
+        if changed:  # Sales may have moved the show's demand price
+            self.update_prices()
+            self.update_totals()
+
+    @timed("ui.seat_toggle")
     def on_seat_click(self, event):
-        btn = event.GetEventObject()
-        coord = btn.coordinate
-
-        if btn.GetValue():
+        coord = event.coord
+
+        if event.selected:
+            limit = booking_core.PRICING.rules.max_seats
+            if len(self.selected_seats) >= limit:
+                self.seat_map.set_seat_state(event.index, AVAILABLE)
+                wx.MessageBox(f"You can book at most {limit} seats at a time.", "Seat Limit",
+                              wx.OK | wx.ICON_INFORMATION)
+                return
+            try:
+                booking_core.hold_seats(self.session, self.movie['id'], self.current_time, [coord])
+            except SeatUnavailableError:
+                self.seat_map.set_seat_state(event.index, SOLD)
+                wx.MessageBox("Sorry, this seat was just taken by someone else.", "Seat Unavailable",
+                              wx.OK | wx.ICON_WARNING)
+                return
+            except UnknownShowError:
+                self.seat_map.set_seat_state(event.index, AVAILABLE)
+                self.show_finished()
+                return
             self.selected_seats.append(coord)
         else:
+            # By the show id the seat was held on: the slot may have moved on to the next showing
+            booking_core.BOOKING_SERVICE.release(self.session, self.show, [coord])
             self.selected_seats.remove(coord)
         self.update_totals()
 
+    def on_best_seats(self, event):
+        count = self.spin_count.GetValue()
+        self.load_seats_for_time(self.current_time)  # Drops the current selection and its holds
+        try:
+            coords = booking_core.hold_best_seats(self.session, self.movie['id'], self.current_time, count)
+        except UnknownShowError:
+            self.show_finished()
+            return
+        if coords is None:
+            wx.MessageBox(f"Sorry, there are no {count} seats together for this show.", "Best Seats",
+                          wx.OK | wx.ICON_INFORMATION)
+            return
+        for coord in coords:
+            self.seat_map.set_seat_state(self.layout.index(coord), SELECTED)
+        self.selected_seats = list(coords)
+        self.update_totals()
+
+    def release_holds(self):
+        """ Gives back every seat held by this dialog for the current time slot """
+        if self.show is not None:
+            booking_core.BOOKING_SERVICE.release(self.session, self.show)  # Also fine once the show is archived
+
+    def show_finished(self):
+        """ The showing on display has finished (and may be archived): say so once, then offer the next ones """
+        if not self.finish_pending:
+            self.finish_pending = True
+            wx.CallAfter(self.on_show_finished)
+
+    def on_show_finished(self):
+        self.finish_pending = False
+        if not self or not self.IsShown():
+            return
+        wx.MessageBox("This showing has finished. Please pick one of the upcoming showings.", "Show Finished",
+                      wx.OK | wx.ICON_INFORMATION)
+        self.reopen()
+
+    # --- Pooling (see SEAT_DIALOGS) ---
+
+    def fits(self, movie_data):
+        """ False once the movie's details changed; the dialog's widgets were built for the old ones """
+        return self.movie == movie_data
+
+    @timed("ui.dialog_reopen")
+    def reopen(self):
+        """ Rebinds a pooled dialog to fresh availability, as if it had just been built """
+        self.spin_count.SetValue(2)
+        self.txt_promo.ChangeValue("")
+        self.showings = self.upcoming_showings()  # Earlier showings may have started while pooled
+        self.choice_time.Set(self.showing_labels())
+        self.choice_time.SetSelection(0)
+        self.load_seats_for_time(self.showings[0])
+
+    def suspend(self):
+        """ After closing: gives back held seats and stops following the show while pooled """
+        self.release_holds()
+        if self.show is not None:
+            self.updates.unsubscribe(self.show)
+        self.current_time = self.show = None
+        self.selected_seats = []
+
+    def dispose(self):
+        self.suspend()
+        self.updates.close()
+        if self:  # Not already destroyed along with its parent
+            self.Destroy()
+
+    @property
+    def promo(self):
+        return self.txt_promo.GetValue().strip() or None
+
+    def update_prices(self):
+        """ Header line of the current show's class prices """
+        try:
+            prices = booking_core.PRICING.class_prices(self.show)
+        except UnknownShowError:
+            self.show_finished()
+            return
+        self.lbl_price.SetLabel("  |  ".join(f"{name.title()}: ₹{price:.2f}"
+                                             for name, price in zip(self.layout.class_names, prices)))
+
+    @timed("ui.update_totals")
     def update_totals(self):
         count = len(self.selected_seats)
-        self.total_amount = count * self.ticket_price
+        promo, status = self.promo, ""
+        try:
+            self.total_amount = booking_core.quote(self.movie, self.selected_seats, self.current_time, promo)
+            if promo and count:
+                status = "Applied"
+        except PricingError as e:
+            promo, status = None, str(e)
+            self.total_amount = booking_core.quote(self.movie, self.selected_seats, self.current_time)
+        except UnknownShowError:
+            self.show_finished()
+            return
+        self.applied_promo = promo
+        self.lbl_promo_status.SetLabel(status)
         self.lbl_total.SetLabel(f"Selected: {count}  |  Total: ₹{self.total_amount:.2f}")
 
         if count > 0:
             self.btn_proceed.Enable()
-            self.btn_proceed.SetBackgroundColour(THEME["accent"])
+            self.btn_proceed.SetBackgroundColour(colour(THEME["accent"]))
         else:
             self.btn_proceed.Disable()
             # Set to default button color on disable
@@ -371,11 +508,12 @@ class SeatSelectionDialog(wx.Dialog):
         if not self.selected_seats:
             return
 
-        selected_time = self.choice_time.GetString(self.choice_time.GetSelection())
+        selected_time = self.current_time
+        label = self.choice_time.GetString(self.choice_time.GetSelection())
 
         # Since using dialogs is fine, replacing wx.MessageBox for confirmation dialog
         dlg = wx.MessageDialog(self,
-                               f"Book {len(self.selected_seats)} tickets for {selected_time}?\nTotal: ₹{self.total_amount:.2f}",
+                               f"Book {len(self.selected_seats)} tickets for {label}?\nTotal: ₹{self.total_amount:.2f}",
                                "Confirm Booking Details", wx.YES_NO | wx.ICON_QUESTION)
 
         if dlg.ShowModal() != wx.ID_YES:
@@ -387,16 +525,33 @@ class SeatSelectionDialog(wx.Dialog):
         result = payment_dlg.ShowModal()
 
         if result == wx.ID_OK and payment_dlg.payment_successful:
-            self.final_book_seats(selected_time)
+            self.final_book_seats(selected_time, payment_dlg.charge_id)
         else:
             wx.MessageBox("Payment Cancelled or Failed.", "Status", wx.OK | wx.ICON_WARNING)
 
         payment_dlg.Destroy()
 
-    def final_book_seats(self, booked_time):
-        # Save to the SPECIFIC time slot in the DB
-        current_booked = BOOKED_SEATS_DB[self.movie['id']].get(booked_time, [])
-        BOOKED_SEATS_DB[self.movie['id']][booked_time] = current_booked + self.selected_seats
+    def final_book_seats(self, booked_time, charge_id=None):
+        # Commit to the SPECIFIC showing that was paid for; fails as a whole if any seat was taken meanwhile
+        try:
+            booking_core.book_show(self.session, self.show, self.selected_seats, self.applied_promo)
+        except Exception as e:
+            if charge_id is not None:
+                PAYMENT_LOOP.submit(booking_core.refund_failed_booking(charge_id, self.total_amount, e))
+            if isinstance(e, SeatUnavailableError):
+                taken = ", ".join(booking_core.seat_label(self.movie['id'], c) for c in e.seats)
+                wx.MessageBox(f"Booking failed: seats {taken} were taken by another customer.\n"
+                              "No tickets were booked and your payment is being refunded, please pick again.",
+                              "Seats Unavailable", wx.OK | wx.ICON_ERROR)
+                self.load_seats_for_time(booked_time)
+                return
+            wx.MessageBox(f"Booking failed: {e}\nNo tickets were booked and your payment is being refunded.",
+                          "Booking Failed", wx.OK | wx.ICON_ERROR)
+            if isinstance(e, UnknownShowError):
+                self.reopen()  # The showing is over; offer the ones still to come
+            else:
+                self.load_seats_for_time(booked_time)
+            return
 
         wx.MessageBox(
             f"Success! Booked {len(self.selected_seats)} tickets for the {booked_time} show.\nEnjoy the show!",
@@ -406,114 +561,176 @@ class SeatSelectionDialog(wx.Dialog):
 
 
 class MoviePanel(wx.Panel):
-    def __init__(self, parent, movie_data, size=(250, 240)):  # Increased size for content
+    # Descriptions are wrapped through one cache shared by every card (same font, same width)
+    _wrap = None
+
+    def __init__(self, parent, movie_data=None, size=(250, 240)):  # Increased size for content
         super().__init__(parent, size=size, style=wx.BORDER_DOUBLE)  # Added border style for definition
-        self.movie_data = movie_data
-        self.SetBackgroundColour(THEME["bg_card"])
+        self.movie_data = None
+        self.SetBackgroundColour(colour(THEME["bg_card"]))
 
         self._init_layout()
-        wx.CallAfter(self.wrap_and_layout)  # Ensure wrapping happens after the window is created
+        if movie_data is not None:
+            self.set_movie(movie_data)
 
     def _init_layout(self):
         self.vbox = wx.BoxSizer(wx.VERTICAL)
 
         # 1. Title (Top)
-        self.title = wx.StaticText(self, label=self.movie_data['title'])
-        self.title.SetFont(wx.Font(14, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD))
-        self.title.SetForegroundColour(THEME["text_white"])
+        self.title = wx.StaticText(self, style=wx.ST_NO_AUTORESIZE | wx.ALIGN_CENTER)
+        self.title.SetFont(font(14, wx.FONTWEIGHT_BOLD))
+        self.title.SetForegroundColour(colour(THEME["text_white"]))
 
         # 2. Genre (Under Title)
-        self.genre = wx.StaticText(self, label=self.movie_data['genre'])
-        self.genre.SetForegroundColour(THEME["accent"])
-        self.genre.SetFont(wx.Font(10, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_ITALIC, wx.FONTWEIGHT_NORMAL))
+        self.genre = wx.StaticText(self, style=wx.ST_NO_AUTORESIZE | wx.ALIGN_CENTER)
+        self.genre.SetForegroundColour(colour(THEME["accent"]))
+        self.genre.SetFont(font(10, style=wx.FONTSTYLE_ITALIC))
 
         # 3. Description (Middle - Flexible)
         # Use wx.ST_NO_AUTORESIZE to manually control wrap
-        self.desc = wx.StaticText(self, label=self.movie_data['description'],
-                                  style=wx.ALIGN_CENTER | wx.ST_NO_AUTORESIZE)
-        self.desc.SetForegroundColour(THEME["text_grey"])
-        self.desc.SetFont(wx.Font(9, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL))
+        self.desc = wx.StaticText(self, style=wx.ALIGN_CENTER | wx.ST_NO_AUTORESIZE)
+        self.desc.SetForegroundColour(colour(THEME["text_grey"]))
+        self.desc.SetFont(font(9))
+        if MoviePanel._wrap is None:
+            MoviePanel._wrap = wrap_cache(self.desc.GetFont())
 
         # 4. Button (Bottom)
-        self.btn_book = wx.Button(self, label=f"BOOK @ ₹{self.movie_data['price']:.2f}")
-        self.btn_book.SetBackgroundColour(THEME["accent"])
-        self.btn_book.SetForegroundColour(THEME["text_white"])
-        self.btn_book.SetFont(wx.Font(10, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD))
+        self.btn_book = wx.Button(self)
+        self.btn_book.SetBackgroundColour(colour(THEME["accent"]))
+        self.btn_book.SetForegroundColour(colour(THEME["text_white"]))
+        self.btn_book.SetFont(font(10, wx.FONTWEIGHT_BOLD))
         self.btn_book.Bind(wx.EVT_BUTTON, self.on_book)
 
         # Sizer logic: The description gets priority (proportion=1) to fill the space.
-        self.vbox.Add(self.title, 0, wx.ALIGN_CENTER | wx.TOP, 15)
-        self.vbox.Add(self.genre, 0, wx.ALIGN_CENTER)
+        self.vbox.Add(self.title, 0, wx.EXPAND | wx.TOP, 15)
+        self.vbox.Add(self.genre, 0, wx.EXPAND)
         self.vbox.Add(wx.StaticLine(self), 0, wx.EXPAND | wx.TOP | wx.BOTTOM, 5)  # Separator
         self.vbox.Add(self.desc, 1, wx.EXPAND | wx.ALL, 10)  # EXPAND and priority 1
         self.vbox.Add(self.btn_book, 0, wx.ALIGN_CENTER | wx.BOTTOM, 15)
 
         self.SetSizer(self.vbox)
 
+    def set_movie(self, movie_data):
+        """ Shows another movie in this card (cards are recycled by the catalog view) """
+        self.movie_data = movie_data
+        self.title.SetLabel(movie_data['title'])
+        self.genre.SetLabel(movie_data['genre'])
+        self.btn_book.SetLabel(f"BOOK @ ₹{movie_data['price']:.2f}")
+        self.wrap_and_layout()
+
+    @timed("ui.card_layout")
     def wrap_and_layout(self):
         """Wraps the description text based on the panel's current width."""
         width, _ = self.GetClientSize()
         # Set wrap width to the client width minus horizontal padding (e.g., 20 pixels)
         wrap_width = max(100, width - 20)
-
-        try:
-            self.desc.Wrap(wrap_width)
-        except Exception:
-            # Handle cases where Wrap is not available or fails
-            pass
-
+        self.desc.SetLabel(self._wrap.wrap(self.movie_data['description'], wrap_width))
         self.Layout()
 
     def on_book(self, event):
-        dlg = SeatSelectionDialog(self.GetTopLevelParent(), self.movie_data)
+        dlg = seat_dialog(self.GetTopLevelParent(), self.movie_data)
         dlg.ShowModal()
-        dlg.Destroy()
+        dlg.suspend()
+
+
+def seat_dialog(parent, movie):
+    """ The pooled seat selection dialog for a movie, rebound to current availability, or a new one """
+    dlg = SEAT_DIALOGS.get(movie['id'])
+    if dlg is not None and not dlg.fits(movie):
+        SEAT_DIALOGS.discard(movie['id'])
+        dlg = None
+    if dlg is None:
+        dlg = SeatSelectionDialog(parent, movie)
+        SEAT_DIALOGS.put(movie['id'], dlg)
+    else:
+        dlg.reopen()
+    return dlg
 
 
 class MainFrame(wx.Frame):
+    @timed("ui.main_window_open")
     def __init__(self):
         super().__init__(None, title="Python BookMyShow", size=(900, 750))  # Increased frame height
-        self.SetBackgroundColour(THEME["bg_main"])
+        self.SetBackgroundColour(colour(THEME["bg_main"]))
         self.init_ui()
         self.Centre()
 
     def init_ui(self):
         panel = wx.Panel(self)
-        panel.SetBackgroundColour(THEME["bg_main"])
+        panel.SetBackgroundColour(colour(THEME["bg_main"]))
         main_sizer = wx.BoxSizer(wx.VERTICAL)
 
         # Header Panel
         header_panel = wx.Panel(panel)
-        header_panel.SetBackgroundColour(THEME["bg_card"])
+        header_panel.SetBackgroundColour(colour(THEME["bg_card"]))
         header_sizer = wx.BoxSizer(wx.VERTICAL)
 
         header_text = wx.StaticText(header_panel, label="BookMyShow")
-        header_text.SetFont(wx.Font(24, wx.FONTFAMILY_SWISS, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD))
-        header_text.SetForegroundColour(THEME["accent"])
+        header_text.SetFont(font(24, wx.FONTWEIGHT_BOLD, family=wx.FONTFAMILY_SWISS))
+        header_text.SetForegroundColour(colour(THEME["accent"]))
 
         sub_text = wx.StaticText(header_panel, label="PREMIUM CINEMA EXPERIENCE")
-        sub_text.SetFont(wx.Font(10, wx.FONTFAMILY_SWISS, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_LIGHT))
-        sub_text.SetForegroundColour("WHITE")
+        sub_text.SetFont(font(10, wx.FONTWEIGHT_LIGHT, family=wx.FONTFAMILY_SWISS))
+        sub_text.SetForegroundColour(colour("WHITE"))
+
+        # Search: title/description prefix match plus a genre facet, answered from CATALOG_INDEX
+        self.search_box = wx.SearchCtrl(header_panel, size=(320, -1))
+        self.search_box.SetDescriptiveText("Search movies")
+        self.search_box.ShowCancelButton(True)
+        self.search_box.Bind(wx.EVT_TEXT, self.on_search)
+        self.search_box.Bind(wx.EVT_SEARCHCTRL_CANCEL_BTN, self.on_search_cancel)
+
+        self.genres = ["All genres"] + [g.title() for g in booking_core.CATALOG_INDEX.genres()]
+        self.genre_choice = wx.Choice(header_panel, choices=self.genres)
+        self.genre_choice.SetSelection(0)
+        self.genre_choice.Bind(wx.EVT_CHOICE, self.on_search)
+
+        search_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        search_sizer.Add(self.search_box, 0, wx.RIGHT, 10)
+        search_sizer.Add(self.genre_choice, 0)
 
         header_sizer.Add(header_text, 0, wx.ALIGN_CENTER | wx.TOP, 15)
-        header_sizer.Add(sub_text, 0, wx.ALIGN_CENTER | wx.BOTTOM, 15)
+        header_sizer.Add(sub_text, 0, wx.ALIGN_CENTER)
+        header_sizer.Add(search_sizer, 0, wx.ALIGN_CENTER | wx.TOP | wx.BOTTOM, 10)
         header_panel.SetSizer(header_sizer)
 
         main_sizer.Add(header_panel, 0, wx.EXPAND)
 
-        # Movie Grid
-        grid = wx.GridSizer(cols=2, hgap=40, vgap=40)  # Increased gap
-        for movie in MOVIES:
-            # Use a slightly larger size for the movie card to prevent overlap
-            movie_card = MoviePanel(panel, movie, size=(380, 240))
-            grid.Add(movie_card, 0, wx.ALIGN_CENTER)
+        # Movie Grid: only the cards in view exist; they are reused while scrolling
+        self.catalog = CatalogView(panel, booking_core.catalog_source(),
+                                   lambda parent: MoviePanel(parent, size=(380, 240)),
+                                   card_size=(380, 240), cols=2, gap=40)
 
-        main_sizer.Add(grid, 1, wx.ALIGN_CENTER | wx.ALL, 40)
+        main_sizer.Add(self.catalog, 1, wx.EXPAND)
         panel.SetSizer(main_sizer)
 
+    def on_search(self, event):
+        text = self.search_box.GetValue()
+        selection = self.genre_choice.GetSelection()
+        genre = self.genres[selection] if selection > 0 else None
+        if not text.strip() and genre is None:
+            self.catalog.set_source(booking_core.catalog_source())
+        else:
+            self.catalog.set_source(booking_core.catalog_source(booking_core.search_movies(text, genre)))
+
+    def on_search_cancel(self, event):
+        self.search_box.SetValue("")  # Fires EVT_TEXT, which resets the catalog
+
 
 if __name__ == "__main__":
+    # Set BMS_SQLITE=<path> to keep the catalog and bookings in SQLite instead of the write-ahead log
+    if os.environ.get("BMS_SQLITE"):
+        store = booking_core.enable_sqlite(os.environ["BMS_SQLITE"])
+    else:
+        store = booking_core.enable_persistence(
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), "bookings_data"))
+    booking_core.COMPACTOR.start()  # Moves finished showings to the archive
+    # BMS_METRICS / BMS_METRICS_FILE / BMS_METRICS_PORT / BMS_PROFILE turn on instrumentation (see instrumentation.py)
+    metrics = instrumentation.configure_from_env()
     app = wx.App(False)
+    if metrics:
+        instrumentation.monitor_wx_loop()
     frame = MainFrame()
     frame.Show()
-    app.MainLoop()
\ No newline at end of file
+    app.MainLoop()
+    store.close()
\ No newline at end of file
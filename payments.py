@@ -0,0 +1,122 @@
+# --- PAYMENT PIPELINE ---
+# Async gateway interface plus a client that adds timeouts, retries with
+# exponential backoff and idempotency keys. FakeGateway is an in-process
+# stand-in with configurable latency and failure injection.
+
+import asyncio
+import itertools
+import random
+import threading
+import uuid
+
+from instrumentation import timed
+
+
+class PaymentError(Exception):
+    pass
+
+
+class PaymentDeclinedError(PaymentError):
+    """ The processor refused the payment; retrying will not help """
+
+
+class GatewayUnavailableError(PaymentError):
+    """ Transient failure (network, overload); safe to retry with the same idempotency key """
+
+
+class PaymentGateway:
+    """ Interface of a payment processor. Every call must be idempotent per key. """
+
+    async def authorize(self, amount, card, idempotency_key):
+        raise NotImplementedError
+
+    async def capture(self, authorization_id, idempotency_key):
+        raise NotImplementedError
+
+    async def refund(self, charge_id, amount, idempotency_key):
+        raise NotImplementedError
+
+
+class FakeGateway(PaymentGateway):
+    """
+    Local stand-in processor. `latency` is a (min, max) range in seconds,
+    `failure_rate` injects transient GatewayUnavailableErrors and cards whose
+    number ends in "0000" are always declined.
+    """
+
+    def __init__(self, latency=(0.05, 0.2), failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._results = {}  # { idempotency_key: result }
+        self.calls = 0
+
+    async def _call(self, key, operation):
+        self.calls += 1
+        await asyncio.sleep(self._rng.uniform(*self.latency))
+        if key in self._results:
+            return self._results[key]
+        if self._rng.random() < self.failure_rate:
+            raise GatewayUnavailableError("injected gateway failure")
+        result = self._results[key] = operation()
+        return result
+
+    async def authorize(self, amount, card, idempotency_key):
+        def operation():
+            if str(card.get("number", "")).endswith("0000"):
+                raise PaymentDeclinedError("card declined")
+            return f"auth_{next(self._ids)}"
+        return await self._call(("authorize", idempotency_key), operation)
+
+    async def capture(self, authorization_id, idempotency_key):
+        return await self._call(("capture", idempotency_key), lambda: f"ch_{authorization_id[5:]}")
+
+    async def refund(self, charge_id, amount, idempotency_key):
+        return await self._call(("refund", idempotency_key), lambda: f"re_{charge_id[3:]}")
+
+
+class PaymentClient:
+    def __init__(self, gateway, timeout=5.0, retries=3, backoff=0.1):
+        self.gateway = gateway
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+    async def _with_retries(self, call):
+        for attempt in range(self.retries + 1):
+            try:
+                return await asyncio.wait_for(call(), self.timeout)
+            except (asyncio.TimeoutError, GatewayUnavailableError) as e:
+                if attempt == self.retries:
+                    raise GatewayUnavailableError(f"payment gateway unavailable: {e!r}") from e
+                delay = self.backoff * (2 ** attempt)
+                await asyncio.sleep(delay + random.uniform(0, delay))
+
+    @timed("payment.charge")
+    async def charge(self, amount, card, idempotency_key=None):
+        """ Authorizes and captures `amount`; returns the charge id """
+        key = idempotency_key or uuid.uuid4().hex
+        auth_id = await self._with_retries(lambda: self.gateway.authorize(amount, card, key))
+        return await self._with_retries(lambda: self.gateway.capture(auth_id, key))
+
+    @timed("payment.refund")
+    async def refund(self, charge_id, amount, idempotency_key=None):
+        key = idempotency_key or f"refund-{charge_id}"
+        return await self._with_retries(lambda: self.gateway.refund(charge_id, amount, key))
+
+
+class BackgroundLoop:
+    """ Runs an asyncio loop on a daemon thread so GUI code can submit coroutines without blocking """
+
+    def __init__(self):
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def submit(self, coro):
+        """ Schedules the coroutine and returns a concurrent.futures.Future """
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="payments", daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
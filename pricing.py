@@ -0,0 +1,253 @@
+# --- DYNAMIC PRICING ---
+# Ticket prices follow demand (occupancy of the show), time of day and day of
+# week, on top of each layout's class surcharges. The rules are compiled into
+# one price table per show (a price per cell, like ScreenLayout.price_table)
+# that stays valid until the show's occupancy crosses the next threshold, the
+# day changes or the rules are replaced: booking notifications only recount a
+# show and drop its table when its tier moves. A quote is a few table lookups,
+# and repeated quotes of the same selection come from a per-show cache.
+
+import time
+
+from booking_service import BookingError, InvalidSeatError
+from catalog_index import parse_time
+from seat_inventory import BOOKED
+
+QUOTE_CACHE_SIZE = 4096  # Cached selections per show before the cache starts over
+
+
+class PricingError(BookingError):
+    pass
+
+
+class Promo:
+    """
+    A promo code: `percent` off the subtotal and/or a flat `amount` off,
+    together never more than `max_discount` per booking. Valid for bookings of
+    `min_seats` to `max_seats` seats.
+    """
+
+    def __init__(self, code, percent=0.0, amount=0.0, max_discount=None, min_seats=1, max_seats=None):
+        self.code = code.upper()
+        self.percent = percent
+        self.amount = amount
+        self.max_discount = max_discount
+        self.min_seats = min_seats
+        self.max_seats = max_seats
+
+    def discount(self, subtotal, seats):
+        if seats < self.min_seats:
+            raise PricingError(f"{self.code} needs at least {self.min_seats} seats")
+        if self.max_seats is not None and seats > self.max_seats:
+            raise PricingError(f"{self.code} is valid for at most {self.max_seats} seats")
+        off = subtotal * self.percent / 100 + self.amount
+        if self.max_discount is not None:
+            off = min(off, self.max_discount)
+        return min(off, subtotal)
+
+
+class PricingRules:
+    """
+    occupancy_tiers: (booked fraction, multiplier) pairs, ascending; the last
+        tier whose fraction the show has reached applies.
+    time_bands: (start "HH:MM", multiplier) pairs, ascending; a show falls in
+        the last band starting at or before its start time.
+    weekday_factors: multiplier per weekday (0 = Monday), 1.0 if missing.
+    The product of the three is clamped to [min_multiplier, max_multiplier].
+    max_seats caps the seats of one booking; promos maps codes to Promo.
+    """
+
+    def __init__(self, occupancy_tiers=((0.0, 1.0), (0.5, 1.1), (0.75, 1.25), (0.9, 1.4)),
+                 time_bands=(("00:00", 0.85), ("12:00", 1.0), ("17:00", 1.15), ("22:00", 1.0)),
+                 weekday_factors=None, min_multiplier=0.8, max_multiplier=1.5, max_seats=10, promos=()):
+        self.occupancy_tiers = tuple(sorted(occupancy_tiers))
+        self.time_bands = tuple(sorted((parse_time(start), m) for start, m in time_bands))
+        self.weekday_factors = weekday_factors if weekday_factors is not None else {4: 1.1, 5: 1.15, 6: 1.15}
+        self.min_multiplier = min_multiplier
+        self.max_multiplier = max_multiplier
+        self.max_seats = max_seats
+        self.promos = {p.code: p for p in promos}
+
+    def tier(self, occupancy):
+        """ Index of the occupancy tier for a booked fraction """
+        k = 0
+        for i, (threshold, _) in enumerate(self.occupancy_tiers):
+            if occupancy >= threshold:
+                k = i
+        return k
+
+    def multiplier(self, tier, minutes, weekday):
+        band = 1.0
+        for start, factor in self.time_bands:
+            if start > minutes:
+                break
+            band = factor
+        m = self.occupancy_tiers[tier][1] if self.occupancy_tiers else 1.0
+        m *= band * self.weekday_factors.get(weekday, 1.0)
+        return round(min(max(m, self.min_multiplier), self.max_multiplier), 4)
+
+    def promo(self, code):
+        promo = self.promos.get(code.strip().upper())
+        if promo is None:
+            raise PricingError(f"unknown promo code {code!r}")
+        return promo
+
+
+DEFAULT_PROMOS = (
+    Promo("FIRSTSHOW", percent=20, max_discount=150),
+    Promo("GROUP4", percent=10, min_seats=4),
+    Promo("FLAT50", amount=50, min_seats=2),
+)
+
+
+class _ShowPrices:
+    __slots__ = ("tier", "multiplier", "table", "cols", "quotes")
+
+    def __init__(self, tier, multiplier, table, cols):
+        self.tier = tier
+        self.multiplier = multiplier
+        self.table = table
+        self.cols = cols
+        self.quotes = {}  # { (coords, promo): (subtotal, discount, total) }
+
+
+def _local_day(clock):
+    """ (weekday, epoch time of the next local midnight) """
+    now = clock()
+    t = time.localtime(now)
+    midnight = time.mktime((t.tm_year, t.tm_mon, t.tm_mday + 1, 0, 0, 0, 0, 0, -1))
+    return t.tm_wday, midnight
+
+
+class PricingEngine:
+    """
+    Prices per show, for `layout_for(show)` halls and a `base_price(show)`,
+    with occupancy read from `inventory`. `time_of(show)` gives a show's start
+    time ("09:00 AM"; by default show[1]) and `weekday(show)` the day it plays
+    on (by default every show is today's). attach() a BookingService so
+    tables follow bookings.
+    """
+
+    def __init__(self, layout_for, base_price, inventory, rules=None, weekday=None, time_of=None, clock=time.time):
+        self.layout_for = layout_for
+        self.base_price = base_price
+        self.inventory = inventory
+        self.rules = rules or PricingRules(promos=DEFAULT_PROMOS)
+        self.weekday = weekday
+        self.time_of = time_of
+        self.clock = clock
+        self._shows = {}  # { show: _ShowPrices }
+        self._tables = {}  # { (layout name, base price, multiplier): price per cell }
+        self._minutes = {}  # { time slot: minutes since midnight }
+        self._today, self._day_ends = _local_day(clock)
+        self.compiles = 0
+        self.invalidations = 0
+
+    def attach(self, service):
+        service.add_observer(self._on_seats_changed)
+
+    def set_rules(self, rules):
+        self.rules = rules
+        self.invalidate()
+
+    def invalidate(self, show=None):
+        """ Drops compiled prices for one show, or for all of them """
+        if show is None:
+            self._shows = {}
+            self._tables = {}
+        else:
+            self._shows.pop(show, None)
+
+    # --- Compilation ---
+
+    def _tier(self, show, layout):
+        seats = layout.seat_count
+        return self.rules.tier(self.inventory.count_booked(show) / seats if seats else 0.0)
+
+    def _compile(self, show):
+        layout = self.layout_for(show)
+        base = self.base_price(show)
+        tier = self._tier(show, layout)
+        time_slot = self.time_of(show) if self.time_of is not None else show[1]
+        minutes = self._minutes.get(time_slot)
+        if minutes is None:
+            minutes = self._minutes[time_slot] = parse_time(time_slot)
+        weekday = self.weekday(show) if self.weekday is not None else self._today
+        m = self.rules.multiplier(tier, minutes, weekday)
+        key = (layout.name, base, m)
+        table = self._tables.get(key)
+        if table is None:
+            table = self._tables[key] = tuple(round(p * m, 2) for p in layout.price_table(base))
+        self.compiles += 1
+        entry = self._shows[show] = _ShowPrices(tier, m, table, layout.cols)
+        return entry
+
+    def _entry(self, show):
+        if self.clock() >= self._day_ends:
+            self._today, self._day_ends = _local_day(self.clock)
+            self._shows = {}
+        entry = self._shows.get(show)
+        return entry if entry is not None else self._compile(show)
+
+    def _on_seats_changed(self, show, indices, state, session):
+        # Only sales change occupancy; holds and releases leave the price alone
+        if state != BOOKED:
+            return
+        entry = self._shows.get(show)
+        if entry is not None and self._tier(show, self.layout_for(show)) != entry.tier:
+            self._shows.pop(show, None)
+            self.invalidations += 1
+
+    # --- Queries ---
+
+    def multiplier(self, show):
+        return self._entry(show).multiplier
+
+    def table(self, show):
+        """ Current price of every cell of a show, row-major (0 for gaps) """
+        return self._entry(show).table
+
+    def class_prices(self, show):
+        """ Current price per seat class, in layout class order """
+        layout = self.layout_for(show)
+        m = self._entry(show).multiplier
+        base = self.base_price(show)
+        return [round((base + s) * m, 2) for s in layout.surcharges]
+
+    def quote_details(self, show, coords, promo=None):
+        """ (subtotal, discount, total) for the seats; raises PricingError for an invalid promo or too many seats """
+        entry = self._shows.get(show)
+        if entry is None or self.clock() >= self._day_ends:
+            entry = self._entry(show)
+        key = (tuple(coords), promo)
+        result = entry.quotes.get(key)
+        if result is None:
+            result = self._price(entry, key)
+        if result.__class__ is str:  # A cached rejection
+            raise PricingError(result)
+        return result
+
+    def quote(self, show, coords, promo=None):
+        return self.quote_details(show, coords, promo)[2]
+
+    def _price(self, entry, key):
+        coords, promo = key
+        table, cols = entry.table, entry.cols
+        subtotal = 0.0
+        for r, c in coords:
+            i = r * cols + c
+            if not (0 <= c < cols and 0 <= i < len(table)):
+                raise InvalidSeatError(f"seat {(r, c)} is outside the hall")
+            subtotal += table[i]
+        subtotal = round(subtotal, 2)
+        try:
+            if len(coords) > self.rules.max_seats:
+                raise PricingError(f"at most {self.rules.max_seats} seats per booking")
+            discount = round(self.rules.promo(promo).discount(subtotal, len(coords)), 2) if promo else 0.0
+            result = (subtotal, discount, round(subtotal - discount, 2))
+        except PricingError as e:
+            result = str(e)
+        if len(entry.quotes) >= QUOTE_CACHE_SIZE:
+            entry.quotes.clear()
+        entry.quotes[key] = result
+        return result
@@ -0,0 +1,92 @@
+# --- UI RESOURCES ---
+# Fonts, colours, pens and brushes are built once per distinct spec and shared
+# by every widget, instead of a new wx.Font / parsed hex colour per label and
+# per dialog. wx objects can only be created once the wx.App exists, so each
+# is built on first use. LruPool keeps the most recently used N of something
+# expensive to build (seat selection dialogs) and disposes of the rest.
+
+from collections import OrderedDict
+
+import wx
+
+_FONTS = {}
+_COLOURS = {}
+_PENS = {}
+_BRUSHES = {}
+
+
+def font(size, weight=wx.FONTWEIGHT_NORMAL, style=wx.FONTSTYLE_NORMAL, family=wx.FONTFAMILY_DEFAULT):
+    key = (size, weight, style, family)
+    f = _FONTS.get(key)
+    if f is None:
+        f = _FONTS[key] = wx.Font(size, family, style, weight)
+    return f
+
+
+def colour(spec):
+    """ wx.Colour for "#RRGGBB" / a colour name, parsed once; wx.Colour instances pass through """
+    if isinstance(spec, wx.Colour):
+        return spec
+    c = _COLOURS.get(spec)
+    if c is None:
+        c = _COLOURS[spec] = wx.Colour(spec)
+    return c
+
+
+def pen(spec, width=1):
+    key = (spec if isinstance(spec, str) else colour(spec).GetRGBA(), width)
+    p = _PENS.get(key)
+    if p is None:
+        p = _PENS[key] = wx.Pen(colour(spec), width)
+    return p
+
+
+def brush(spec):
+    key = spec if isinstance(spec, str) else colour(spec).GetRGBA()
+    b = _BRUSHES.get(key)
+    if b is None:
+        b = _BRUSHES[key] = wx.Brush(colour(spec))
+    return b
+
+
+class LruPool:
+    """
+    Up to `capacity` objects by key, most recently used last. put() beyond
+    capacity evicts the least recently used object through `dispose(obj)`.
+    """
+
+    def __init__(self, capacity, dispose):
+        self.capacity = capacity
+        self.dispose = dispose
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        """ The pooled object for `key` (now the most recently used), or None """
+        obj = self._items.get(key)
+        if obj is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(key)
+        return obj
+
+    def put(self, key, obj):
+        self._items[key] = obj
+        self._items.move_to_end(key)
+        while len(self._items) > self.capacity:
+            self.dispose(self._items.popitem(last=False)[1])
+
+    def discard(self, key):
+        """ Drops and disposes of the object for `key`, e.g. when it no longer matches its data """
+        obj = self._items.pop(key, None)
+        if obj is not None:
+            self.dispose(obj)
+
+    def clear(self):
+        while self._items:
+            self.dispose(self._items.popitem(last=False)[1])
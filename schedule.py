@@ -0,0 +1,256 @@
+# --- SHOW SCHEDULE ---
+# Dated show instances. Every showing of a movie (day, time, screen) gets a
+# compact integer id, and that id is the show key of the hot path: seat
+# state, holds, change feed, allocator and pricing. Instances are kept in
+# start time order, so "what's on next" is a bisect, and the finished shows
+# are always a prefix of that order, which compaction (cold_store.Compactor)
+# cuts off.
+#
+# Outside the process a show is named by its key (movie_id, "YYYY-MM-DD hh:mm AM"),
+# which is what the booking log and the SQLite store record. A bare "hh:mm AM",
+# as older data and clients use, means the next showing at that time that has
+# not finished yet.
+
+import bisect
+import datetime
+import threading
+import time
+
+from catalog_index import parse_time
+
+SHOW_MINUTES = 180  # A show counts as finished this long after it starts
+HORIZON_DAYS = 7    # Days ahead that plan() schedules and get_show() accepts
+MINUTES_PER_DAY = 1440
+MERGE_AT = 32  # New entries from which _index re-sorts instead of inserting one by one
+
+_minutes = {}  # { time slot: minutes since midnight }
+
+
+def split_time(text):
+    """
+    "2026-10-18 09:00 AM" -> (date(2026, 10, 18), "09:00 AM"); an undated
+    "09:00 AM" -> (None, "09:00 AM"). Raises ValueError for a bad date.
+    """
+    if len(text) > 11 and text[4] == "-" and text[10] == " ":
+        return datetime.date.fromisoformat(text[:10]), text[11:]
+    return None, text
+
+
+def dated(day, time_slot):
+    return f"{day.isoformat()} {time_slot}"
+
+
+def start_minute(day, time_slot):
+    """ Schedule time of a showing: minutes since 0001-01-01 00:00, local time """
+    minutes = _minutes.get(time_slot)
+    if minutes is None:
+        minutes = _minutes[time_slot] = parse_time(time_slot)
+    return day.toordinal() * MINUTES_PER_DAY + minutes
+
+
+class ShowInstance:
+    __slots__ = ("id", "movie_id", "day", "time_slot", "screen", "start")
+
+    def __init__(self, show_id, movie_id, day, time_slot, screen, start):
+        self.id = show_id
+        self.movie_id = movie_id
+        self.day = day
+        self.time_slot = time_slot
+        self.screen = screen
+        self.start = start
+
+    @property
+    def key(self):
+        return (self.movie_id, dated(self.day, self.time_slot))
+
+    def __repr__(self):
+        return f"ShowInstance({self.id}, movie {self.movie_id}, {dated(self.day, self.time_slot)}, {self.screen})"
+
+
+class Schedule:
+    def __init__(self, screen_for, show_minutes=SHOW_MINUTES, horizon_days=HORIZON_DAYS, clock=time.time):
+        """ `screen_for(movie_id)` names the screen a movie's new showings play on """
+        self.screen_for = screen_for
+        self.show_minutes = show_minutes
+        self.horizon_days = horizon_days
+        self.clock = clock
+        self.archived_until = -1  # Showings starting at or before this minute live in the cold store
+        self._shows = {}      # { show id: ShowInstance }
+        self._ids = {}        # { (movie_id, day, time_slot): show id }
+        self._order = []      # [(start, show id)], ascending
+        self._by_movie = {}   # { movie_id: [(start, show id)] }, ascending
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._minute, self._minute_ends = 0, 0.0
+
+    def __len__(self):
+        return len(self._shows)
+
+    def __contains__(self, show_id):
+        return show_id in self._shows
+
+    def __getitem__(self, show_id):
+        return self._shows[show_id]
+
+    def get(self, show_id):
+        return self._shows.get(show_id)
+
+    def key(self, show_id):
+        return self._shows[show_id].key
+
+    # --- Clock ---
+
+    def now(self):
+        """ Current schedule minute (see start_minute), recomputed once per minute """
+        t = self.clock()
+        if t >= self._minute_ends:
+            lt = time.localtime(t)
+            self._minute = (datetime.date(lt.tm_year, lt.tm_mon, lt.tm_mday).toordinal() * MINUTES_PER_DAY
+                            + lt.tm_hour * 60 + lt.tm_min)
+            self._minute_ends = int(t) - lt.tm_sec + 60
+        return self._minute
+
+    def today(self):
+        return datetime.date.fromordinal(self.now() // MINUTES_PER_DAY)
+
+    # --- Adding showings ---
+
+    def _add(self, movie_id, day, time_slot, screen, new):
+        """ Id of a showing, creating it (and queuing its index entry in `new`) if needed; lock must be held """
+        key = (movie_id, day, time_slot)
+        show_id = self._ids.get(key)
+        if show_id is None:
+            show_id = self._next_id
+            self._next_id += 1
+            start = start_minute(day, time_slot)
+            self._shows[show_id] = ShowInstance(show_id, movie_id, day, time_slot, screen, start)
+            self._ids[key] = show_id
+            new.append((start, show_id))
+        return show_id
+
+    def _index(self, new):
+        """ Merges new (start, id) entries into the time-ordered indexes; lock must be held """
+        if not new:
+            return
+        new.sort()
+        if not self._order or new[0] > self._order[-1]:
+            self._order.extend(new)
+        elif len(new) < MERGE_AT:
+            for entry in new:  # A showing scheduled on demand: no re-sort of the whole index
+                bisect.insort(self._order, entry)
+        else:
+            self._order = sorted(self._order + new)  # Two sorted runs: a linear merge
+        for entry in new:
+            movie_order = self._by_movie.setdefault(self._shows[entry[1]].movie_id, [])
+            if movie_order and entry < movie_order[-1]:
+                bisect.insort(movie_order, entry)
+            else:
+                movie_order.append(entry)
+
+    def plan(self, movies, first_day=None, days=None):
+        """
+        Schedules every timing of `movies` (MOVIES format) on each day from
+        `first_day` (default today) for `days` days (default the horizon).
+        Already scheduled and archived showings are skipped; returns how many
+        were added.
+        """
+        first_day = first_day or self.today()
+        days = self.horizon_days if days is None else days
+        new = []
+        with self._lock:
+            for n in range(days):
+                day = first_day + datetime.timedelta(days=n)
+                for movie in movies:
+                    screen = None
+                    for time_slot in movie["timings"]:
+                        if ((movie["id"], day, time_slot) not in self._ids
+                                and start_minute(day, time_slot) > self.archived_until):
+                            screen = screen or self.screen_for(movie["id"])
+                            self._add(movie["id"], day, time_slot, screen, new)
+            self._index(new)
+        return len(new)
+
+    def showing(self, movie_id, time_slot, day=None):
+        """
+        Id of the movie's showing at `time_slot` on `day`, scheduling it if
+        needed. Without a day: the next showing at that time that has not
+        finished. None if that showing has already finished or been archived.
+        """
+        now = self.now()
+        if day is None:
+            day = datetime.date.fromordinal(now // MINUTES_PER_DAY)
+            if start_minute(day, time_slot) + self.show_minutes <= now:
+                day += datetime.timedelta(days=1)
+        start = start_minute(day, time_slot)
+        if start + self.show_minutes <= now or start <= self.archived_until:
+            return None
+        show_id = self._ids.get((movie_id, day, time_slot))
+        if show_id is None:
+            show_id = self._schedule(movie_id, day, time_slot)
+        return show_id
+
+    def _schedule(self, movie_id, day, time_slot):
+        new = []
+        with self._lock:
+            show_id = self._add(movie_id, day, time_slot, self.screen_for(movie_id), new)
+            self._index(new)
+        return show_id
+
+    def show(self, key):
+        """
+        Id for a stored (movie_id, time) key, scheduling the showing if needed
+        (finished ones too, so compaction can archive them). None once the
+        showing is in the cold store.
+        """
+        movie_id, text = key
+        day, time_slot = split_time(text)
+        if day is None:
+            return self.showing(movie_id, time_slot)
+        if start_minute(day, time_slot) <= self.archived_until:
+            return None
+        show_id = self._ids.get((movie_id, day, time_slot))
+        return show_id if show_id is not None else self._schedule(movie_id, day, time_slot)
+
+    # --- Queries ---
+
+    def upcoming(self, after=None, limit=None, movie_id=None):
+        """ Showings starting at or after the schedule minute `after` (default now), soonest first """
+        after = self.now() if after is None else after
+        with self._lock:
+            order = self._order if movie_id is None else self._by_movie.get(movie_id, [])
+            i = bisect.bisect_left(order, (after, 0))
+            end = len(order) if limit is None else i + limit
+            return [self._shows[show_id] for _, show_id in order[i:end]]
+
+    def finished(self, now=None):
+        """ Ids of the showings that have finished by `now` (default now), in start order """
+        cutoff = (self.now() if now is None else now) - self.show_minutes
+        with self._lock:
+            k = bisect.bisect_right(self._order, (cutoff, float("inf")))
+            return [show_id for _, show_id in self._order[:k]]
+
+    # --- Removal ---
+
+    def archive_until(self, minute):
+        """ Marks every showing starting at or before `minute` as archived and drops the ones still here """
+        self.archived_until = max(self.archived_until, minute)
+        with self._lock:
+            k = bisect.bisect_right(self._order, (self.archived_until, float("inf")))
+            archived = [show_id for _, show_id in self._order[:k]]
+        return self.drop(archived)
+
+    def drop(self, show_ids):
+        """ Forgets showings (see cold_store.Compactor); returns their ShowInstances """
+        dropped = set(show_ids)
+        with self._lock:
+            instances = [self._shows.pop(i) for i in show_ids if i in self._shows]
+            for s in instances:
+                del self._ids[(s.movie_id, s.day, s.time_slot)]
+            self._order = [e for e in self._order if e[1] not in dropped]
+            for movie_id in {s.movie_id for s in instances}:
+                kept = [e for e in self._by_movie[movie_id] if e[1] not in dropped]
+                if kept:
+                    self._by_movie[movie_id] = kept
+                else:
+                    del self._by_movie[movie_id]
+        return instances
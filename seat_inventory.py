@@ -0,0 +1,140 @@
+# --- SEAT INVENTORY ENGINE ---
+# One compact bytearray per show (one byte per seat, row-major), so membership
+# is a single index, bulk updates happen in place and counting runs in C.
+# ("N seats together" lookups use allocator.SeatAllocator's free-run index.)
+
+FREE = 0
+BOOKED = 1
+HELD = 2  # Only used in change notifications; holds live in BookingService, not in the bytearray
+BLOCKED = 0xFF  # Aisle / gap cell of a screen layout, never bookable
+
+
+class SeatInventory:
+    def __init__(self, rows=5, cols=6, layout_for=None):
+        """
+        `rows` x `cols` is the default hall. `layout_for(show)` may return a
+        layouts.ScreenLayout for shows playing on a differently shaped screen.
+        """
+        self.rows = rows
+        self.cols = cols
+        self.layout_for = layout_for
+        self._seats = {}  # { show: bytearray(rows * cols) }
+        self._cols = {}  # { show: row width }
+
+    @classmethod
+    def from_db(cls, booked_db, rows=5, cols=6, layout_for=None, show_for=None):
+        """
+        Builds an inventory from the legacy { MovieID: { "Time": [(r, c)] } }
+        layout; shows are (movie_id, time) unless `show_for(movie_id, time)` maps them
+        """
+        inventory = cls(rows, cols, layout_for)
+        for movie_id, timings in booked_db.items():
+            for time_slot, booked in timings.items():
+                show = show_for(movie_id, time_slot) if show_for is not None else (movie_id, time_slot)
+                inventory.mark_booked(show, booked)
+        return inventory
+
+    # --- Coordinate helpers ---
+
+    def layout(self, show):
+        return self.layout_for(show) if self.layout_for is not None and show is not None else None
+
+    def cols_for(self, show):
+        cols = self._cols.get(show)
+        if cols is None:
+            layout = self.layout(show)
+            cols = layout.cols if layout is not None else self.cols
+            if show is not None:
+                self._cols[show] = cols  # A show never changes screens
+        return cols
+
+    def index(self, coord, show=None):
+        r, c = coord
+        cols = self.cols_for(show)
+        if r < 0 or not 0 <= c < cols:
+            raise ValueError(f"no seat at {coord}")
+        return r * cols + c
+
+    def coord(self, index, show=None):
+        return divmod(index, self.cols_for(show))
+
+    # --- Show state ---
+
+    def ensure_show(self, show):
+        seats = self._seats.get(show)
+        if seats is None:
+            layout = self.layout(show)
+            if layout is not None:
+                seats = self._seats[show] = bytearray(layout.template)
+            else:
+                seats = self._seats[show] = bytearray(self.rows * self.cols)
+        return seats
+
+    def has_show(self, show):
+        return show in self._seats
+
+    def forget(self, show):
+        """ Drops everything kept for a show, e.g. once it is archived (see cold_store.Compactor) """
+        for table in (self._seats, self._cols):
+            table.pop(show, None)
+
+    def shows(self):
+        return list(self._seats)
+
+    def is_booked(self, show, coord):
+        seats = self._seats.get(show)
+        return seats is not None and seats[self.index(coord, show)] == BOOKED
+
+    def mark_booked(self, show, coords):
+        """ Marks every coordinate as booked in place (no copy of the show state) """
+        seats = self.ensure_show(show)
+        cols = self.cols_for(show)
+        for r, c in coords:
+            seats[r * cols + c] = BOOKED
+
+    def mark_booked_indices(self, show, indices):
+        seats = self.ensure_show(show)
+        for i in indices:
+            seats[i] = BOOKED
+
+    def mark_free_indices(self, show, indices):
+        seats = self.ensure_show(show)
+        for i in indices:
+            seats[i] = FREE
+
+    def restore(self, show, data):
+        """ Replaces a show's whole seat state, e.g. when loading a snapshot """
+        self._seats[show] = bytearray(data)
+
+    def count_booked(self, show):
+        seats = self._seats.get(show)
+        return seats.count(BOOKED) if seats is not None else 0
+
+    def count_available(self, show):
+        seats = self._seats.get(show)
+        if seats is None:
+            layout = self.layout(show)
+            return layout.seat_count if layout is not None else self.rows * self.cols
+        return seats.count(FREE)
+
+    def booked_seats(self, show):
+        """ Returns booked coordinates, in row-major order """
+        seats = self._seats.get(show)
+        if seats is None:
+            return []
+        cols = self.cols_for(show)
+        result = []
+        i = seats.find(BOOKED)
+        while i != -1:
+            result.append(divmod(i, cols))
+            i = seats.find(BOOKED, i + 1)
+        return result
+
+    def snapshot(self, show):
+        """ Immutable copy of the show state, e.g. for painting a seat map """
+        return bytes(self.ensure_show(show))
+
+    def stored(self, show):
+        """ Like snapshot(), but None for a show without state instead of creating it """
+        seats = self._seats.get(show)
+        return bytes(seats) if seats is not None else None
@@ -0,0 +1,171 @@
+# --- SEAT MAP CANVAS ---
+# One custom-painted, scrollable control for the whole seat grid instead of a
+# widget per seat. Paint is double-buffered, only seats inside the update
+# region are drawn, a state change refreshes just that seat's rectangle and
+# clicks are mapped to seats arithmetically.
+
+import wx
+import wx.lib.newevent
+
+from instrumentation import timed
+from resources import brush, colour, font, pen
+from seat_inventory import BLOCKED
+
+AVAILABLE = 0
+SOLD = 1
+SELECTED = 2
+# BLOCKED cells (aisles / gaps of a screen layout) are neither drawn nor clickable
+
+SEAT_SIZE = 36
+SEAT_GAP = 9
+PITCH = SEAT_SIZE + SEAT_GAP
+MARGIN = 10
+
+# Posted when the user clicks an available or selected seat: event.index, event.coord, event.selected
+SeatToggledEvent, EVT_SEAT_TOGGLED = wx.lib.newevent.NewCommandEvent()
+
+
+def default_row_name(r):
+    name = ""
+    r += 1
+    while r:
+        r, rem = divmod(r - 1, 26)
+        name = chr(ord("A") + rem) + name
+    return name
+
+
+class SeatMapCanvas(wx.ScrolledCanvas):
+    def __init__(self, parent, rows, cols, label_for=None, colours=None, categories=None):
+        super().__init__(parent, style=wx.BORDER_NONE)
+        self.SetBackgroundStyle(wx.BG_STYLE_PAINT)  # Required by AutoBufferedPaintDC
+        colours = colours or {}
+        # Shared with every other canvas through the resources cache
+        self._bg_brush = brush(colours.get("background", parent.GetBackgroundColour()))
+        self._brushes = {
+            AVAILABLE: brush(colours.get("available", "#FFFFFF")),
+            SOLD: brush(colours.get("sold", "#333333")),
+            SELECTED: brush(colours.get("selected", "#FFD700")),
+        }
+        self._text = {AVAILABLE: wx.BLACK, SOLD: colour("GREY"), SELECTED: wx.BLACK}
+        self._font = font(9, wx.FONTWEIGHT_BOLD)
+        self._pen = pen(colours.get("outline", "#555555"))
+        # Outline per seat class (index = layout category), so premium seats stand out
+        self._class_pens = [pen(c, 2) for c in colours.get("classes", [])]
+
+        self.set_layout(rows, cols, label_for, categories)
+        self.Bind(wx.EVT_PAINT, self.on_paint)
+        self.Bind(wx.EVT_LEFT_DOWN, self.on_left_down)
+
+    # --- Data ---
+
+    def set_layout(self, rows, cols, label_for=None, categories=None):
+        """ `categories` is an optional per-cell seat class table (layouts.ScreenLayout.categories) """
+        self.rows = rows
+        self.cols = cols
+        self.label_for = label_for or (lambda r, c: f"{default_row_name(r)}{c + 1}")
+        self.categories = categories
+        self.states = bytearray(rows * cols)
+        self._labels = {}  # Lazily filled, so only painted seats pay for their label
+        size = self.content_size()
+        self.SetVirtualSize(size)
+        self.SetScrollRate(PITCH // 3, PITCH // 3)
+        # Ask for the whole grid up to a sensible size; larger halls scroll
+        self.SetInitialSize(wx.Size(min(size.width, 900), min(size.height, 520)))
+        self.Refresh()
+
+    def content_size(self):
+        return wx.Size(2 * MARGIN + self.cols * PITCH - SEAT_GAP, 2 * MARGIN + self.rows * PITCH - SEAT_GAP)
+
+    def set_states(self, states):
+        """ Replaces every seat state (AVAILABLE / SOLD / SELECTED) and repaints once """
+        self.states[:] = states
+        self.Refresh()
+
+    def set_seat_state(self, index, state):
+        if self.states[index] != state:
+            self.states[index] = state
+            self.RefreshRect(self.seat_rect(index, scrolled=True), eraseBackground=False)
+
+    def selected(self):
+        """ Selected seats as (row, col), in row-major order """
+        result = []
+        i = self.states.find(SELECTED)
+        while i != -1:
+            result.append(divmod(i, self.cols))
+            i = self.states.find(SELECTED, i + 1)
+        return result
+
+    # --- Geometry ---
+
+    def seat_rect(self, index, scrolled=False):
+        r, c = divmod(index, self.cols)
+        x, y = MARGIN + c * PITCH, MARGIN + r * PITCH
+        if scrolled:
+            x, y = self.CalcScrolledPosition(x, y)
+        return wx.Rect(x, y, SEAT_SIZE, SEAT_SIZE)
+
+    def hit_test(self, pos):
+        """ Seat index under a client position, or None for gaps and margins """
+        x, y = self.CalcUnscrolledPosition(pos.x, pos.y)
+        col, dx = divmod(x - MARGIN, PITCH)
+        row, dy = divmod(y - MARGIN, PITCH)
+        if 0 <= row < self.rows and 0 <= col < self.cols and dx < SEAT_SIZE and dy < SEAT_SIZE:
+            return row * self.cols + col
+        return None
+
+    # --- Events ---
+
+    def on_left_down(self, event):
+        index = self.hit_test(event.GetPosition())
+        if index is None or self.states[index] in (SOLD, BLOCKED):
+            return
+        selected = self.states[index] != SELECTED
+        self.set_seat_state(index, SELECTED if selected else AVAILABLE)
+        wx.PostEvent(self, SeatToggledEvent(self.GetId(), index=index, coord=divmod(index, self.cols),
+                                            selected=selected))
+
+    @timed("ui.seat_map_paint")
+    def on_paint(self, event):
+        dc = wx.AutoBufferedPaintDC(self)
+        self.DoPrepareDC(dc)
+
+        # Only the damaged area is repainted, in logical (unscrolled) coordinates
+        box = self.GetUpdateRegion().GetBox()
+        x0, y0 = self.CalcUnscrolledPosition(box.x, box.y)
+        x1, y1 = x0 + box.width, y0 + box.height
+
+        dc.SetBrush(self._bg_brush)
+        dc.SetPen(wx.TRANSPARENT_PEN)
+        dc.DrawRectangle(x0, y0, box.width, box.height)
+
+        first_col = max(0, (x0 - MARGIN) // PITCH)
+        last_col = min(self.cols - 1, (x1 - MARGIN) // PITCH)
+        first_row = max(0, (y0 - MARGIN) // PITCH)
+        last_row = min(self.rows - 1, (y1 - MARGIN) // PITCH)
+
+        dc.SetFont(self._font)
+        for r in range(first_row, last_row + 1):
+            for c in range(first_col, last_col + 1):
+                self._draw_seat(dc, r * self.cols + c, r, c)
+
+    def _draw_seat(self, dc, index, r, c):
+        state = self.states[index]
+        if state == BLOCKED:
+            return
+        x, y = MARGIN + c * PITCH, MARGIN + r * PITCH
+        pen = self._pen
+        if self.categories is not None and self.categories[index] < len(self._class_pens):
+            pen = self._class_pens[self.categories[index]]
+        dc.SetPen(pen)
+        dc.SetBrush(self._brushes[state])
+        dc.DrawRoundedRectangle(x, y, SEAT_SIZE, SEAT_SIZE, 4)
+
+        if state == SOLD:
+            label = "X"
+        else:
+            label = self._labels.get(index)
+            if label is None:
+                label = self._labels[index] = self.label_for(r, c)
+        dc.SetTextForeground(self._text[state])
+        w, h = dc.GetTextExtent(label)
+        dc.DrawText(label, x + (SEAT_SIZE - w) // 2, y + (SEAT_SIZE - h) // 2)
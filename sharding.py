@@ -0,0 +1,484 @@
+"""
+Sharded booking backend: shows are partitioned by (movie id, time) over worker
+processes, each owning its shows' seats and holds outright (its own
+SeatInventory + BookingService, optionally its own write-ahead log), so no
+lock is ever shared between shards. A consistent-hashing ring maps a show to
+its shard; adding a shard moves only about 1/N of the shows.
+
+Shows are the schedule's stored keys, (movie id, "YYYY-MM-DD hh:mm AM") as
+Schedule.key(show_id) returns them, so every day's showing is a show of its
+own; workers refuse undated times.
+
+Clients talk to the workers over Unix sockets with a compact binary protocol
+and may pipeline many requests per round trip (ShardClient.commit_many).
+
+    backend = ShardedBackend(shards=4)
+    client = backend.connect()
+    client.hold("session", (1, "2026-10-18 09:00 AM"), [(2, 3)])
+    client.commit("session", (1, "2026-10-18 09:00 AM"), [(2, 3)])
+    backend.close()
+
+Wire format (little endian). Every frame is <u32 length><u8 op/status><u32 id>
+followed by the body; shows are <u32 movie id><u8 n><time, n bytes ASCII>,
+sessions <u8 n><n bytes>, seat lists <u16 n><n x (u8 row, u8 col)>.
+"""
+import bisect
+import hashlib
+import multiprocessing
+import os
+import selectors
+import shutil
+import socket
+import struct
+import tempfile
+import threading
+import time
+
+from booking_service import BookingError, BookingService, InvalidSeatError, SeatUnavailableError, UnknownShowError
+from booking_store import BookingLog
+from layouts import load_layout
+from schedule import split_time
+from seat_inventory import BOOKED, SeatInventory
+
+# Request ops
+HOLD, RELEASE, COMMIT, STATES, STATS, SHUTDOWN = range(1, 7)
+# Response statuses
+OK, CONFLICT, INVALID, ERROR = range(4)
+
+HEADER = struct.Struct("<IBI")  # length of the rest of the frame, op / status, request id
+PREFIX = struct.Struct("<BI")
+U32 = struct.Struct("<I")
+U16 = struct.Struct("<H")
+F32 = struct.Struct("<f")
+DEFAULT_SCREEN = "standard"
+VNODES = 128
+
+
+# --- Consistent hashing ---
+
+def _hash(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+class HashRing:
+    """ Maps keys to nodes; each node owns `vnodes` points on a 64-bit ring """
+
+    def __init__(self, nodes, vnodes=VNODES):
+        points = sorted((_hash(f"{node}#{v}".encode()), node) for node in nodes for v in range(vnodes))
+        self._keys = [p for p, _ in points]
+        self._nodes = [n for _, n in points]
+
+    def node_for(self, key):
+        i = bisect.bisect(self._keys, _hash(key))
+        return self._nodes[i % len(self._nodes)]
+
+
+# --- Protocol ---
+
+def encode_show(show):
+    movie_id, time_slot = show
+    text = time_slot.encode("ascii")
+    return U32.pack(movie_id) + bytes((len(text),)) + text
+
+
+def encode_session(session):
+    data = session.encode()
+    return bytes((len(data),)) + data
+
+
+def encode_coords(coords):
+    data = bytearray(U16.pack(len(coords)))
+    for r, c in coords:
+        data.append(r)
+        data.append(c)
+    return data
+
+
+def frame(op, request_id, body):
+    return HEADER.pack(len(body) + PREFIX.size, op, request_id) + body
+
+
+class Reader:
+    """ Sequential decoding of one frame body """
+
+    def __init__(self, data, pos=0, end=None):
+        self.data = data
+        self.pos = pos
+        self.end = len(data) if end is None else end
+
+    def show(self):
+        data, pos = self.data, self.pos
+        n = data[pos + 4]
+        self.pos = pos + 5 + n
+        return U32.unpack_from(data, pos)[0], data[pos + 5:pos + 5 + n].decode("ascii")
+
+    def session(self):
+        n = self.data[self.pos]
+        self.pos += 1 + n
+        return self.data[self.pos - n:self.pos].decode()
+
+    def coords(self):
+        n = U16.unpack_from(self.data, self.pos)[0]
+        start = self.pos + 2
+        self.pos = start + 2 * n
+        raw = self.data[start:self.pos]
+        return list(zip(raw[0::2], raw[1::2]))
+
+    def u8(self):
+        self.pos += 1
+        return self.data[self.pos - 1]
+
+    def f32(self):
+        self.pos += 4
+        return F32.unpack_from(self.data, self.pos - 4)[0]
+
+    def rest(self):
+        return self.data[self.pos:self.end]
+
+
+def split_frames(buffer):
+    """ Complete (op/status, request id, body Reader) frames at the front of `buffer`, and the bytes used """
+    data = bytes(buffer)  # One copy shared by the Readers; the caller then drops the used bytes
+    frames, pos, size = [], 0, len(data)
+    while size - pos >= HEADER.size:
+        length, op, request_id = HEADER.unpack_from(data, pos)
+        end = pos + 4 + length
+        if end > size:
+            break
+        frames.append((op, request_id, Reader(data, pos + HEADER.size, end)))
+        pos = end
+    return frames, pos
+
+
+# --- Shard worker ---
+
+class Shard:
+    """ The seats and holds of the shows one worker owns, and the request handlers """
+
+    def __init__(self, screens, layouts, store=None):
+        by_movie = {movie_id: layouts.get(name) or load_layout(name) for movie_id, name in screens.items()}
+        default = layouts.get(DEFAULT_SCREEN) or load_layout(DEFAULT_SCREEN)
+        self.inventory = SeatInventory(layout_for=lambda show: by_movie.get(show[0], default))
+        if store is not None:
+            store.recover(self.inventory)
+        self.service = BookingService(self.inventory, shards=1, store=store)  # Single-threaded owner
+        self.dirty = False  # Commits not yet synced to the store
+        self._dated = set()  # Show times already checked to carry a date
+
+    def show(self, body):
+        """ The show a request names; UnknownShowError unless its time is dated like the schedule's keys """
+        show = body.show()
+        if show[1] not in self._dated:
+            if split_time(show[1])[0] is None:
+                raise UnknownShowError(f"show time {show[1]!r} has no date")
+            self._dated.add(show[1])
+        return show
+
+    def handle(self, op, body):
+        """ (status, response body) for one request """
+        service = self.service
+        try:
+            if op == COMMIT:
+                show, session, coords = self.show(body), body.session(), body.coords()
+                count = service.commit(session, show, coords, wait=False)
+                self.dirty = service.store is not None
+                return OK, U16.pack(count)
+            if op == HOLD:
+                show, session, coords, seconds = self.show(body), body.session(), body.coords(), body.f32()
+                expires_at = service.hold(session, show, coords, seconds if seconds > 0 else None)
+                return OK, F32.pack(expires_at - service.clock())
+            if op == RELEASE:
+                show, session = self.show(body), body.session()
+                service.release(session, show, body.coords() if body.u8() else None)
+                return OK, b""
+            if op == STATES:
+                show, session = self.show(body), body.session()
+                states = bytearray(self.inventory.snapshot(show))
+                for coord in service.held_seats(show, exclude_session=session or None):
+                    states[self.inventory.index(coord, show)] = BOOKED
+                return OK, bytes(states)
+            if op == STATS:
+                shows = self.inventory.shows()
+                return OK, U32.pack(len(shows)) + U32.pack(sum(self.inventory.count_booked(s) for s in shows))
+            return ERROR, f"unknown op {op}".encode()
+        except SeatUnavailableError as e:
+            return CONFLICT, bytes(encode_coords(e.seats))
+        except InvalidSeatError as e:
+            return INVALID, str(e).encode()
+        except BookingError as e:
+            return ERROR, str(e).encode()
+        except (ValueError, IndexError, struct.error) as e:  # Malformed body
+            return ERROR, f"malformed request: {e}".encode()
+        except Exception as e:  # E.g. OSError / RuntimeError from the store: fail the request, keep serving
+            return ERROR, f"{type(e).__name__}: {e}".encode()
+
+
+def shard_main(path, screens, layouts, log_dir=None):
+    """ Worker process: serves one shard on the Unix socket at `path` until a SHUTDOWN request """
+    store = BookingLog(log_dir) if log_dir else None
+    shard = Shard(screens, layouts, store)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(128)
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ)
+    buffers = {}  # { conn: bytes received, not yet a whole frame }
+    outputs = {}  # { conn: replies not yet sent }
+
+    def drop(sock):
+        """ Forgets a client that went away (or misbehaved); the other clients carry on """
+        selector.unregister(sock)
+        sock.close()
+        del buffers[sock], outputs[sock]
+
+    def flush(sock):
+        out = outputs[sock]
+        try:
+            sent = sock.send(out)
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            drop(sock)
+            return
+        del out[:sent]
+        # Wait for the socket to drain rather than blocking the other clients
+        selector.modify(sock, selectors.EVENT_READ | selectors.EVENT_WRITE if out else selectors.EVENT_READ)
+
+    running = True
+    while running:
+        replies = []
+        for key, events in selector.select():
+            sock = key.fileobj
+            if sock is listener:
+                conn, _ = listener.accept()
+                conn.setblocking(False)
+                selector.register(conn, selectors.EVENT_READ)
+                buffers[conn], outputs[conn] = bytearray(), bytearray()
+                continue
+            if events & selectors.EVENT_WRITE:
+                flush(sock)
+                if sock not in buffers:
+                    continue
+            if not events & selectors.EVENT_READ:
+                continue
+            try:
+                data = sock.recv(1 << 18)
+            except BlockingIOError:
+                continue
+            except OSError:
+                data = b""
+            if not data:
+                drop(sock)
+                continue
+            buffer = buffers[sock]
+            buffer += data
+            frames, used = split_frames(buffer)
+            answers = []
+            for op, request_id, body in frames:
+                if op == SHUTDOWN:
+                    running = False
+                    status, payload = OK, b""
+                else:
+                    status, payload = shard.handle(op, body)
+                answers.append((op, request_id, status, payload))
+            del buffer[:used]
+            if answers:
+                replies.append((sock, answers))
+        # Everything read in this round is answered only after one wait for the log (group commit)
+        not_durable = None
+        if shard.dirty:
+            shard.dirty = False
+            try:
+                shard.service.sync()
+            except Exception as e:  # sync() freed this round's seats again: their commits failed
+                not_durable = f"booking not durable: {e}".encode()
+        for sock, answers in replies:
+            if sock in outputs:  # Not dropped since its requests were read
+                out = outputs[sock]
+                for op, request_id, status, payload in answers:
+                    if not_durable is not None and op == COMMIT and status == OK:
+                        status, payload = ERROR, not_durable
+                    out += frame(status, request_id, payload)
+                flush(sock)
+    for sock, out in outputs.items():  # The SHUTDOWN reply and anything still queued
+        try:
+            sock.setblocking(True)
+            sock.sendall(out)
+        except OSError:
+            pass
+    if store is not None:
+        store.close()
+    listener.close()
+
+
+# --- Client side ---
+
+class ShardConnection:
+    def __init__(self, path, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self.sock.connect(path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                self.sock.close()
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.01)
+        self.buffer = bytearray()
+        self.next_id = 0
+
+    def send(self, data):
+        self.sock.sendall(data)
+
+    def receive(self, count):
+        """ The next `count` responses, as (status, request id, body Reader) """
+        responses = []
+        while len(responses) < count:
+            frames, used = split_frames(self.buffer)
+            if frames:
+                responses.extend(frames)
+                del self.buffer[:used]
+                continue
+            data = self.sock.recv(1 << 18)
+            if not data:
+                raise ConnectionError("shard closed the connection")
+            self.buffer += data
+        return responses
+
+    def close(self):
+        self.sock.close()
+
+
+class ShardClient:
+    """
+    Routes requests to the shard owning each show. One client per thread: the
+    connections are not shared. Errors come back as the exceptions
+    BookingService raises (SeatUnavailableError, InvalidSeatError, ...).
+    """
+
+    def __init__(self, paths):
+        self.connections = [ShardConnection(p) for p in paths]
+        self.ring = HashRing(range(len(paths)))
+        self._owners = {}  # { show: shard index }, memoized ring lookups
+
+    def shard_for(self, show):
+        owner = self._owners.get(show)
+        if owner is None:
+            owner = self._owners[show] = self.ring.node_for(encode_show(show))
+        return owner
+
+    def _call(self, op, show, body):
+        conn = self.connections[self.shard_for(show)]
+        conn.send(frame(op, 0, encode_show(show) + body))
+        status, _, reply = conn.receive(1)[0]
+        return _result(status, show, reply)
+
+    def hold(self, session, show, coords, hold_seconds=None):
+        """ Returns the seconds until the hold expires """
+        reply = self._call(HOLD, show, encode_session(session) + encode_coords(coords) + F32.pack(hold_seconds or 0))
+        return reply.f32()
+
+    def release(self, session, show, coords=None):
+        flag = bytes((coords is not None,)) + (encode_coords(coords) if coords is not None else b"")
+        self._call(RELEASE, show, encode_session(session) + flag)
+
+    def commit(self, session, show, coords):
+        return U16.unpack(self._call(COMMIT, show, encode_session(session) + encode_coords(coords)).rest())[0]
+
+    def seat_states(self, show, session=None):
+        """ FREE / BOOKED / BLOCKED per cell, seats held by other sessions as BOOKED (like booking_core) """
+        return self._call(STATES, show, encode_session(session or "")).rest()
+
+    def commit_many(self, orders, window=256):
+        """
+        Commits (session, show, coords) orders with up to `window` requests in
+        flight at once, spread over the shards. Returns, per order, [] if it was
+        booked or the unavailable coordinates (None for an invalid request).
+        """
+        results = [None] * len(orders)
+        for lo in range(0, len(orders), window):
+            by_shard = {}
+            for k in range(lo, min(lo + window, len(orders))):
+                session, show, coords = orders[k]
+                by_shard.setdefault(self.shard_for(show), []).append(
+                    frame(COMMIT, k, encode_show(show) + encode_session(session) + encode_coords(coords)))
+            for shard, frames in by_shard.items():
+                self.connections[shard].send(b"".join(frames))
+            for shard, frames in by_shard.items():
+                for status, k, reply in self.connections[shard].receive(len(frames)):
+                    results[k] = [] if status == OK else reply.coords() if status == CONFLICT else None
+        return results
+
+    def stats(self):
+        """ (shows, booked seats) per shard """
+        result = []
+        for conn in self.connections:
+            conn.send(frame(STATS, 0, b""))
+            reply = conn.receive(1)[0][2]
+            result.append((U32.unpack_from(reply.data, reply.pos)[0], U32.unpack_from(reply.data, reply.pos + 4)[0]))
+        return result
+
+    def close(self):
+        for conn in self.connections:
+            conn.close()
+
+
+def _result(status, show, reply):
+    if status == OK:
+        return reply
+    if status == CONFLICT:
+        raise SeatUnavailableError(show, reply.coords())
+    message = reply.rest().decode()
+    raise InvalidSeatError(message) if status == INVALID else BookingError(message)
+
+
+class ShardedBackend:
+    """
+    Starts `shards` worker processes for the catalog `movies` (MOVIES-shaped
+    dicts; their "screen" picks the layout). With `data_dir`, each shard keeps
+    its own write-ahead log in data_dir/shard-<n> and recovers it on start.
+    """
+
+    def __init__(self, shards, movies=(), data_dir=None):
+        self.socket_dir = tempfile.mkdtemp(prefix="bms-shards-")
+        self.paths = [os.path.join(self.socket_dir, f"shard-{n}.sock") for n in range(shards)]
+        screens = {m["id"]: m.get("screen", DEFAULT_SCREEN) for m in movies}
+        layouts = {name: load_layout(name) for name in set(screens.values()) | {DEFAULT_SCREEN}}
+        context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods()
+                                              else "spawn")
+        self.processes = []
+        for n, path in enumerate(self.paths):
+            log_dir = os.path.join(data_dir, f"shard-{n}") if data_dir else None
+            process = context.Process(target=shard_main, args=(path, screens, layouts, log_dir),
+                                      name=f"booking-shard-{n}", daemon=True)
+            process.start()
+            self.processes.append(process)
+        self._local = threading.local()
+
+    def connect(self):
+        """ A new client with its own connection to every shard """
+        return ShardClient(self.paths)
+
+    def client(self):
+        """ This thread's client, created on first use """
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.connect()
+        return client
+
+    def close(self):
+        for path in self.paths:
+            try:
+                conn = ShardConnection(path, timeout=1.0)
+                conn.send(frame(SHUTDOWN, 0, b""))
+                conn.receive(1)
+                conn.close()
+            except OSError:
+                pass
+        for process in self.processes:
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+        shutil.rmtree(self.socket_dir, ignore_errors=True)
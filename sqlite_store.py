@@ -0,0 +1,212 @@
+# --- SQLITE BACKEND ---
+# Optional SQLite storage for the catalog and bookings. Runs in WAL mode with
+# one writer connection and a small pool of reader connections, so lookups
+# never wait behind a booking. Statements are fixed strings, so sqlite3's
+# per-connection statement cache keeps them prepared. Catalog timings are
+# rows of `shows` with a bare time; dated showings (schedule.py) get a row
+# with a "YYYY-MM-DD hh:mm AM" time on their first booking, deleted again
+# with its bookings once the showing is archived (prune).
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from booking_service import SeatUnavailableError
+from instrumentation import timed
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS movies (
+    id          INTEGER PRIMARY KEY,
+    title       TEXT NOT NULL,
+    genre       TEXT NOT NULL,
+    price       REAL NOT NULL,
+    description TEXT NOT NULL,
+    screen      TEXT NOT NULL DEFAULT 'standard'
+);
+CREATE TABLE IF NOT EXISTS shows (
+    id       INTEGER PRIMARY KEY,
+    movie_id INTEGER NOT NULL REFERENCES movies(id),
+    time     TEXT NOT NULL,
+    screen   INTEGER NOT NULL DEFAULT 1,
+    UNIQUE (movie_id, time, screen)
+);
+CREATE TABLE IF NOT EXISTS bookings (
+    show_id INTEGER NOT NULL REFERENCES shows(id),
+    seat    INTEGER NOT NULL,
+    PRIMARY KEY (show_id, seat)
+) WITHOUT ROWID;
+"""
+
+SQL_INSERT_MOVIE = ("INSERT OR REPLACE INTO movies (id, title, genre, price, description, screen) "
+                    "VALUES (?, ?, ?, ?, ?, ?)")
+SQL_INSERT_SHOW = "INSERT OR IGNORE INTO shows (movie_id, time, screen) VALUES (?, ?, ?)"
+SQL_SELECT_MOVIES = "SELECT id, title, genre, price, description, screen FROM movies ORDER BY id"
+SQL_SELECT_SHOWS = "SELECT movie_id, time FROM shows WHERE time NOT GLOB '[0-9][0-9][0-9][0-9]-*' ORDER BY movie_id, id"
+SQL_SHOW_ID = "SELECT id FROM shows WHERE movie_id = ? AND time = ? ORDER BY screen LIMIT 1"
+SQL_BOOKED = "SELECT seat FROM bookings WHERE show_id = ?"
+SQL_IS_BOOKED = "SELECT 1 FROM bookings WHERE show_id = ? AND seat = ?"
+SQL_INSERT_BOOKING = "INSERT INTO bookings (show_id, seat) VALUES (?, ?)"
+SQL_DELETE_BOOKINGS = "DELETE FROM bookings WHERE show_id IN (SELECT id FROM shows WHERE movie_id = ? AND time = ?)"
+SQL_DELETE_SHOW = "DELETE FROM shows WHERE movie_id = ? AND time = ?"
+SQL_ALL_BOOKINGS = ("SELECT s.movie_id, s.time, b.seat FROM bookings b JOIN shows s ON s.id = b.show_id "
+                    "ORDER BY b.show_id")
+
+
+class SqliteStore:
+    def __init__(self, path, readers=4):
+        self.path = path
+        self._writer = self._connect()
+        self._writer.executescript(SCHEMA)
+        self._migrate()
+        self._write_lock = threading.Lock()
+        self._readers = queue.Queue()
+        for _ in range(readers):
+            self._readers.put(self._connect())
+        self._show_ids = {}  # (movie_id, time) -> show id, filled lazily
+        self.keys = None  # Optional schedule.Schedule: stores show ids under their (movie_id, time) keys
+
+    def _migrate(self):
+        """ Brings databases created by older versions up to SCHEMA """
+        columns = {row[1] for row in self._writer.execute("PRAGMA table_info(movies)")}
+        if "screen" not in columns:
+            self._writer.execute("ALTER TABLE movies ADD COLUMN screen TEXT NOT NULL DEFAULT 'standard'")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, cached_statements=64)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # FULL syncs the WAL on every commit, so an acknowledged booking survives a power failure
+        # (the write-ahead log backend's guarantee too); NORMAL could lose the last few
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    @contextmanager
+    def _reader(self):
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    @contextmanager
+    def _transaction(self):
+        with self._write_lock:
+            self._writer.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._writer
+            except BaseException:
+                self._writer.execute("ROLLBACK")
+                raise
+            self._writer.execute("COMMIT")
+
+    # --- Catalog ---
+
+    def load_catalog(self, movies, screen=1):
+        """ Bulk-loads movies in the MOVIES format, plus one show per timing """
+        with self._transaction() as conn:
+            conn.executemany(SQL_INSERT_MOVIE, ((m["id"], m["title"], m["genre"], m["price"], m["description"],
+                                                 m.get("screen", "standard")) for m in movies))
+            conn.executemany(SQL_INSERT_SHOW, ((m["id"], t, screen) for m in movies for t in m["timings"]))
+
+    def movies(self):
+        """ The catalog as a list of dicts shaped like MOVIES """
+        with self._reader() as conn:
+            movies = {row[0]: {"id": row[0], "title": row[1], "genre": row[2], "price": row[3],
+                               "description": row[4], "screen": row[5], "timings": []}
+                      for row in conn.execute(SQL_SELECT_MOVIES)}
+            for movie_id, time_slot in conn.execute(SQL_SELECT_SHOWS):
+                movies[movie_id]["timings"].append(time_slot)
+        return list(movies.values())
+
+    def show_id(self, show):
+        key = show if self.keys is None else self.keys.key(show)
+        show_id = self._show_ids.get(key)
+        if show_id is None:
+            with self._reader() as conn:
+                row = conn.execute(SQL_SHOW_ID, key).fetchone()
+            if row is None and self.keys is not None:
+                with self._transaction() as conn:
+                    conn.execute(SQL_INSERT_SHOW, (*key, 1))
+                    row = conn.execute(SQL_SHOW_ID, key).fetchone()
+            if row is None:
+                raise KeyError(f"no show {key}")
+            show_id = self._show_ids[key] = row[0]
+        return show_id
+
+    # --- Bookings ---
+
+    def booked_seats(self, show):
+        """ Booked seat indices of one show (index lookup on the (show, seat) primary key) """
+        with self._reader() as conn:
+            return [row[0] for row in conn.execute(SQL_BOOKED, (self.show_id(show),))]
+
+    def is_booked(self, show, index):
+        with self._reader() as conn:
+            return conn.execute(SQL_IS_BOOKED, (self.show_id(show), index)).fetchone() is not None
+
+    def book(self, show, indices):
+        """
+        Inserts every seat or none; raises SeatUnavailableError naming the
+        already booked seat indices (BookingService turns them into coordinates)
+        """
+        show_id = self.show_id(show)
+        with self._transaction() as conn:
+            conn.execute("SAVEPOINT book")
+            try:
+                conn.executemany(SQL_INSERT_BOOKING, ((show_id, i) for i in indices))
+            except sqlite3.IntegrityError:
+                conn.execute("ROLLBACK TO book")  # Drop our own inserts, then see which seats were taken
+                taken = [i for i in indices if conn.execute(SQL_IS_BOOKED, (show_id, i)).fetchone() is not None]
+                raise SeatUnavailableError(show, taken)
+
+    def prune(self, keys):
+        """ Deletes the bookings and show rows of archived (movie_id, time) keys, e.g. once they are in the cold store """
+        with self._transaction() as conn:
+            conn.executemany(SQL_DELETE_BOOKINGS, keys)
+            conn.executemany(SQL_DELETE_SHOW, keys)
+        for key in keys:
+            self._show_ids.pop(key, None)
+
+    def load_inventory(self, inventory):
+        """ Copies every stored booking into a SeatInventory (with keys: except archived showings) """
+        shows = {}
+        with self._reader() as conn:
+            for movie_id, time_slot, seat in conn.execute(SQL_ALL_BOOKINGS):
+                key = (movie_id, time_slot)
+                show = shows.get(key, key)
+                if show is key and self.keys is not None:
+                    show = shows[key] = self.keys.show(key)
+                if show is not None:
+                    inventory.mark_booked_indices(show, (seat,))
+
+    def history(self):
+        """ Stored bookings as (show, indices, None) per show, like BookingLog.history() (no timestamps) """
+        with self._reader() as conn:
+            show, indices = None, []
+            for movie_id, time_slot, seat in conn.execute(SQL_ALL_BOOKINGS):
+                if (movie_id, time_slot) != show:
+                    if indices:
+                        yield show, indices, None
+                    show, indices = (movie_id, time_slot), []
+                indices.append(seat)
+            if indices:
+                yield show, indices, None
+
+    # Store protocol used by BookingService (same as booking_store.BookingLog)
+
+    @timed("store.durable_write")
+    def append(self, show, indices):
+        self.book(show, indices)
+        return None
+
+    def wait_durable(self, ticket):
+        pass
+
+    def sync(self):
+        pass
+
+    def close(self):
+        self._writer.close()
+        while not self._readers.empty():
+            self._readers.get().close()
@@ -0,0 +1,91 @@
+"""
+Randomized property checks for allocator.SeatAllocator on an 800-seat hall
+sold to between 50% and 97%: every allocation is free, adjacent, in one row
+and the best-scoring block there is, and None only comes back when no row has
+room.
+"""
+import random
+
+import pytest
+
+from allocator import IDEAL_ROW, ORPHAN_PENALTY, ROW_WEIGHT, SeatAllocator
+from booking_service import BookingService
+from layouts import parse_layout
+from seat_inventory import FREE, HELD, SeatInventory
+
+# 25 rows x (8 + 16 + 8) seats with two aisles
+HALL = parse_layout("[classes]\nS standard 0\n[rows]\n" + "".join(
+    f"R{r}: SSSSSSSS.SSSSSSSSSSSSSSSS.SSSSSSSS\n" for r in range(25)), "test800")
+SHOW = (1, "07:00 PM")
+
+
+def make_show(fill, seed):
+    inventory = SeatInventory(layout_for=lambda show: HALL)
+    service = BookingService(inventory)
+    allocator = SeatAllocator(inventory, service)
+    allocator.best_seats(SHOW, 1)  # Build the run index first, so the checks cover its incremental updates
+    rng = random.Random(seed)
+    seats = [i for i, cat in enumerate(HALL.categories) if cat != 0xFF]
+    for i in rng.sample(seats, int(len(seats) * fill)):
+        service.commit("filler", SHOW, [HALL.coord(i)])
+    return inventory, service, allocator, rng
+
+
+def available(inventory, service):
+    """ Seat states with held seats counted as taken """
+    seats = bytearray(inventory.snapshot(SHOW))
+    for coord in service.held_seats(SHOW):
+        seats[HALL.index(coord)] = HELD
+    return seats
+
+
+def block_scores(seats, count):
+    """ { (row, start col): score } of every block of `count` free seats, scored like ShowRuns.best """
+    ideal_row = (HALL.rows - 1) * IDEAL_ROW
+    centre = (HALL.cols - count) / 2
+    scores = {}
+    for r in range(HALL.rows):
+        row = seats[r * HALL.cols:(r + 1) * HALL.cols]
+        for s in range(HALL.cols - count + 1):
+            if any(row[c] != FREE for c in range(s, s + count)):
+                continue
+            start, end = s, s + count  # Free run around the block
+            while start > 0 and row[start - 1] == FREE:
+                start -= 1
+            while end < HALL.cols and row[end] == FREE:
+                end += 1
+            score = abs(r - ideal_row) * ROW_WEIGHT + abs(s - centre)
+            if s - start == 1 or end - (s + count) == 1:
+                score += ORPHAN_PENALTY
+            scores[r, s] = score
+    return scores
+
+
+@pytest.mark.parametrize("trial", range(40))
+def test_allocations_are_free_adjacent_and_best(trial):
+    inventory, service, allocator, rng = make_show(random.Random(trial).uniform(0.5, 0.97), trial)
+    session = 0
+    while True:
+        count = rng.randint(1, 6)
+        seats = available(inventory, service)
+        scores = block_scores(seats, count)
+        coords = allocator.best_seats(SHOW, count)
+        if coords is None:
+            assert not scores, f"allocator missed a block of {count}"
+            return
+        rows = {r for r, _ in coords}
+        cols = [c for _, c in coords]
+        assert len(rows) == 1 and cols == list(range(cols[0], cols[0] + count)), coords
+        assert all(seats[HALL.index(c)] == FREE for c in coords), f"allocated a taken seat: {coords}"
+        assert scores[coords[0]] == pytest.approx(min(scores.values())), f"{coords} is not the best block"
+        session += 1
+        if rng.random() < 0.5:
+            service.commit(f"s{session}", SHOW, coords)
+        else:
+            service.hold(f"s{session}", SHOW, coords)
+
+
+def test_no_room_returns_none():
+    inventory, service, allocator, _ = make_show(0.0, 0)
+    assert allocator.best_seats(SHOW, HALL.cols) is None  # Aisles split every row
+    assert allocator.best_seats(SHOW, 0) is None